@@ -0,0 +1,24 @@
+# backend/benchmarks/__init__.py
+#
+# Benchmarks reproducibles contra un PostgreSQL local (las variables DB_* de database.py).
+# Se ejecutan desde la raíz del repositorio:
+#
+#   1. Sembrar datos (determinista con --semilla; --escala 1 = 50k clientes, 500k pedidos,
+#      1M OPs, 5M lotes; --escala 0.01 para una corrida rápida):
+#        python -m backend.benchmarks.sembrar --escala 0.1 --truncar
+#
+#   2. Correr escenarios de carga (en proceso, o contra un servidor con --url):
+#        python -m backend.benchmarks.carga --duracion 10 --concurrencia 16
+#        python -m backend.benchmarks.carga --url http://localhost:8000 --escenarios lotes.
+#
+#   3. Comparar dos corridas (sale con código 1 si hay regresiones):
+#        python -m backend.benchmarks.comparar resultados/base.json resultados/nuevo.json
+#
+# Los escenarios de escritura modifican la base: para comparar commits, volver a sembrar
+# con la misma escala y semilla antes de cada corrida.
+#
+# Micro-benchmark de validación y serialización de los esquemas (sin base ni HTTP):
+#   python -m backend.benchmarks.serializacion --grafos op ruta --fanout 1 10 100
+#
+# Throughput según la cantidad de workers (levanta backend/servidor.py para cada valor):
+#   python -m backend.benchmarks.escalado --workers 1 2 4 8
@@ -0,0 +1,223 @@
+# backend/benchmarks/carga.py
+#
+# Corre los escenarios de carga (benchmarks/escenarios.py) uno por uno, con N clientes
+# concurrentes durante un tiempo fijo, y escribe un JSON con p50/p95/p99, RPS y consultas SQL
+# por solicitud (del encabezado Server-Timing, ver core/instrumentacion.py). Uso:
+#
+#   python -m backend.benchmarks.carga                                  # API en proceso
+#   python -m backend.benchmarks.carga --url http://localhost:8000      # servidor ya levantado
+#   python -m backend.benchmarks.carga --escenarios lotes. op.detalle --duracion 20
+#
+# En proceso se mide la aplicación sin red (útil para comparar commits); con --url se mide el
+# servidor tal como corre (workers, uvloop, etc.). La base la leen ambos modos con DB_*.
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from backend.benchmarks.escenarios import Contexto, Escenario, seleccionar
+from backend.database import AsyncSessionLocal, engine
+
+DIRECTORIO_RESULTADOS = Path(__file__).parent / "resultados"
+# Variables de entorno que cambian el comportamiento medido y se guardan con el resultado
+PREFIJOS_ENTORNO = ("CACHE_", "COALESCENCIA_", "SQL_", "DB_ECHO", "WEB_", "PLANIFICACION_")
+
+_SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) consultas"')
+
+
+def percentil(valores_ordenados: list[float], p: float) -> Optional[float]:
+    """Percentil por rango más cercano (valores ya ordenados)."""
+    if not valores_ordenados:
+        return None
+    rango = math.ceil(p / 100 * len(valores_ordenados))
+    return valores_ordenados[min(max(rango, 1), len(valores_ordenados)) - 1]
+
+
+class Medicion:
+    def __init__(self):
+        self.latencias_ms: list[float] = []
+        self.consultas: list[int] = []
+        self.db_ms: list[float] = []
+        self.status: dict[int, int] = {}
+        self.errores = 0
+
+    def registrar(self, latencia_ms: float, respuesta: Optional[httpx.Response]) -> None:
+        if respuesta is None:
+            self.errores += 1
+            return
+        self.latencias_ms.append(latencia_ms)
+        self.status[respuesta.status_code] = self.status.get(respuesta.status_code, 0) + 1
+        if respuesta.status_code >= 400:
+            self.errores += 1
+        timing = _SERVER_TIMING_DB.search(respuesta.headers.get("server-timing", ""))
+        if timing:
+            self.db_ms.append(float(timing.group(1)))
+            self.consultas.append(int(timing.group(2)))
+
+    def resumen(self, nombre: str, segundos: float) -> dict:
+        latencias = sorted(self.latencias_ms)
+        consultas = sorted(self.consultas)
+        return {
+            "escenario": nombre,
+            "solicitudes": len(latencias),
+            "errores": self.errores,
+            "status": {str(codigo): cantidad for codigo, cantidad in sorted(self.status.items())},
+            "rps": round(len(latencias) / segundos, 2) if segundos else 0.0,
+            "latencia_ms": {
+                "p50": _redondear(percentil(latencias, 50)),
+                "p95": _redondear(percentil(latencias, 95)),
+                "p99": _redondear(percentil(latencias, 99)),
+                "max": _redondear(latencias[-1] if latencias else None),
+                "media": _redondear(sum(latencias) / len(latencias) if latencias else None),
+            },
+            "consultas_por_solicitud": {
+                "media": _redondear(sum(consultas) / len(consultas) if consultas else None),
+                "p95": percentil(consultas, 95),
+                "max": consultas[-1] if consultas else None,
+            },
+            "db_ms_media": _redondear(sum(self.db_ms) / len(self.db_ms) if self.db_ms else None),
+        }
+
+
+def _redondear(valor: Optional[float]) -> Optional[float]:
+    return round(valor, 2) if valor is not None else None
+
+
+async def correr_escenario(
+    cliente: httpx.AsyncClient, escenario: Escenario, ctx: Contexto,
+    concurrencia: int, duracion: float, calentamiento: float, semilla: int,
+) -> dict:
+    medicion = Medicion()
+    comienzo = time.monotonic()
+    inicio_medicion = comienzo + calentamiento
+    fin = inicio_medicion + duracion
+
+    async def cliente_virtual(numero: int):
+        rng = random.Random(f"{semilla}:{escenario.nombre}:{numero}")
+        while (ahora := time.monotonic()) < fin:
+            solicitud = escenario.generar(ctx, rng)
+            inicio = time.perf_counter()
+            try:
+                respuesta = await cliente.request(
+                    solicitud.metodo, solicitud.url, json=solicitud.json, files=solicitud.files
+                )
+            except httpx.HTTPError:
+                respuesta = None
+            latencia_ms = (time.perf_counter() - inicio) * 1000
+            # Lo que empezó durante el calentamiento no se cuenta
+            if ahora >= inicio_medicion:
+                medicion.registrar(latencia_ms, respuesta)
+
+    await asyncio.gather(*(cliente_virtual(i) for i in range(concurrencia)))
+    return medicion.resumen(escenario.nombre, duracion)
+
+
+def _commit() -> dict:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], capture_output=True, text=True, cwd=Path(__file__).parent).stdout.strip()
+    return {"sha": git("rev-parse", "HEAD") or None, "sucio": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+async def correr(args) -> dict:
+    async with AsyncSessionLocal() as session:
+        ctx = await Contexto.cargar(session)
+
+    escenarios = seleccionar(args.escenarios)
+    omitidos = [e.nombre for e in escenarios if e.requiere is not None and not e.requiere(ctx)]
+    escenarios = [e for e in escenarios if e.nombre not in omitidos]
+    if not escenarios:
+        raise SystemExit("Ningún escenario seleccionado.")
+
+    limites = httpx.Limits(max_connections=args.concurrencia, max_keepalive_connections=args.concurrencia)
+    resultados = []
+
+    async def correr_todos(cliente: httpx.AsyncClient):
+        for escenario in escenarios:
+            resultado = await correr_escenario(
+                cliente, escenario, ctx, args.concurrencia, args.duracion, args.calentamiento, args.semilla
+            )
+            resultados.append(resultado)
+            print(
+                f"{escenario.nombre:<24} {resultado['rps']:>9.1f} rps  "
+                f"p50 {resultado['latencia_ms']['p50']}  p95 {resultado['latencia_ms']['p95']}  "
+                f"p99 {resultado['latencia_ms']['p99']} ms  "
+                f"consultas {resultado['consultas_por_solicitud']['media']}  errores {resultado['errores']}"
+            )
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=limites, timeout=60) as cliente:
+            await correr_todos(cliente)
+    else:
+        from backend.main import app
+        async with app.router.lifespan_context(app):
+            transporte = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transporte, base_url="http://benchmark", timeout=60) as cliente:
+                await correr_todos(cliente)
+
+    return {
+        "fecha": datetime.now(timezone.utc).isoformat(),
+        "commit": _commit(),
+        "modo": args.url or "en_proceso",
+        "parametros": {
+            "concurrencia": args.concurrencia, "duracion_s": args.duracion,
+            "calentamiento_s": args.calentamiento, "semilla": args.semilla,
+        },
+        "datos": ctx.maximos,
+        "entorno": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "variables": {k: v for k, v in sorted(os.environ.items()) if k.startswith(PREFIJOS_ENTORNO)},
+        },
+        "omitidos": omitidos,
+        "escenarios": resultados,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Escenarios de carga por router con resultados en JSON.")
+    parser.add_argument("--url", help="Servidor a medir (por defecto, la API en proceso)")
+    parser.add_argument("--escenarios", nargs="*", help="Prefijos de nombre (p. ej. 'lotes.' 'op.detalle'); por defecto todos los no pesados")
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--duracion", type=float, default=10.0, help="Segundos medidos por escenario")
+    parser.add_argument("--calentamiento", type=float, default=2.0, help="Segundos previos que no se cuentan")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", type=Path, help="Archivo JSON (por defecto benchmarks/resultados/<fecha>-<commit>.json)")
+    args = parser.parse_args()
+
+    # El log por solicitud de la API (INFO) no aporta nada acá y cuesta tiempo
+    logging.basicConfig(level=logging.WARNING)
+
+    async def ejecutar():
+        try:
+            return await correr(args)
+        finally:
+            await engine.dispose()
+
+    resultado = asyncio.run(ejecutar())
+
+    salida = args.salida
+    if salida is None:
+        DIRECTORIO_RESULTADOS.mkdir(parents=True, exist_ok=True)
+        sha = (resultado["commit"]["sha"] or "sin-git")[:10]
+        salida = DIRECTORIO_RESULTADOS / f"{datetime.now():%Y%m%d-%H%M%S}-{sha}.json"
+    salida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False))
+    print(f"Resultados en {salida}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
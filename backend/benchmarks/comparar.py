@@ -0,0 +1,83 @@
+# backend/benchmarks/comparar.py
+#
+# Compara dos resultados de benchmarks/carga.py escenario por escenario. Uso:
+#
+#   python -m backend.benchmarks.comparar base.json nuevo.json --tolerancia 0.15
+#
+# Es regresión si el p95 sube o el RPS baja más que la tolerancia, o si aumentan las consultas
+# SQL por solicitud (eso no es ruido de medición: es un cambio en el acceso a datos).
+# Sale con código 1 si encuentra alguna, para usarlo en CI.
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Optional
+
+
+def _variacion(base: Optional[float], nuevo: Optional[float]) -> Optional[float]:
+    if base in (None, 0) or nuevo is None:
+        return None
+    return (nuevo - base) / base
+
+def _formato(variacion: Optional[float]) -> str:
+    return "   n/d" if variacion is None else f"{variacion:+6.1%}"
+
+
+def comparar(base: dict, nuevo: dict, tolerancia: float) -> list[str]:
+    """Imprime la tabla comparativa y devuelve la lista de regresiones encontradas."""
+    por_nombre = {e["escenario"]: e for e in base["escenarios"]}
+    regresiones = []
+
+    print(f"{'escenario':<24} {'p50':>7} {'p95':>7} {'p99':>7} {'rps':>7} {'consultas':>14}")
+    for escenario in nuevo["escenarios"]:
+        anterior = por_nombre.get(escenario["escenario"])
+        if anterior is None:
+            print(f"{escenario['escenario']:<24} (nuevo)")
+            continue
+        variaciones = {
+            p: _variacion(anterior["latencia_ms"][p], escenario["latencia_ms"][p]) for p in ("p50", "p95", "p99")
+        }
+        variacion_rps = _variacion(anterior["rps"], escenario["rps"])
+        consultas_antes = anterior["consultas_por_solicitud"]["media"]
+        consultas_ahora = escenario["consultas_por_solicitud"]["media"]
+        print(
+            f"{escenario['escenario']:<24} {_formato(variaciones['p50'])} {_formato(variaciones['p95'])} "
+            f"{_formato(variaciones['p99'])} {_formato(variacion_rps)} {consultas_antes!s:>6} -> {consultas_ahora!s:<6}"
+        )
+
+        if variaciones["p95"] is not None and variaciones["p95"] > tolerancia:
+            regresiones.append(f"{escenario['escenario']}: p95 {_formato(variaciones['p95'])}")
+        if variacion_rps is not None and variacion_rps < -tolerancia:
+            regresiones.append(f"{escenario['escenario']}: rps {_formato(variacion_rps)}")
+        if consultas_antes is not None and consultas_ahora is not None and consultas_ahora > consultas_antes + 0.5:
+            regresiones.append(f"{escenario['escenario']}: consultas por solicitud {consultas_antes} -> {consultas_ahora}")
+
+    return regresiones
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compara dos resultados de benchmarks/carga.py.")
+    parser.add_argument("base", type=Path)
+    parser.add_argument("nuevo", type=Path)
+    parser.add_argument("--tolerancia", type=float, default=0.15, help="Variación relativa aceptada en p95 y RPS")
+    args = parser.parse_args()
+
+    base = json.loads(args.base.read_text())
+    nuevo = json.loads(args.nuevo.read_text())
+    print(f"base:  {base['commit']['sha']} ({base['fecha']})")
+    print(f"nuevo: {nuevo['commit']['sha']} ({nuevo['fecha']})")
+    if base["datos"] != nuevo["datos"] or base["parametros"] != nuevo["parametros"]:
+        print("AVISO: las corridas usaron datos o parámetros distintos; la comparación puede no ser válida.")
+
+    regresiones = comparar(base, nuevo, args.tolerancia)
+    if regresiones:
+        print("\nRegresiones:")
+        for regresion in regresiones:
+            print(f"  - {regresion}")
+        sys.exit(1)
+    print("\nSin regresiones.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# backend/benchmarks/escalado.py
+#
+# Throughput según la cantidad de workers: para cada valor de --workers levanta
+# 'python -m backend.servidor' en un puerto libre, espera /health/ready, corre los escenarios
+# de carga (benchmarks/carga.py) contra él por HTTP y lo apaga con SIGTERM. Uso:
+#
+#   python -m backend.benchmarks.escalado --workers 1 2 4 8 --escenarios lotes.detalle op.listar
+#
+# El generador de carga es un solo proceso Python: si su propio CPU llega al 100% antes que
+# el servidor, el techo medido es el del cliente (subir --concurrencia no ayuda; usar una
+# herramienta externa o correr el cliente en otra máquina). Conviene escenarios de lectura:
+# los de escritura cambian los datos entre una cantidad de workers y la siguiente.
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from backend.benchmarks.carga import correr
+from backend.database import engine
+
+ESCENARIOS_POR_DEFECTO = ["clientes.detalle", "pedidos.detalle", "op.listar", "lotes.detalle", "produccion.listar"]
+TIMEOUT_ARRANQUE_SEGUNDOS = 120
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _esperar_listo(url: str, proceso: subprocess.Popen) -> None:
+    limite = time.monotonic() + TIMEOUT_ARRANQUE_SEGUNDOS
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise SystemExit(f"El servidor terminó al arrancar (código {proceso.returncode}).")
+        try:
+            if httpx.get(f"{url}/health/ready", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"El servidor no quedó listo en {TIMEOUT_ARRANQUE_SEGUNDOS} s.")
+
+
+def medir(workers: int, args) -> dict:
+    puerto = _puerto_libre()
+    url = f"http://127.0.0.1:{puerto}"
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "backend.servidor", "--host", "127.0.0.1", "--port", str(puerto), "--workers", str(workers)],
+        env=os.environ.copy(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _esperar_listo(url, proceso)
+        print(f"--- {workers} worker(s) ---")
+        carga = argparse.Namespace(
+            url=url, escenarios=args.escenarios, concurrencia=args.concurrencia,
+            duracion=args.duracion, calentamiento=args.calentamiento, semilla=args.semilla,
+        )
+
+        async def ejecutar():
+            try:
+                return await correr(carga)
+            finally:
+                await engine.dispose()
+
+        resultado = asyncio.run(ejecutar())
+    finally:
+        proceso.send_signal(signal.SIGTERM)
+        try:
+            proceso.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            proceso.kill()
+    return {"workers": workers, **resultado}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Throughput de la API según la cantidad de workers.")
+    parser.add_argument("--workers", nargs="*", type=int, default=[1, 2, 4])
+    parser.add_argument("--escenarios", nargs="*", default=ESCENARIOS_POR_DEFECTO)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--duracion", type=float, default=10.0)
+    parser.add_argument("--calentamiento", type=float, default=2.0)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", type=Path, help="Guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    corridas = [medir(workers, args) for workers in args.workers]
+
+    # Resumen: RPS de cada escenario y escalado respecto de la primera cantidad de workers
+    base = {e["escenario"]: e["rps"] for e in corridas[0]["escenarios"]}
+    print(f"\n{'escenario':<24} " + "  ".join(f"{str(c['workers']) + 'w rps':>7} {'':<5} {'p95':>8}" for c in corridas))
+    for nombre in base:
+        celdas = []
+        for corrida in corridas:
+            escenario = next(e for e in corrida["escenarios"] if e["escenario"] == nombre)
+            factor = escenario["rps"] / base[nombre] if base[nombre] else 0.0
+            celdas.append(f"{escenario['rps']:>7.0f} x{factor:<4.1f} {escenario['latencia_ms']['p95']!s:>8}")
+        print(f"{nombre:<24} " + "  ".join(celdas))
+
+    if args.salida:
+        args.salida.write_text(json.dumps({
+            "fecha": datetime.now(timezone.utc).isoformat(),
+            "cpus": os.cpu_count(),
+            "corridas": corridas,
+        }, indent=2, ensure_ascii=False))
+        print(f"Resultados en {args.salida}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
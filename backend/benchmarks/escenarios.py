@@ -0,0 +1,139 @@
+# backend/benchmarks/escenarios.py
+#
+# Escenarios de carga por router. Cada escenario arma una solicitud aleatoria (con el rng de su
+# worker, así que una corrida con la misma semilla pide lo mismo) a partir del contexto de la
+# base sembrada: IDs máximos, pares ruta/producto y pasos de cada ruta.
+# Nombres: "<router>.<tipo>", con tipo listar, buscar, detalle, crear o masivo.
+
+import json
+import random
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.benchmarks.sembrar import PALABRAS
+
+
+class Contexto:
+    """Lo que los escenarios necesitan saber de la base sembrada (se lee una vez al empezar)."""
+
+    def __init__(self, maximos: dict[str, int], rutas: list[tuple[int, int, list[int]]], hay_planificacion: bool):
+        self.maximos = maximos
+        # (ruta_id, producto_id, detalle_ids en orden de secuencia)
+        self.rutas = rutas
+        self.hay_planificacion = hay_planificacion
+
+    @classmethod
+    async def cargar(cls, db_session: AsyncSession) -> "Contexto":
+        maximos = {}
+        for tabla, columna in (("clientes", "cliente_id"), ("pedidos", "pedido_id"), ("op", "op_id"), ("lotes", "lote_interno_id")):
+            maximos[tabla] = (await db_session.execute(text(f"SELECT coalesce(max({columna}), 0) FROM {tabla}"))).scalar_one()
+        rutas = (await db_session.execute(text(
+            "SELECT ruta_id, producto_id, pasos_detalle_ids FROM rutas_maestras WHERE cardinality(pasos_detalle_ids) > 0"
+        ))).all()
+        if not all(maximos.values()) or not rutas:
+            raise SystemExit("La base no tiene datos: sembrar primero con 'python -m backend.benchmarks.sembrar'.")
+        hay_planificacion = (await db_session.execute(text("SELECT EXISTS (SELECT 1 FROM planificacion_corridas)"))).scalar_one()
+        return cls(maximos, [tuple(fila) for fila in rutas], hay_planificacion)
+
+    def id_al_azar(self, rng: random.Random, tabla: str) -> int:
+        return rng.randint(1, self.maximos[tabla])
+
+
+class Solicitud:
+    def __init__(self, metodo: str, url: str, json: Optional[dict] = None, files: Optional[dict] = None):
+        self.metodo = metodo
+        self.url = url
+        self.json = json
+        self.files = files
+
+
+class Escenario:
+    """
+    'pesado': no entra en la selección por defecto (hay que pedirlo por nombre), p. ej. una
+    corrida de planificación sobre millones de lotes.
+    'requiere': condición sobre el contexto; si no se cumple, el escenario se omite.
+    """
+
+    def __init__(
+        self,
+        nombre: str,
+        generar: Callable[[Contexto, random.Random], Solicitud],
+        pesado: bool = False,
+        requiere: Optional[Callable[[Contexto], bool]] = None,
+    ):
+        self.nombre = nombre
+        self.generar = generar
+        self.pesado = pesado
+        self.requiere = requiere
+
+
+def _ndjson(filas: list[dict]) -> dict:
+    cuerpo = "\n".join(json.dumps(fila, ensure_ascii=False) for fila in filas).encode()
+    return {"archivo": ("carga.ndjson", cuerpo, "application/x-ndjson")}
+
+def _lote_nuevo(ctx: Contexto, rng: random.Random) -> dict:
+    ruta_id, producto_id, _ = rng.choice(ctx.rutas)
+    return {"producto_id": producto_id, "ruta_id": ruta_id, "lote_numero_visible": f"B{rng.getrandbits(40):x}"}
+
+
+ESCENARIOS: list[Escenario] = [
+    # --- Clientes ---
+    Escenario("clientes.listar", lambda ctx, rng: Solicitud(
+        "GET", f"/clientes/?skip={rng.randrange(0, max(ctx.maximos['clientes'] - 50, 1))}&limit=50")),
+    Escenario("clientes.buscar", lambda ctx, rng: Solicitud("GET", f"/clientes/?search={rng.choice(PALABRAS)}&limit=50")),
+    Escenario("clientes.detalle", lambda ctx, rng: Solicitud("GET", f"/clientes/{ctx.id_al_azar(rng, 'clientes')}")),
+    Escenario("clientes.crear", lambda ctx, rng: Solicitud("POST", "/clientes/", json={
+        "nombre": f"Bench {rng.getrandbits(40):x}", "localidad": "Rosario"})),
+    Escenario("clientes.masivo", lambda ctx, rng: Solicitud("POST", "/clientes/importar?formato=ndjson", files=_ndjson([
+        {"nombre": f"Bench {rng.getrandbits(40):x}", "localidad": "Rosario"} for _ in range(500)]))),
+
+    # --- Pedidos ---
+    Escenario("pedidos.listar", lambda ctx, rng: Solicitud(
+        "GET", f"/pedidos/?skip={rng.randrange(0, max(ctx.maximos['pedidos'] - 50, 1))}&limit=50")),
+    Escenario("pedidos.buscar", lambda ctx, rng: Solicitud("GET", f"/pedidos/?search={rng.choice(PALABRAS)}&limit=50")),
+    Escenario("pedidos.detalle", lambda ctx, rng: Solicitud("GET", f"/pedidos/{ctx.id_al_azar(rng, 'pedidos')}")),
+    Escenario("pedidos.crear", lambda ctx, rng: Solicitud("POST", "/pedidos/", json={
+        "cliente_id": ctx.id_al_azar(rng, "clientes"), "detalle": "bench"})),
+    Escenario("pedidos.masivo", lambda ctx, rng: Solicitud("POST", "/pedidos/importar?formato=ndjson", files=_ndjson([
+        {"cliente_id": ctx.id_al_azar(rng, "clientes"), "detalle": "bench"} for _ in range(500)]))),
+
+    # --- OP ---
+    Escenario("op.listar", lambda ctx, rng: Solicitud(
+        "GET", f"/op/?skip={rng.randrange(0, max(ctx.maximos['op'] - 50, 1))}&limit=50")),
+    Escenario("op.buscar", lambda ctx, rng: Solicitud("GET", f"/op/?search={rng.choice(PALABRAS)}&limit=50")),
+    Escenario("op.detalle", lambda ctx, rng: Solicitud("GET", f"/op/{ctx.id_al_azar(rng, 'op')}")),
+    Escenario("op.crear", lambda ctx, rng: Solicitud("POST", "/op/", json={
+        "pedido_id": ctx.id_al_azar(rng, "pedidos"), "detalle": "bench"})),
+    Escenario("op.masivo", lambda ctx, rng: Solicitud("POST", "/op/con-lotes", json={
+        "pedido_id": ctx.id_al_azar(rng, "pedidos"), "detalle": "bench",
+        "lotes": [_lote_nuevo(ctx, rng) for _ in range(20)]})),
+
+    # --- Lotes ---
+    Escenario("lotes.listar", lambda ctx, rng: Solicitud(
+        "GET", f"/lotes/?page={rng.randint(1, max(ctx.maximos['lotes'] // 50, 1))}&per_page=50")),
+    Escenario("lotes.buscar", lambda ctx, rng: Solicitud("GET", f"/lotes/?search=L{rng.randint(1, ctx.maximos['op']):07d}&per_page=50")),
+    Escenario("lotes.detalle", lambda ctx, rng: Solicitud("GET", f"/lotes/{ctx.id_al_azar(rng, 'lotes')}")),
+    Escenario("lotes.crear", lambda ctx, rng: Solicitud("POST", "/lotes/", json={
+        "op_id": ctx.id_al_azar(rng, "op"), **_lote_nuevo(ctx, rng)})),
+    Escenario("lotes.masivo", lambda ctx, rng: Solicitud("POST", "/lotes/estado", json={
+        "lote_interno_ids": [ctx.id_al_azar(rng, "lotes") for _ in range(100)],
+        "estado": 2, "estado_esperado": 1})),
+
+    # --- Producción (rutas, puestos y colas) ---
+    Escenario("produccion.listar", lambda ctx, rng: Solicitud("GET", "/produccion/puestos-trabajo/cola")),
+    Escenario("produccion.detalle", lambda ctx, rng: Solicitud("GET", f"/produccion/rutas/{rng.choice(ctx.rutas)[0]}/compilada")),
+
+    # --- Planificación ---
+    Escenario("planificacion.listar", lambda ctx, rng: Solicitud("GET", f"/planificacion/lotes?skip={rng.randrange(0, 5000)}&limit=100"),
+              requiere=lambda ctx: ctx.hay_planificacion),
+    Escenario("planificacion.crear", lambda ctx, rng: Solicitud("POST", "/planificacion/corridas"), pesado=True),
+]
+
+
+def seleccionar(prefijos: Optional[list[str]]) -> list[Escenario]:
+    """Sin prefijos: todos los no pesados. Con prefijos ('lotes.', 'op.detalle'): los que coinciden."""
+    if not prefijos:
+        return [e for e in ESCENARIOS if not e.pesado]
+    return [e for e in ESCENARIOS if any(e.nombre.startswith(prefijo) for prefijo in prefijos)]
@@ -0,0 +1,279 @@
+# backend/benchmarks/sembrar.py
+#
+# Siembra un volumen realista de datos con COPY, en una sola transacción y de forma determinista
+# (misma escala + misma semilla = mismos datos). Uso:
+#
+#   python -m backend.benchmarks.sembrar --escala 1 --semilla 42 --truncar
+#
+# Los contadores desnormalizados (progreso de OP, colas por puesto) los mantienen los triggers
+# por sentencia de siempre, una vez por bloque copiado. Solo se apagan, dentro de la misma
+# transacción, los triggers de NOTIFY por fila: millones de eventos no aportan nada acá.
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from itertools import islice
+from typing import Iterable, Iterator
+
+from sqlalchemy import text
+
+import backend.models  # noqa: F401  (registra todos los modelos y su DDL)
+from backend.core.importacion import copiar_registros
+from backend.core.numeracion import formatear_numero
+from backend.core.rutas import compilar_rutas
+from backend.database import AsyncSessionLocal, engine
+from backend.models.base import Base
+from backend.models.ddl import aplicar_ddl
+
+# --- VOLÚMENES A ESCALA 1 ---
+
+VOLUMENES = {
+    "clientes": 50_000,
+    "pedidos": 500_000,
+    "op": 1_000_000,
+    "lotes": 5_000_000,
+    "productos": 500,
+    "puestos_trabajo": 60,
+    "rutas_maestras": 1_000,
+}
+PASOS_POR_RUTA = (5, 20)
+# Los maestros no se achican por debajo de esto (las rutas necesitan puestos para sus pasos)
+MINIMOS = {"productos": 5, "puestos_trabajo": PASOS_POR_RUTA[1], "rutas_maestras": 10}
+
+# Filas por COPY (acota la memoria y el tamaño de las tablas de transición de los triggers)
+TAMANIO_BLOQUE = 50_000
+
+# Tablas que se vacían con --truncar (CASCADE alcanza movimientos, planificación, etc.).
+# TRUNCATE no dispara los triggers: la grilla (sin FKs) se vacía explícitamente.
+TABLAS = ["lotes_grilla", "lotes", "op", "pedidos", "clientes", "rutas_detalle", "rutas_maestras", "puestos_trabajo", "productos"]
+# Triggers de NOTIFY por fila (ver models/eventos.py)
+TRIGGERS_NOTIFY = {
+    "lotes": "tg_notificar_lotes",
+    "op": "tg_notificar_op",
+    "pedidos": "tg_notificar_pedidos",
+    "clientes": "tg_notificar_clientes",
+    "rutas_maestras": "tg_notificar_rutas",
+}
+
+LOCALIDADES = ["Rosario", "Córdoba", "Mendoza", "La Plata", "Mar del Plata", "Salta", "Neuquén", "Paraná", "Santa Fe", "Tandil"]
+PALABRAS = ["acero", "aluminio", "bronce", "tapa", "eje", "brida", "soporte", "perfil", "chapa", "buje",
+            "urgente", "reposición", "muestra", "exportación", "mantenimiento", "prototipo", "serie"]
+HOY = date(2025, 1, 1)  # Fecha fija: los datos no dependen del día en que se siembran
+
+
+def volumenes(escala: float) -> dict[str, int]:
+    return {tabla: max(MINIMOS.get(tabla, 1), int(cantidad * escala)) for tabla, cantidad in VOLUMENES.items()}
+
+
+def _texto(rng: random.Random, minimo: int = 2, maximo: int = 6) -> str:
+    return " ".join(rng.choices(PALABRAS, k=rng.randint(minimo, maximo)))
+
+
+# =================================================================
+# GENERADORES (una tupla por fila, en el orden de las columnas)
+# =================================================================
+
+def generar_productos(n: int) -> Iterator[tuple]:
+    for producto_id in range(1, n + 1):
+        yield (producto_id, f"Producto {producto_id:05d}")
+
+def generar_puestos(rng: random.Random, n: int) -> Iterator[tuple]:
+    for puesto_id in range(1, n + 1):
+        yield (puesto_id, f"Puesto {puesto_id:03d}", _texto(rng), rng.choice((1, 1, 1, 2, 3)))
+
+def generar_rutas(rng: random.Random, n: int, productos: int, puestos: int) -> tuple[list[tuple], list[tuple], dict[int, list[tuple]]]:
+    """Encabezados, pasos y, por ruta, sus pasos (detalle_id, puesto_id, secuencia) para ubicar lotes."""
+    encabezados, detalles, pasos_por_ruta = [], [], {}
+    detalle_id = 0
+    for ruta_id in range(1, n + 1):
+        producto_id = (ruta_id - 1) % productos + 1
+        encabezados.append((ruta_id, f"Ruta {ruta_id:05d}", producto_id))
+        pasos = []
+        for secuencia, puesto_id in enumerate(rng.sample(range(1, puestos + 1), min(rng.randint(*PASOS_POR_RUTA), puestos)), start=1):
+            detalle_id += 1
+            detalles.append((detalle_id, ruta_id, puesto_id, secuencia, rng.choice((15, 30, 45, 60, 90, 120))))
+            pasos.append((detalle_id, puesto_id, secuencia))
+        pasos_por_ruta[ruta_id] = pasos
+    return encabezados, detalles, pasos_por_ruta
+
+def generar_clientes(rng: random.Random, n: int) -> Iterator[tuple]:
+    for cliente_id in range(1, n + 1):
+        yield (
+            cliente_id,
+            f"Cliente {cliente_id:06d} {rng.choice(PALABRAS).capitalize()}",
+            f"Calle {rng.randint(1, 9999)}",
+            rng.choice(LOCALIDADES),
+            f"+54 9 {rng.randint(1000000000, 9999999999)}",
+        )
+
+def generar_pedidos(rng: random.Random, n: int, clientes: int) -> Iterator[tuple]:
+    for pedido_id in range(1, n + 1):
+        fecha = HOY - timedelta(days=rng.randint(0, 730))
+        yield (
+            pedido_id,
+            formatear_numero("ultimo_pedido", pedido_id),
+            fecha,
+            rng.randint(1, clientes),
+            fecha + timedelta(days=rng.randint(7, 60)),
+            _texto(rng),
+            None if rng.random() < 0.7 else _texto(rng, 1, 3),
+        )
+
+def generar_ops(rng: random.Random, n: int, pedidos: int) -> Iterator[tuple]:
+    for op_id in range(1, n + 1):
+        fecha = HOY - timedelta(days=rng.randint(0, 730))
+        yield (
+            op_id,
+            formatear_numero("ultima_op", op_id),
+            fecha,
+            # Algunas OPs son de stock (sin pedido)
+            None if rng.random() < 0.05 else rng.randint(1, pedidos),
+            fecha + timedelta(days=rng.randint(5, 45)),
+            _texto(rng),
+            None,
+        )
+
+def generar_lotes(rng: random.Random, n: int, ops: int, rutas: list[tuple], pasos_por_ruta: dict[int, list[tuple]]) -> Iterator[tuple]:
+    """
+    Reparte 'n' lotes entre las OPs (cantidad variable por OP). Estados: 50% en espera sin
+    posición, 20% en proceso en algún paso de su ruta, 30% liberados en el último paso.
+    """
+    inicio_posiciones = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    lote_id = 0
+    promedio = n / ops
+    for op_id in range(1, ops + 1):
+        restantes = n - lote_id
+        if restantes <= 0:
+            break
+        cantidad = restantes if op_id == ops else min(restantes, max(1, round(rng.expovariate(1 / promedio))))
+        for numero in range(1, cantidad + 1):
+            lote_id += 1
+            ruta_id, _, producto_id = rutas[rng.randrange(len(rutas))]
+            pasos = pasos_por_ruta[ruta_id]
+            sorteo = rng.random()
+            if sorteo < 0.5:
+                estado, paso, movimiento = 1, None, None
+            elif sorteo < 0.7:
+                estado, paso, movimiento = 2, rng.choice(pasos), rng.choice((1, 2))
+            else:
+                estado, paso, movimiento = 3, pasos[-1], 3
+            yield (
+                lote_id,
+                f"L{op_id:07d}-{numero:03d}",
+                estado,
+                producto_id,
+                ruta_id,
+                op_id,
+                paso[0] if paso else None,
+                paso[1] if paso else None,
+                paso[2] if paso else None,
+                movimiento,
+                inicio_posiciones - timedelta(minutes=rng.randint(0, 60 * 24 * 90)) if paso else None,
+            )
+
+
+# =================================================================
+# CARGA
+# =================================================================
+
+async def _copiar(session, tabla: str, columnas: list[str], filas: Iterable[tuple]) -> int:
+    total = 0
+    inicio = time.perf_counter()
+    iterador = iter(filas)
+    while bloque := list(islice(iterador, TAMANIO_BLOQUE)):
+        await copiar_registros(session, tabla, columnas, bloque)
+        total += len(bloque)
+    print(f"  {tabla}: {total} filas en {time.perf_counter() - inicio:.1f} s")
+    return total
+
+
+async def sembrar(escala: float, semilla: int, truncar: bool) -> dict[str, int]:
+    n = volumenes(escala)
+    rng = random.Random(semilla)
+
+    # 1. Esquema al día (igual que en el arranque de la API)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await aplicar_ddl(conn)
+
+    async with AsyncSessionLocal() as session:
+        # 2. Base vacía (o vaciarla)
+        if truncar:
+            await session.execute(text(f"TRUNCATE {', '.join(TABLAS)} RESTART IDENTITY CASCADE"))
+        elif (await session.execute(text("SELECT EXISTS (SELECT 1 FROM lotes) OR EXISTS (SELECT 1 FROM clientes)"))).scalar():
+            raise SystemExit("La base ya tiene datos: use --truncar para vaciarla antes de sembrar.")
+
+        for tabla, trigger in TRIGGERS_NOTIFY.items():
+            await session.execute(text(f"ALTER TABLE {tabla} DISABLE TRIGGER {trigger}"))
+
+        # 3. Maestros de producción
+        inicio = time.perf_counter()
+        await _copiar(session, "productos", ["producto_id", "nombre"], generar_productos(n["productos"]))
+        await _copiar(session, "puestos_trabajo", ["puesto_trabajo_id", "nombre", "descripcion", "capacidad"],
+                      generar_puestos(rng, n["puestos_trabajo"]))
+        rutas, detalles, pasos_por_ruta = generar_rutas(rng, n["rutas_maestras"], n["productos"], n["puestos_trabajo"])
+        await _copiar(session, "rutas_maestras", ["ruta_id", "nombre_ruta", "producto_id"], rutas)
+        await _copiar(session, "rutas_detalle", ["detalle_id", "ruta_id", "puesto_id", "secuencia", "minutos_estandar"], detalles)
+        await compilar_rutas(session, ruta_ids=[ruta[0] for ruta in rutas])
+
+        # 4. Clientes, pedidos, OPs y lotes
+        await _copiar(session, "clientes", ["cliente_id", "nombre", "direccion", "localidad", "telefono"],
+                      generar_clientes(rng, n["clientes"]))
+        await _copiar(session, "pedidos",
+                      ["pedido_id", "numero_pedido_externo", "fecha", "cliente_id", "fecha_entrega_estimada", "detalle", "observaciones"],
+                      generar_pedidos(rng, n["pedidos"], n["clientes"]))
+        await _copiar(session, "op",
+                      ["op_id", "numero_op_externo", "fecha", "pedido_id", "fecha_estimada_entrega", "detalle", "observaciones"],
+                      generar_ops(rng, n["op"], n["pedidos"]))
+        await _copiar(session, "lotes",
+                      ["lote_interno_id", "lote_numero_visible", "estado", "producto_id", "ruta_id", "op_id",
+                       "detalle_actual_id", "puesto_actual_id", "secuencia_actual", "movimiento_actual", "fecha_movimiento_actual"],
+                      generar_lotes(rng, n["lotes"], n["op"], rutas, pasos_por_ruta))
+
+        # 5. Secuencias y numeradores alineados con los IDs copiados
+        for tabla, columna in (("productos", "producto_id"), ("puestos_trabajo", "puesto_trabajo_id"),
+                               ("rutas_maestras", "ruta_id"), ("rutas_detalle", "detalle_id"), ("clientes", "cliente_id"),
+                               ("pedidos", "pedido_id"), ("op", "op_id"), ("lotes", "lote_interno_id")):
+            await session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{tabla}', '{columna}'), (SELECT coalesce(max({columna}), 0) + 1 FROM {tabla}), false)"
+            ))
+        await session.execute(text(
+            "INSERT INTO numeradores (id, ultimo_pedido, ultima_op) VALUES (1, :pedidos, :ops) "
+            "ON CONFLICT (id) DO UPDATE SET ultimo_pedido = EXCLUDED.ultimo_pedido, ultima_op = EXCLUDED.ultima_op"
+        ), {"pedidos": n["pedidos"], "ops": n["op"]})
+
+        for tabla, trigger in TRIGGERS_NOTIFY.items():
+            await session.execute(text(f"ALTER TABLE {tabla} ENABLE TRIGGER {trigger}"))
+        await session.commit()
+        print(f"Carga confirmada en {time.perf_counter() - inicio:.1f} s")
+
+    # 6. Estadísticas del planificador para que los planes sean los de producción
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for tabla in TABLAS:
+            await conn.execute(text(f"ANALYZE {tabla}"))
+
+    return n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Siembra datos de prueba con COPY (determinista).")
+    parser.add_argument("--escala", type=float, default=1.0, help="1 = 50k clientes / 500k pedidos / 1M OPs / 5M lotes")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--truncar", action="store_true", help="Vaciar las tablas antes de sembrar")
+    args = parser.parse_args()
+
+    async def correr():
+        try:
+            print(f"Sembrando escala {args.escala} (semilla {args.semilla})...")
+            await sembrar(args.escala, args.semilla, args.truncar)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(correr())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# backend/benchmarks/serializacion.py
+#
+# Micro-benchmark de validación y serialización de los esquemas anidados (schemas/maestros.py
+# y schemas/auxiliares.py), sin base ni HTTP. Arma grafos de objetos ORM transitorios (las
+# clases reales de models/, así que el acceso a atributos pasa por los descriptores de
+# SQLAlchemy como en una respuesta real) con el fan-out indicado y mide, por grafo:
+#
+#   validar       Esquema.model_validate(orm)            (from_attributes)
+#   dump_json     modelo.model_dump_json()
+#   dump_python   json.dumps(modelo.model_dump(mode="json"))   (lo que hace JSONResponse)
+#   orjson        orjson.dumps(modelo.model_dump())       (si está instalado)
+#   msgspec       msgspec.json.encode(modelo.model_dump()) (si está instalado)
+#   respuesta     validar + dump_json (costo completo de un response_model)
+#
+# Reporta µs por grafo, ns por objeto del grafo y memoria (pico y bytes retenidos por el
+# resultado, con tracemalloc: solo ve lo que pasa por el asignador de Python, no los buffers
+# internos de pydantic-core). Uso:
+#
+#   python -m backend.benchmarks.serializacion
+#   python -m backend.benchmarks.serializacion --grafos op ruta --fanout 1 10 100 --salida r.json
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from pydantic import BaseModel
+
+from backend.models.auxiliares import ProductoORM, PuestoTrabajoORM, RutaDetalleORM, RutaMaestraORM
+from backend.models.maestros import ClienteORM, LoteORM, OpORM, PedidoORM
+from backend.schemas.auxiliares import RutaMaestra
+from backend.schemas.maestros import OP, Lote, Pedido
+
+FANOUT_POR_DEFECTO = (1, 10, 100)
+FECHA = date(2024, 6, 3)
+
+
+# --- Grafos sintéticos ---
+
+def _producto(i: int) -> ProductoORM:
+    return ProductoORM(producto_id=i, nombre=f"Producto {i:04d}")
+
+def _ruta_compilada(i: int, pasos: int) -> RutaMaestraORM:
+    return RutaMaestraORM(
+        ruta_id=i, nombre_ruta=f"Ruta {i:04d}", producto_id=i, version=3,
+        pasos_detalle_ids=list(range(1, pasos + 1)),
+        pasos_secuencias=list(range(1, pasos + 1)),
+        pasos_puesto_ids=[(s % 60) + 1 for s in range(pasos)],
+        pasos_nombres=[f"Puesto {(s % 60) + 1:02d}" for s in range(pasos)],
+        pasos_minutos=[30 + s for s in range(pasos)],
+    )
+
+def _pedido(i: int) -> PedidoORM:
+    cliente = ClienteORM(
+        cliente_id=i, nombre=f"Cliente {i:05d} S.A.", direccion="Av. Pellegrini 1234",
+        localidad="Rosario", telefono="341-555-0000",
+    )
+    return PedidoORM(
+        pedido_id=i, numero_pedido_externo=f"P-{i:08d}", fecha=FECHA, cliente_id=i,
+        fecha_entrega_estimada=FECHA, detalle="Pedido sintético", observaciones=None, version=1, cliente=cliente,
+    )
+
+def _lote(i: int, op_id: int, producto: ProductoORM, ruta: RutaMaestraORM) -> LoteORM:
+    return LoteORM(
+        lote_interno_id=i, lote_numero_visible=f"L{op_id:07d}-{i:04d}", estado=1 + i % 3,
+        producto_id=producto.producto_id, ruta_id=ruta.ruta_id, op_id=op_id,
+        puesto_actual_id=(i % 60) + 1, secuencia_actual=1 + i % 5,
+        fecha_movimiento_actual=datetime(2024, 6, 3, 8, 0, tzinfo=timezone.utc),
+        version=1, producto=producto, ruta=ruta,
+    )
+
+def grafo_pedido(fanout: int) -> tuple[PedidoORM, int]:
+    """Pedido → Cliente (el fan-out no aplica)."""
+    return _pedido(1), 2
+
+def grafo_lote(fanout: int) -> tuple[LoteORM, int]:
+    """Lote → Producto y RutaCompilada con 'fanout' pasos."""
+    producto = _producto(1)
+    return _lote(1, 1, producto, _ruta_compilada(1, fanout)), 3
+
+def grafo_op(fanout: int) -> tuple[OpORM, int]:
+    """OP → Pedido → Cliente, y 'fanout' lotes (cada uno con producto y ruta, compartidos de a 10)."""
+    productos = [_producto(i) for i in range(1, 11)]
+    rutas = [_ruta_compilada(i, 8) for i in range(1, 11)]
+    lotes = [_lote(i, 1, productos[i % 10], rutas[i % 10]) for i in range(1, fanout + 1)]
+    op = OpORM(
+        op_id=1, numero_op_externo="OP-00000001", fecha=FECHA, pedido_id=1, fecha_estimada_entrega=FECHA,
+        detalle="OP sintética", observaciones=None, pedido=_pedido(1), lotes=lotes,
+        lotes_total=fanout, lotes_en_espera=fanout, lotes_en_proceso=0, lotes_liberados=0, version=1,
+    )
+    # El esquema recorre producto y ruta por cada lote aunque sean el mismo objeto
+    return op, 3 + 3 * fanout
+
+def grafo_ruta(fanout: int) -> tuple[RutaMaestraORM, int]:
+    """RutaMaestra → Producto y 'fanout' RutaDetalle → PuestoTrabajo."""
+    detalles = [
+        RutaDetalleORM(
+            detalle_id=s, ruta_id=1, puesto_id=s, secuencia=s, minutos_estandar=30 + s,
+            puesto_trabajo=PuestoTrabajoORM(puesto_trabajo_id=s, nombre=f"Puesto {s:03d}", descripcion="Sintético", capacidad=2),
+        )
+        for s in range(1, fanout + 1)
+    ]
+    ruta = RutaMaestraORM(ruta_id=1, nombre_ruta="Ruta 0001", producto_id=1, version=1, producto=_producto(1), detalles=detalles)
+    return ruta, 2 + 2 * fanout
+
+
+# nombre -> (esquema, constructor del grafo, si el fan-out cambia el grafo)
+GRAFOS: dict[str, tuple[type[BaseModel], Callable[[int], tuple[Any, int]], bool]] = {
+    "pedido": (Pedido, grafo_pedido, False),
+    "lote": (Lote, grafo_lote, True),
+    "op": (OP, grafo_op, True),
+    "ruta": (RutaMaestra, grafo_ruta, True),
+}
+
+
+# --- Serializadores ---
+
+def serializadores_disponibles() -> tuple[dict[str, Callable[[BaseModel], Any]], list[str]]:
+    """Serializadores del modelo ya validado; los de dependencias opcionales solo si están instalados."""
+    serializadores: dict[str, Callable[[BaseModel], Any]] = {
+        "dump_json": lambda modelo: modelo.model_dump_json(),
+        "dump_python": lambda modelo: json.dumps(modelo.model_dump(mode="json")),
+    }
+    faltantes = []
+    try:
+        import orjson
+        serializadores["orjson"] = lambda modelo: orjson.dumps(modelo.model_dump())
+    except ImportError:
+        faltantes.append("orjson")
+    try:
+        import msgspec
+        serializadores["msgspec"] = lambda modelo: msgspec.json.encode(modelo.model_dump())
+    except ImportError:
+        faltantes.append("msgspec")
+    return serializadores, faltantes
+
+
+# --- Medición ---
+
+def medir_tiempo(funcion: Callable[[], Any], repeticiones: int) -> float:
+    """Segundos por llamada: el mínimo de 'repeticiones' tandas de al menos 0,2 s cada una."""
+    temporizador = timeit.Timer(funcion)
+    numero, _ = temporizador.autorange()
+    return min(temporizador.repeat(repeat=repeticiones, number=numero)) / numero
+
+def medir_memoria(funcion: Callable[[], Any]) -> dict:
+    """Pico de memoria durante una llamada y lo que queda retenido por el resultado."""
+    funcion()  # Que los cachés perezosos no cuenten
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        resultado = funcion()
+        actual, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del resultado
+    return {"pico_bytes": pico - base, "retenido_bytes": actual - base}
+
+def medir_grafo(nombre: str, fanout: int, repeticiones: int, serializadores: dict) -> dict:
+    esquema, construir, _ = GRAFOS[nombre]
+    orm, objetos = construir(fanout)
+    modelo = esquema.model_validate(orm)
+
+    operaciones: dict[str, Callable[[], Any]] = {"validar": lambda: esquema.model_validate(orm)}
+    for serializador, funcion in serializadores.items():
+        operaciones[serializador] = lambda funcion=funcion: funcion(modelo)
+    operaciones["respuesta"] = lambda: esquema.model_validate(orm).model_dump_json()
+
+    resultado = {"grafo": nombre, "fanout": fanout, "objetos": objetos, "bytes_json": len(modelo.model_dump_json()), "operaciones": {}}
+    for operacion, funcion in operaciones.items():
+        segundos = medir_tiempo(funcion, repeticiones)
+        resultado["operaciones"][operacion] = {
+            "us_por_grafo": round(segundos * 1e6, 2),
+            "ns_por_objeto": round(segundos * 1e9 / objetos, 1),
+            **medir_memoria(funcion),
+        }
+    return resultado
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Costo de validar y serializar los esquemas anidados.")
+    parser.add_argument("--grafos", nargs="*", choices=sorted(GRAFOS), help="Por defecto, todos")
+    parser.add_argument("--fanout", nargs="*", type=int, default=list(FANOUT_POR_DEFECTO), help="Hijos por nodo (lotes de la OP, pasos de la ruta)")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--salida", type=Path, help="Guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    serializadores, faltantes = serializadores_disponibles()
+    if faltantes:
+        print(f"Sin instalar (se omiten): {', '.join(faltantes)}", file=sys.stderr)
+
+    resultados = []
+    print(f"{'grafo':<8} {'fanout':>6} {'objetos':>7} {'operación':<12} {'µs/grafo':>10} {'ns/objeto':>10} {'pico KB':>9} {'ret. KB':>8}")
+    for nombre in args.grafos or list(GRAFOS):
+        _, _, usa_fanout = GRAFOS[nombre]
+        for fanout in args.fanout if usa_fanout else [1]:
+            resultado = medir_grafo(nombre, fanout, args.repeticiones, serializadores)
+            resultados.append(resultado)
+            for operacion, medida in resultado["operaciones"].items():
+                print(
+                    f"{nombre:<8} {fanout:>6} {resultado['objetos']:>7} {operacion:<12} {medida['us_por_grafo']:>10.2f} "
+                    f"{medida['ns_por_objeto']:>10.1f} {medida['pico_bytes'] / 1024:>9.1f} {medida['retenido_bytes'] / 1024:>8.1f}"
+                )
+
+    if args.salida:
+        import pydantic
+        import pydantic_core
+        args.salida.write_text(json.dumps({
+            "fecha": datetime.now(timezone.utc).isoformat(),
+            "entorno": {
+                "python": platform.python_version(),
+                "pydantic": pydantic.VERSION,
+                "pydantic_core": pydantic_core.__version__,
+                "omitidos": faltantes,
+            },
+            "resultados": resultados,
+        }, indent=2, ensure_ascii=False))
+        print(f"Resultados en {args.salida}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
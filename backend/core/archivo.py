@@ -0,0 +1,148 @@
+# backend/core/archivo.py
+#
+# Separación caliente/frío. Con el tiempo casi todos los lotes quedan LIBERADO y engordan los
+# índices que recorren el listado de lotes, la carga de OPs y la planificación. El trabajo
+# 'archivado' mueve las OPs cerradas hace tiempo, con sus lotes y movimientos, a las tablas
+# *_archivo (models/archivo.py):
+#
+#   1. Toma una tanda de OPs cerradas (lotes_liberados = lotes_total) creadas antes del corte
+#      y sin movimientos desde entonces, con FOR UPDATE SKIP LOCKED: no espera a las OPs que
+#      alguien está tocando (quedan para la próxima corrida).
+#   2. Copia OP, lotes y movimientos al archivo y los borra de las tablas calientes, todo en
+#      la misma transacción. Los triggers de siempre avisan al bus de cambios (cache).
+#   3. Confirma y sigue con la próxima tanda: cada transacción es corta y se puede cortar y
+#      reanudar en cualquier momento (el trabajo es idempotente).
+#
+# Las lecturas normales solo ven las tablas calientes; los endpoints con
+# 'incluir_archivados=true' consultan también el archivo.
+# Conviene programarlo fuera de horario (POST /trabajos/ con tipo 'archivado').
+
+import asyncio
+import os
+from datetime import date, timedelta
+from typing import Any
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from backend.database import AsyncSessionLocal
+from backend.models.maestros import LoteORM, OpORM
+from backend.models.movimientos import LoteMovimientoORM
+from backend.models.archivo import LoteArchivoORM, LoteMovimientoArchivoORM, OpArchivoORM
+from backend.core.trabajos import ContextoTrabajo, TrabajoFallido, registrar_tipo_trabajo
+
+# --- CONFIGURACIÓN ---
+
+# Días desde el alta de la OP (y desde el último movimiento de sus lotes) antes de archivarla
+ARCHIVO_DIAS_RETENCION = int(os.getenv("ARCHIVO_DIAS_RETENCION", "90"))
+# OPs por transacción: tandas chicas mantienen cortos los locks y el WAL de cada commit
+ARCHIVO_OPS_POR_TANDA = int(os.getenv("ARCHIVO_OPS_POR_TANDA", "200"))
+# Pausa entre tandas para no competir con el tráfico de la API
+ARCHIVO_PAUSA_SEGUNDOS = float(os.getenv("ARCHIVO_PAUSA_SEGUNDOS", "0.1"))
+
+
+def _copiar(destino, origen, condicion):
+    """INSERT INTO destino (columnas de origen) SELECT ... FROM origen WHERE condicion."""
+    tabla = origen.__table__
+    return insert(destino).from_select([c.name for c in tabla.columns], select(tabla).where(condicion))
+
+
+def condicion_archivable(corte: date):
+    """OP cerrada, creada antes del corte y sin movimientos de sus lotes desde entonces."""
+    return (
+        OpORM.lotes_total > 0,
+        OpORM.lotes_liberados == OpORM.lotes_total,
+        OpORM.fecha < corte,
+        ~select(LoteORM.lote_interno_id)
+            .where(LoteORM.op_id == OpORM.op_id, LoteORM.fecha_movimiento_actual >= corte)
+            .exists(),
+    )
+
+
+async def archivar_tanda(db_session: AsyncSession, corte: date, tamanio: int) -> dict:
+    """Mueve hasta 'tamanio' OPs archivables al archivo. No confirma: lo hace quien llama."""
+    # 1. Tomar las OPs (las bloqueadas por otra transacción se saltean)
+    op_ids = (await db_session.execute(
+        select(OpORM.op_id)
+        .where(*condicion_archivable(corte))
+        .order_by(OpORM.fecha, OpORM.op_id)
+        .limit(tamanio)
+        .with_for_update(skip_locked=True)
+    )).scalars().all()
+    if not op_ids:
+        return {"ops": 0, "lotes": 0, "movimientos": 0}
+
+    # 2. Copiar al archivo (primero la OP: los lotes archivados la referencian)
+    de_las_ops = LoteORM.op_id.in_(op_ids)
+    await db_session.execute(_copiar(OpArchivoORM, OpORM, OpORM.op_id.in_(op_ids)))
+    lotes = (await db_session.execute(_copiar(LoteArchivoORM, LoteORM, de_las_ops))).rowcount
+    movimientos = (await db_session.execute(_copiar(
+        LoteMovimientoArchivoORM, LoteMovimientoORM,
+        LoteMovimientoORM.lote_interno_id.in_(select(LoteORM.lote_interno_id).where(de_las_ops)),
+    ))).rowcount
+
+    # 3. Borrar de las tablas calientes (los movimientos caen por ON DELETE CASCADE)
+    await db_session.execute(delete(LoteORM).where(de_las_ops).execution_options(synchronize_session=False))
+    await db_session.execute(delete(OpORM).where(OpORM.op_id.in_(op_ids)).execution_options(synchronize_session=False))
+
+    return {"ops": len(op_ids), "lotes": lotes, "movimientos": movimientos}
+
+
+async def trabajo_archivado(contexto: ContextoTrabajo) -> dict:
+    """Trabajo en segundo plano 'archivado': mueve tandas hasta que no queden OPs archivables."""
+    dias = int(contexto.parametros.get("dias_retencion", ARCHIVO_DIAS_RETENCION))
+    tamanio = int(contexto.parametros.get("ops_por_tanda", ARCHIVO_OPS_POR_TANDA))
+    if dias < 0 or tamanio < 1:
+        raise TrabajoFallido("dias_retencion debe ser >= 0 y ops_por_tanda >= 1.")
+    corte = date.today() - timedelta(days=dias)
+
+    totales = {"ops": 0, "lotes": 0, "movimientos": 0}
+    async with AsyncSessionLocal() as db_session:
+        pendientes = (await db_session.execute(
+            select(func.count()).select_from(OpORM).where(*condicion_archivable(corte))
+        )).scalar_one()
+        await db_session.commit()
+
+        while True:
+            tanda = await archivar_tanda(db_session, corte, tamanio)
+            await db_session.commit()
+            for clave, valor in tanda.items():
+                totales[clave] += valor
+            # Menos de una tanda completa: no quedan (o las que quedan están bloqueadas)
+            if tanda["ops"] < tamanio:
+                break
+            await contexto.progreso(
+                100 * totales["ops"] // max(pendientes, 1),
+                f"{totales['ops']} OPs y {totales['lotes']} lotes archivados",
+            )
+            await asyncio.sleep(ARCHIVO_PAUSA_SEGUNDOS)
+
+    return {**totales, "corte": corte.isoformat()}
+
+# Una sola corrida a la vez en todo el cluster; si se corta, el reintento sigue donde quedó
+registrar_tipo_trabajo("archivado", trabajo_archivado, concurrencia=1, max_intentos=3, timeout_segundos=3600)
+
+
+# --- LECTURAS QUE INCLUYEN EL ARCHIVO ---
+
+async def paginar_con_archivo(
+    db_session: AsyncSession, activos: Select, archivados: Select, offset: int, limit: int
+) -> tuple[int, list[Any]]:
+    """
+    Pagina la concatenación (activos, archivados) de dos consultas ORM equivalentes sin UNION:
+    cuenta cada una y pide a cada tabla solo la parte de la página que le toca. Las dos deben
+    venir con un ORDER BY total (p. ej. por PK): si no, las páginas se solapan o saltean filas.
+    Devuelve (total, filas).
+    """
+    total_activos = (await db_session.execute(select(func.count()).select_from(activos.subquery()))).scalar_one()
+    total_archivados = (await db_session.execute(select(func.count()).select_from(archivados.subquery()))).scalar_one()
+
+    filas = []
+    if offset < total_activos:
+        filas.extend((await db_session.execute(activos.offset(offset).limit(limit))).unique().scalars().all())
+    restantes = limit - len(filas)
+    if restantes > 0 and total_archivados:
+        desde = max(offset - total_activos, 0)
+        filas.extend((await db_session.execute(archivados.offset(desde).limit(restantes))).unique().scalars().all())
+    return total_activos + total_archivados, filas
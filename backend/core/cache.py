@@ -0,0 +1,350 @@
+# backend/core/cache.py
+#
+# Cache de respuestas para los GET de detalle (OP, lote, pedido, cliente).
+# Se guardan los bytes ya serializados de la respuesta junto con etiquetas de dependencia
+# ("op:7", "lote:31", "cliente:3"...). Una escritura invalida etiquetas, no claves: cambiar un
+# lote borra la entrada del lote y la de la OP que lo contiene; cambiar un cliente borra sus pedidos.
+#
+# Backends: memoria (LRU acotada por bytes, por worker) o Redis (compartido; dependencia opcional).
+# Las invalidaciones llegan por dos vías: el endpoint que escribe (lectura de lo propio inmediata)
+# y el bus de cambios LISTEN/NOTIFY (escrituras masivas, triggers y otros workers).
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from fastapi import Response
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURACIÓN ---
+
+# "memoria", "redis" o "ninguno"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memoria")
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Tope de antigüedad: acota el daño si se pierde una invalidación
+CACHE_TTL_SEGUNDOS = int(os.getenv("CACHE_TTL_SEGUNDOS", "300"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Respuestas más grandes que esto no se guardan (una OP con muchos lotes desplazaría todo lo demás)
+MAX_BYTES_ENTRADA = CACHE_MAX_BYTES // 16
+# Invalidaciones recientes que recuerda el backend de memoria (ver CacheMemoria.guardar)
+MAX_INVALIDACIONES_RECORDADAS = 100_000
+
+
+def serializar_entrada(cuerpo: bytes, media_type: str, encabezados: Optional[dict] = None) -> bytes:
+    """Una línea de encabezado JSON (media type y encabezados HTTP, p. ej. ETag) seguida del cuerpo."""
+    return json.dumps({"media_type": media_type, "encabezados": encabezados or {}}).encode() + b"\n" + cuerpo
+
+def deserializar_entrada(valor: bytes) -> tuple[bytes, str, dict]:
+    encabezado, _, cuerpo = valor.partition(b"\n")
+    datos = json.loads(encabezado)
+    # Las entradas anteriores a los encabezados (Redis compartido) no traen la clave
+    return cuerpo, datos["media_type"], datos.get("encabezados", {})
+
+
+class CacheMemoria:
+    """
+    LRU en memoria acotada por bytes. Cada invalidación avanza un contador de generación;
+    una lectura que falló se guarda solo si ninguna de sus etiquetas se invalidó mientras
+    se consultaba la base (evita guardar datos leídos antes de un cambio ya confirmado).
+    """
+
+    nombre = "memoria"
+
+    def __init__(self, max_bytes: int, ttl_segundos: int):
+        self.max_bytes = max_bytes
+        self.ttl_segundos = ttl_segundos
+        self._entradas: OrderedDict[str, tuple[bytes, float, frozenset[str]]] = OrderedDict()
+        self._por_etiqueta: dict[str, set[str]] = {}
+        self._invalidadas: OrderedDict[str, int] = OrderedDict()
+        # Generación más alta entre las invalidaciones ya olvidadas
+        self._olvidadas_hasta = 0
+        self._generacion = 0
+        self.bytes = 0
+        self.expulsiones = 0
+
+    async def generacion(self) -> int:
+        return self._generacion
+
+    async def obtener(self, clave: str) -> Optional[bytes]:
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            return None
+        valor, expira, _ = entrada
+        if expira < time.monotonic():
+            self._quitar(clave)
+            return None
+        self._entradas.move_to_end(clave)
+        return valor
+
+    async def guardar(self, clave: str, valor: bytes, etiquetas: frozenset[str], generacion: int) -> bool:
+        # Invalidada después de la lectura, o demasiado vieja para saberlo: no se guarda
+        if generacion < self._olvidadas_hasta:
+            return False
+        if any(self._invalidadas.get(etiqueta, -1) > generacion for etiqueta in etiquetas):
+            return False
+
+        if clave in self._entradas:
+            self._quitar(clave)
+        self._entradas[clave] = (valor, time.monotonic() + self.ttl_segundos, etiquetas)
+        self.bytes += len(clave) + len(valor)
+        for etiqueta in etiquetas:
+            self._por_etiqueta.setdefault(etiqueta, set()).add(clave)
+
+        # Expulsar las menos usadas hasta volver al límite
+        while self.bytes > self.max_bytes and self._entradas:
+            self._quitar(next(iter(self._entradas)))
+            self.expulsiones += 1
+        return True
+
+    async def invalidar(self, etiquetas: Iterable[str]) -> int:
+        self._generacion += 1
+        borradas = 0
+        for etiqueta in etiquetas:
+            self._invalidadas.pop(etiqueta, None)
+            self._invalidadas[etiqueta] = self._generacion
+            for clave in list(self._por_etiqueta.get(etiqueta, ())):
+                self._quitar(clave)
+                borradas += 1
+        while len(self._invalidadas) > MAX_INVALIDACIONES_RECORDADAS:
+            _, olvidada = self._invalidadas.popitem(last=False)
+            self._olvidadas_hasta = max(self._olvidadas_hasta, olvidada)
+        return borradas
+
+    async def limpiar(self) -> None:
+        self._generacion += 1
+        # Todo lo leído antes de este punto queda inválido
+        self._invalidadas.clear()
+        self._olvidadas_hasta = self._generacion
+        self._entradas.clear()
+        self._por_etiqueta.clear()
+        self.bytes = 0
+
+    def _quitar(self, clave: str) -> None:
+        valor, _, etiquetas = self._entradas.pop(clave)
+        self.bytes -= len(clave) + len(valor)
+        for etiqueta in etiquetas:
+            claves = self._por_etiqueta.get(etiqueta)
+            if claves is not None:
+                claves.discard(clave)
+                if not claves:
+                    del self._por_etiqueta[etiqueta]
+
+    def entradas(self) -> int:
+        return len(self._entradas)
+
+
+class CacheRedis:
+    """
+    Backend compartido entre workers (Redis o compatible). Las etiquetas son SETs con las
+    claves que dependen de ellas; la memoria la acota Redis (maxmemory) y el TTL.
+    La generación es un contador global: menos preciso que en memoria, pero atómico entre workers.
+    """
+
+    nombre = "redis"
+    PREFIJO = "federici:cache:"
+
+    def __init__(self, url: str, ttl_segundos: int):
+        # Dependencia opcional: solo se importa si se elige este backend
+        import redis.asyncio as redis
+        from redis.exceptions import WatchError
+
+        self.ttl_segundos = ttl_segundos
+        self._redis = redis.from_url(url)
+        self._watch_error = WatchError
+        self._clave_generacion = self.PREFIJO + "generacion"
+        self.expulsiones = 0
+
+    async def generacion(self) -> int:
+        return int(await self._redis.get(self._clave_generacion) or 0)
+
+    async def obtener(self, clave: str) -> Optional[bytes]:
+        return await self._redis.get(self.PREFIJO + clave)
+
+    async def guardar(self, clave: str, valor: bytes, etiquetas: frozenset[str], generacion: int) -> bool:
+        # WATCH sobre la generación: si un invalidar() la incrementa entre la comparación y el
+        # EXEC, la transacción no se aplica (sin esto la entrada vieja quedaría guardada)
+        clave_redis = self.PREFIJO + clave
+        async with self._redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(self._clave_generacion)
+                if int(await pipe.get(self._clave_generacion) or 0) != generacion:
+                    return False
+                pipe.multi()
+                pipe.set(clave_redis, valor, ex=self.ttl_segundos)
+                for etiqueta in etiquetas:
+                    clave_etiqueta = self.PREFIJO + "etiqueta:" + etiqueta
+                    pipe.sadd(clave_etiqueta, clave_redis)
+                    pipe.expire(clave_etiqueta, self.ttl_segundos)
+                await pipe.execute()
+            except self._watch_error:
+                return False
+        return True
+
+    async def invalidar(self, etiquetas: Iterable[str]) -> int:
+        claves_etiquetas = [self.PREFIJO + "etiqueta:" + etiqueta for etiqueta in etiquetas]
+        if not claves_etiquetas:
+            return 0
+        # 1. Primero la generación: desde acá ningún guardar() con una lectura anterior se
+        #    aplica, y los que se confirmaron antes del INCR ya están en los SETs de etiquetas
+        await self._redis.incr(self._clave_generacion)
+        # 2. Borrar las entradas y sacarlas de sus etiquetas (SREM, no DELETE del SET: una
+        #    entrada nueva guardada entre el SUNION y el borrado sigue alcanzable por su etiqueta)
+        claves = await self._redis.sunion(claves_etiquetas)
+        if claves:
+            pipe = self._redis.pipeline(transaction=True)
+            for clave_etiqueta in claves_etiquetas:
+                pipe.srem(clave_etiqueta, *claves)
+            pipe.delete(*claves)
+            await pipe.execute()
+        return len(claves)
+
+    async def limpiar(self) -> None:
+        await self._redis.incr(self._clave_generacion)
+        claves = [clave async for clave in self._redis.scan_iter(match=self.PREFIJO + "*")]
+        claves = [clave for clave in claves if clave != self._clave_generacion.encode()]
+        if claves:
+            await self._redis.delete(*claves)
+
+    def entradas(self) -> Optional[int]:
+        return None
+
+
+class CacheRespuestas:
+    """Fachada usada por los routers: serialización, métricas y tolerancia a fallos del backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.aciertos = 0
+        self.fallos = 0
+        self.guardados = 0
+        self.descartados = 0
+        self.invalidaciones = 0
+        self.errores = 0
+        # Invalidaciones lanzadas por el bus de cambios: el loop solo guarda referencias
+        # débiles a las tareas, así que las retenemos hasta que terminan
+        self._tareas: set[asyncio.Task] = set()
+
+    async def leer(self, clave: str) -> tuple[Optional[Response], int]:
+        """
+        Devuelve (respuesta, generación). Si no hay respuesta, la generación se pasa a
+        guardar() para detectar invalidaciones ocurridas mientras se leía la base.
+        """
+        if self.backend is None:
+            return None, 0
+        try:
+            generacion = await self.backend.generacion()
+            valor = await self.backend.obtener(clave)
+        except Exception as e:
+            # Un backend caído no debe tirar las lecturas: se sirve desde la base
+            self.errores += 1
+            logger.warning("Cache no disponible (%s): %s", clave, e)
+            return None, -1
+        if valor is None:
+            self.fallos += 1
+            return None, generacion
+        self.aciertos += 1
+        cuerpo, media_type, encabezados = deserializar_entrada(valor)
+        return Response(content=cuerpo, media_type=media_type, headers={**encabezados, "X-Cache": "HIT"}), generacion
+
+    async def guardar(
+        self, clave: str, modelo: BaseModel, etiquetas: Iterable[str], generacion: int,
+        encabezados: Optional[dict] = None,
+    ) -> Response:
+        """
+        Serializa el modelo una sola vez, lo guarda (si corresponde) y devuelve la respuesta.
+        'encabezados' se guardan con el cuerpo y se repiten en cada acierto (ETag).
+        """
+        cuerpo = modelo.model_dump_json().encode()
+        respuesta = Response(
+            content=cuerpo, media_type="application/json", headers={**(encabezados or {}), "X-Cache": "MISS"},
+        )
+        if self.backend is None or generacion < 0 or len(cuerpo) > MAX_BYTES_ENTRADA:
+            return respuesta
+        try:
+            if await self.backend.guardar(clave, serializar_entrada(cuerpo, "application/json", encabezados), frozenset(etiquetas), generacion):
+                self.guardados += 1
+            else:
+                self.descartados += 1
+        except Exception as e:
+            self.errores += 1
+            logger.warning("No se pudo guardar en cache (%s): %s", clave, e)
+        return respuesta
+
+    async def invalidar(self, *etiquetas: str) -> None:
+        if self.backend is None or not etiquetas:
+            return
+        try:
+            self.invalidaciones += await self.backend.invalidar(etiquetas)
+        except Exception as e:
+            self.errores += 1
+            logger.warning("No se pudo invalidar la cache %s: %s", etiquetas, e)
+
+    async def limpiar(self) -> None:
+        if self.backend is None:
+            return
+        try:
+            await self.backend.limpiar()
+        except Exception as e:
+            self.errores += 1
+            logger.warning("No se pudo limpiar la cache: %s", e)
+
+    def invalidar_por_evento(self, evento: dict) -> None:
+        """Oyente del bus de cambios: traduce el evento a etiquetas (ver models/eventos.py)."""
+        tipo = evento.get("t")
+        if tipo == "resync":
+            # Se pudieron perder eventos: no se puede saber qué quedó viejo
+            etiquetas = None
+        elif tipo == "lote":
+            etiquetas = [f"lote:{evento.get('id')}", f"op:{evento.get('op')}"]
+        elif tipo in ("op", "pedido", "cliente", "ruta"):
+            etiquetas = [f"{tipo}:{evento.get('id')}"]
+        else:
+            return
+        tarea = asyncio.get_running_loop().create_task(
+            self.invalidar(*etiquetas) if etiquetas is not None else self.limpiar()
+        )
+        self._tareas.add(tarea)
+        tarea.add_done_callback(self._al_terminar_invalidacion)
+
+    def _al_terminar_invalidacion(self, tarea: asyncio.Task) -> None:
+        self._tareas.discard(tarea)
+        # invalidar() y limpiar() ya registran los errores del backend; esto cubre el resto
+        if not tarea.cancelled() and tarea.exception() is not None:
+            self.errores += 1
+            logger.warning("Falló la invalidación por evento: %r", tarea.exception())
+
+    def estadisticas(self) -> dict:
+        consultas = self.aciertos + self.fallos
+        return {
+            "backend": self.backend.nombre if self.backend is not None else "ninguno",
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else 0.0,
+            "guardados": self.guardados,
+            "descartados": self.descartados,
+            "invalidaciones": self.invalidaciones,
+            "expulsiones": getattr(self.backend, "expulsiones", 0),
+            "errores": self.errores,
+            "entradas": self.backend.entradas() if self.backend is not None else 0,
+            "bytes": getattr(self.backend, "bytes", None),
+            "max_bytes": getattr(self.backend, "max_bytes", None),
+        }
+
+
+def crear_cache() -> CacheRespuestas:
+    if CACHE_BACKEND == "redis":
+        return CacheRespuestas(CacheRedis(REDIS_URL, CACHE_TTL_SEGUNDOS))
+    if CACHE_BACKEND == "memoria":
+        return CacheRespuestas(CacheMemoria(CACHE_MAX_BYTES, CACHE_TTL_SEGUNDOS))
+    return CacheRespuestas(None)
+
+
+# Instancia única por worker; el lifespan de main.py la conecta al bus de cambios
+cache_respuestas = crear_cache()
@@ -0,0 +1,179 @@
+# backend/core/coalescencia.py
+#
+# Coalescencia de lecturas idénticas ("single-flight"): si llegan varios GET iguales mientras
+# el primero todavía se está ejecutando, solo el primero va a la base; los demás esperan y
+# reciben una copia de la misma respuesta ya serializada. Pensado para los picos de inicio de
+# turno, cuando muchas terminales piden el mismo listado a la vez.
+#
+# Es un middleware ASGI puro (sin BaseHTTPMiddleware) y solo actúa sobre las rutas configuradas.
+
+import asyncio
+import hashlib
+import os
+import re
+from typing import Iterable, Optional
+
+# --- CONFIGURACIÓN ---
+
+# Permite apagarla sin tocar código (COALESCENCIA_ACTIVA=0)
+COALESCENCIA_ACTIVA = os.getenv("COALESCENCIA_ACTIVA", "1") != "0"
+
+# Respuestas más grandes no se comparten (se ejecutan por separado ni se acumulan en memoria)
+MAX_BYTES_RESPUESTA = 8 * 1024 * 1024
+
+# Encabezados que definen el alcance de autenticación de la solicitud
+ENCABEZADOS_ALCANCE = (b"authorization", b"cookie")
+
+
+def _patron_ruta(plantilla: str) -> re.Pattern:
+    """'/op/{op_id}' -> regex que acepta cualquier valor en el segmento del parámetro."""
+    partes = re.split(r"(\{[^}]+\})", plantilla)
+    return re.compile("^" + "".join("[^/]+" if p.startswith("{") else re.escape(p) for p in partes) + "$")
+
+
+class _Respuesta:
+    """Respuesta capturada: mensajes ASGI 'http.response.start' y cuerpo completo."""
+
+    def __init__(self):
+        self.status = 200
+        self.headers: list[tuple[bytes, bytes]] = []
+        self.cuerpo = bytearray()
+        self.completa = False
+        self.compartible = True
+        # Superó MAX_BYTES_RESPUESTA: el resto se envía directo al cliente del líder
+        self.desbordada = False
+        # Ruta resuelta por el router en la ejecución líder (para métricas por plantilla)
+        self.ruta = None
+
+
+class MetricasCoalescencia:
+    """Contadores del worker (el middleware lo instancia Starlette, por eso viven aparte)."""
+
+    def __init__(self):
+        self.ejecutadas = 0
+        self.coalescidas = 0
+        self.en_vuelo = 0
+
+    def estadisticas(self) -> dict:
+        return {
+            "activa": COALESCENCIA_ACTIVA,
+            "ejecutadas": self.ejecutadas,
+            "coalescidas": self.coalescidas,
+            "en_vuelo": self.en_vuelo,
+        }
+
+
+metricas_coalescencia = MetricasCoalescencia()
+
+
+class CoalescenciaMiddleware:
+    """
+    Uso: app.add_middleware(CoalescenciaMiddleware, rutas=["/op/", "/lotes/{lote_interno_id}"]).
+    Las rutas son plantillas exactas (los parámetros {x} aceptan cualquier segmento).
+    """
+
+    def __init__(self, app, rutas: Iterable[str]):
+        self.app = app
+        self.patrones = [_patron_ruta(ruta) for ruta in rutas]
+        self._en_vuelo: dict[str, asyncio.Future] = {}
+
+    def _clave(self, scope) -> Optional[str]:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return None
+        # Una solicitud perfilada debe ejecutarse de verdad (ver core/perfilado.py)
+        if scope.get("perfilar"):
+            return None
+        ruta = scope["path"]
+        if not any(patron.match(ruta) for patron in self.patrones):
+            return None
+
+        # Misma ruta + misma query (sin importar el orden) + mismo alcance de autenticación
+        query = b"&".join(sorted(scope.get("query_string", b"").split(b"&")))
+        alcance = hashlib.sha256()
+        for nombre, valor in scope["headers"]:
+            if nombre in ENCABEZADOS_ALCANCE:
+                alcance.update(nombre + b"=" + valor + b";")
+        return f"{ruta}?{query.decode('latin-1')}#{alcance.hexdigest()}"
+
+    async def __call__(self, scope, receive, send):
+        clave = self._clave(scope) if COALESCENCIA_ACTIVA else None
+        if clave is None:
+            await self.app(scope, receive, send)
+            return
+
+        # 1. Ya hay una ejecución idéntica en vuelo: esperar su resultado
+        futuro = self._en_vuelo.get(clave)
+        if futuro is not None:
+            try:
+                respuesta = await asyncio.shield(futuro)
+            except Exception:
+                respuesta = None
+            if respuesta is not None and respuesta.compartible:
+                metricas_coalescencia.coalescidas += 1
+                if respuesta.ruta is not None:
+                    scope["route"] = respuesta.ruta
+                await self._enviar(respuesta, send, coalescida=True)
+                return
+            # La ejecución líder falló o no era compartible: ejecutar por cuenta propia
+            await self.app(scope, receive, send)
+            return
+
+        # 2. Somos la ejecución líder: capturar la respuesta y compartirla
+        futuro = asyncio.get_running_loop().create_future()
+        self._en_vuelo[clave] = futuro
+        metricas_coalescencia.en_vuelo += 1
+        respuesta = _Respuesta()
+
+        async def capturar(mensaje):
+            # Desbordada: la respuesta ya va directo al cliente del líder
+            if respuesta.desbordada:
+                await send(mensaje)
+                return
+            if mensaje["type"] == "http.response.start":
+                respuesta.status = mensaje["status"]
+                respuesta.headers = list(mensaje.get("headers", []))
+            elif mensaje["type"] == "http.response.body":
+                respuesta.cuerpo.extend(mensaje.get("body", b""))
+                if len(respuesta.cuerpo) > MAX_BYTES_RESPUESTA:
+                    respuesta.compartible = False
+                if not mensaje.get("more_body", False):
+                    respuesta.completa = True
+                elif not respuesta.compartible:
+                    # Ya no se puede compartir: no se sigue acumulando en memoria. Lo que hay
+                    # se envía al líder y el resto pasa directo; los que esperaban se liberan
+                    # ya para ejecutar por su cuenta
+                    respuesta.desbordada = True
+                    if not futuro.done():
+                        futuro.set_result(respuesta)
+                    await send({"type": "http.response.start", "status": respuesta.status, "headers": respuesta.headers})
+                    await send({"type": "http.response.body", "body": bytes(respuesta.cuerpo), "more_body": True})
+                    respuesta.cuerpo = bytearray()
+
+        try:
+            metricas_coalescencia.ejecutadas += 1
+            await self.app(scope, receive, capturar)
+        except BaseException as e:
+            if not futuro.done():
+                futuro.set_exception(e if isinstance(e, Exception) else RuntimeError("Ejecución cancelada"))
+                # Evita el aviso "exception was never retrieved" si nadie esperaba
+                futuro.exception()
+            raise
+        else:
+            respuesta.compartible = respuesta.compartible and respuesta.completa and respuesta.status < 500
+            respuesta.ruta = scope.get("route")
+            if not futuro.done():
+                futuro.set_result(respuesta)
+        finally:
+            self._en_vuelo.pop(clave, None)
+            metricas_coalescencia.en_vuelo -= 1
+
+        if not respuesta.desbordada:
+            await self._enviar(respuesta, send, coalescida=False)
+
+    @staticmethod
+    async def _enviar(respuesta: _Respuesta, send, coalescida: bool) -> None:
+        headers = respuesta.headers
+        if coalescida:
+            headers = headers + [(b"x-coalescido", b"1")]
+        await send({"type": "http.response.start", "status": respuesta.status, "headers": headers})
+        await send({"type": "http.response.body", "body": bytes(respuesta.cuerpo)})
@@ -0,0 +1,175 @@
+# backend/core/consultas_lentas.py
+#
+# Registro de consultas lentas. Cada sentencia que supera el umbral queda en un buffer circular
+# (en memoria del worker) con su SQL, los parámetros redactados (solo tipo y largo, nunca el
+# valor) y la ruta que la originó. Una fracción configurable se vuelve a ejecutar con
+# EXPLAIN (ANALYZE, BUFFERS) en una conexión aparte, dentro de una transacción de solo lectura
+# que se descarta, para guardar el plan real junto a la entrada.
+# Se consulta en GET /monitoreo/consultas-lentas (solo administradores).
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+import asyncpg
+
+from backend import database
+from backend.core.instrumentacion import MAX_LARGO_SQL, RegistroConsultas, agregar_observador, forma_sentencia, plantilla_ruta
+
+logger = logging.getLogger("backend.consultas_lentas")
+
+# --- CONFIGURACIÓN ---
+
+# Duración a partir de la cual una sentencia se registra (0 desactiva el registro)
+UMBRAL_MS = float(os.getenv("SQL_LENTA_UMBRAL_MS", "500"))
+# Entradas que conserva el buffer (las más viejas se descartan)
+CAPACIDAD = int(os.getenv("SQL_LENTA_CAPACIDAD", "200"))
+# Fracción de las consultas lentas a las que se les captura el plan (0 = nunca, 1 = siempre)
+MUESTREO_EXPLAIN = float(os.getenv("SQL_LENTA_EXPLAIN_MUESTREO", "0"))
+# Tope de tiempo del EXPLAIN ANALYZE (vuelve a ejecutar la consulta)
+TIMEOUT_EXPLAIN_MS = int(os.getenv("SQL_LENTA_EXPLAIN_TIMEOUT_MS", "5000"))
+# EXPLAIN simultáneos como máximo; si ya hay tantos en curso, la muestra se saltea
+# (database.py los descuenta del presupuesto de conexiones de cada worker)
+MAX_EXPLAIN_EN_CURSO = database.MAX_CONEXIONES_EXPLAIN
+# Largo máximo del SQL guardado en cada entrada
+MAX_LARGO_SQL_ENTRADA = 4000
+
+# Solo se re-ejecutan lecturas: la transacción READ ONLY rechazaría cualquier escritura igual
+_ES_LECTURA = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+
+def _redactar_valor(valor: Any) -> Any:
+    if valor is None:
+        return None
+    if isinstance(valor, (str, bytes, list, tuple)):
+        return f"<{type(valor).__name__}:{len(valor)}>"
+    return f"<{type(valor).__name__}>"
+
+def redactar_parametros(parametros: Any) -> Any:
+    """Reemplaza cada valor por su tipo (y largo, si aplica). executemany: cantidad de filas."""
+    if isinstance(parametros, dict):
+        return {clave: _redactar_valor(valor) for clave, valor in parametros.items()}
+    if isinstance(parametros, (list, tuple)):
+        if parametros and isinstance(parametros[0], (list, tuple, dict)):
+            return {"filas": len(parametros), "primera": redactar_parametros(parametros[0])}
+        return [_redactar_valor(valor) for valor in parametros]
+    return _redactar_valor(parametros)
+
+
+class RegistroConsultasLentas:
+    def __init__(self, capacidad: int = CAPACIDAD):
+        self._entradas: deque[dict] = deque(maxlen=capacidad)
+        self._siguiente_id = 1
+        self._explains: set[asyncio.Task] = set()
+        self.registradas = 0
+        self.explains_omitidos = 0
+
+    # --- Captura (llamado desde los eventos del engine) ---
+
+    def observar(self, sql: str, parametros: Any, duracion: float, registro: Optional[RegistroConsultas]) -> None:
+        duracion_ms = duracion * 1000
+        if UMBRAL_MS <= 0 or duracion_ms < UMBRAL_MS:
+            return
+
+        scope = registro.scope if registro is not None else None
+        entrada = {
+            "id": self._siguiente_id,
+            "fecha": datetime.now(timezone.utc).isoformat(),
+            "metodo": scope.get("method") if scope else None,
+            "ruta": plantilla_ruta(scope) if scope else None,
+            "duracion_ms": round(duracion_ms, 1),
+            "sql": sql[:MAX_LARGO_SQL_ENTRADA],
+            "forma": forma_sentencia(sql)[:MAX_LARGO_SQL],
+            "parametros": redactar_parametros(parametros),
+            "plan": None,
+        }
+        self._siguiente_id += 1
+        self.registradas += 1
+        self._entradas.append(entrada)
+        logger.warning(json.dumps(
+            {"evento": "consulta_lenta", **{k: entrada[k] for k in ("metodo", "ruta", "duracion_ms", "forma")}},
+            ensure_ascii=False,
+        ))
+
+        if MUESTREO_EXPLAIN > 0 and random.random() < MUESTREO_EXPLAIN:
+            self._programar_explain(entrada, sql, parametros)
+
+    def _programar_explain(self, entrada: dict, sql: str, parametros: Any) -> None:
+        if not _ES_LECTURA.match(sql) or not isinstance(parametros, (tuple, list)):
+            return
+        if parametros and isinstance(parametros[0], (list, tuple, dict)):
+            return  # executemany
+        if len(self._explains) >= MAX_EXPLAIN_EN_CURSO:
+            self.explains_omitidos += 1
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Ejecución síncrona fuera del loop (scripts): sin plan
+
+        entrada["plan"] = {"estado": "pendiente"}
+        tarea = loop.create_task(self._explicar(entrada, sql, tuple(parametros)))
+        self._explains.add(tarea)
+        tarea.add_done_callback(self._explains.discard)
+
+    async def _explicar(self, entrada: dict, sql: str, parametros: tuple) -> None:
+        """EXPLAIN ANALYZE en una conexión propia (no ocupa el pool ni se auto-instrumenta)."""
+        conexion = None
+        try:
+            conexion = await asyncpg.connect(
+                host=database.DB_HOST, port=int(database.DB_PORT), user=database.DB_USER,
+                password=database.DB_PASS, database=database.DB_NAME,
+                timeout=TIMEOUT_EXPLAIN_MS / 1000,
+            )
+            transaccion = conexion.transaction(readonly=True)
+            await transaccion.start()
+            try:
+                await conexion.execute(f"SET LOCAL statement_timeout = {TIMEOUT_EXPLAIN_MS}")
+                await conexion.execute(f"SET LOCAL lock_timeout = {TIMEOUT_EXPLAIN_MS}")
+                resultado = await conexion.fetchval(
+                    "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, *parametros
+                )
+            finally:
+                await transaccion.rollback()
+            plan = json.loads(resultado) if isinstance(resultado, str) else resultado
+            entrada["plan"] = {"estado": "capturado", **plan[0]}
+        except Exception as e:
+            entrada["plan"] = {"estado": "error", "detalle": f"{type(e).__name__}: {e}"[:MAX_LARGO_SQL]}
+        finally:
+            if conexion is not None:
+                await conexion.close()
+
+    # --- Consulta ---
+
+    def listar(self, limite: int = 50, ruta: Optional[str] = None) -> list[dict]:
+        """Entradas más recientes primero, opcionalmente filtradas por plantilla de ruta."""
+        entradas = (e for e in reversed(self._entradas) if ruta is None or e["ruta"] == ruta)
+        return [e for _, e in zip(range(limite), entradas)]
+
+    def limpiar(self) -> None:
+        self._entradas.clear()
+
+    def estadisticas(self) -> dict:
+        return {
+            "umbral_ms": UMBRAL_MS,
+            "capacidad": self._entradas.maxlen,
+            "muestreo_explain": MUESTREO_EXPLAIN,
+            "registradas": self.registradas,
+            "en_buffer": len(self._entradas),
+            "explains_en_curso": len(self._explains),
+            "explains_omitidos": self.explains_omitidos,
+        }
+
+
+registro_consultas_lentas = RegistroConsultasLentas()
+
+
+def activar_registro_consultas_lentas() -> None:
+    """Engancha el registro a la instrumentación del engine (una vez, en main.py)."""
+    agregar_observador(registro_consultas_lentas.observar)
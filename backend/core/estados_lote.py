@@ -0,0 +1,20 @@
+# backend/core/estados_lote.py
+
+from backend.schemas.maestros import EstadoLote
+
+# --- MÁQUINA DE ESTADOS DEL LOTE ---
+# Transiciones permitidas: origen -> destinos posibles.
+# Un lote LIBERADO no vuelve atrás; uno EN_PROCESO puede volver a la cola (EN_ESPERA).
+TRANSICIONES_LOTE: dict[EstadoLote, frozenset[EstadoLote]] = {
+    EstadoLote.EN_ESPERA: frozenset({EstadoLote.EN_PROCESO}),
+    EstadoLote.EN_PROCESO: frozenset({EstadoLote.EN_ESPERA, EstadoLote.LIBERADO}),
+    EstadoLote.LIBERADO: frozenset(),
+}
+
+def transicion_permitida(origen: EstadoLote, destino: EstadoLote) -> bool:
+    """Indica si un lote puede pasar de 'origen' a 'destino'."""
+    return destino in TRANSICIONES_LOTE[origen]
+
+def origenes_permitidos(destino: EstadoLote) -> list[int]:
+    """Estados (valores SmallInt) desde los que se puede llegar a 'destino'. Se usan en el WHERE del UPDATE."""
+    return [origen.value for origen, destinos in TRANSICIONES_LOTE.items() if destino in destinos]
@@ -0,0 +1,157 @@
+# backend/core/eventos.py
+
+import asyncio
+import json
+import logging
+from typing import Callable, Optional
+
+import asyncpg
+
+from backend.database import DB_HOST, DB_NAME, DB_USER, DB_PASS, DB_PORT
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURACIÓN ---
+
+# Canal de PostgreSQL en el que los triggers publican los cambios (ver models/eventos.py)
+CANAL_CAMBIOS = "federici_cambios"
+# Eventos pendientes por suscriptor antes de considerarlo lento
+TAMANIO_COLA_SUSCRIPTOR = 256
+# Espera entre reintentos de conexión del LISTEN
+ESPERA_RECONEXION_SEGUNDOS = 2.0
+
+# Evento de control: el cliente perdió eventos y debe recargar sus datos
+EVENTO_RESYNC = {"t": "resync"}
+
+
+class Suscripcion:
+    """Cola acotada de eventos para un cliente, con filtro opcional por OP o puesto."""
+
+    def __init__(self, op_id: Optional[int] = None, puesto_id: Optional[int] = None):
+        self.op_id = op_id
+        self.puesto_id = puesto_id
+        self.cola: asyncio.Queue = asyncio.Queue(maxsize=TAMANIO_COLA_SUSCRIPTOR)
+        self.descartes = 0
+
+    def acepta(self, evento: dict) -> bool:
+        if self.op_id is not None and evento.get("op") != self.op_id:
+            return False
+        if self.puesto_id is not None and self.puesto_id not in (evento.get("puesto"), evento.get("puesto_ant")):
+            return False
+        return True
+
+    def entregar(self, evento: dict) -> None:
+        """
+        Nunca bloquea al bus. Si el cliente no consume a tiempo (cola llena) se descartan
+        sus eventos pendientes y se le envía un 'resync' para que recargue.
+        """
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.descartes += self.cola.qsize()
+            while not self.cola.empty():
+                self.cola.get_nowait()
+            self.cola.put_nowait(EVENTO_RESYNC)
+
+
+class BusCambios:
+    """
+    Una conexión dedicada por worker hace LISTEN sobre CANAL_CAMBIOS y reparte
+    los eventos a las suscripciones en memoria de ese worker.
+    """
+
+    def __init__(self):
+        self._suscripciones: set[Suscripcion] = set()
+        # Callbacks internos (p. ej. invalidación de la cache) que reciben todos los eventos
+        self._oyentes: list[Callable[[dict], None]] = []
+        self._conexion: Optional[asyncpg.Connection] = None
+        self._tarea: Optional[asyncio.Task] = None
+        self._conexion_perdida: Optional[asyncio.Event] = None
+
+    # --- Ciclo de vida ---
+
+    async def iniciar(self) -> None:
+        if self._tarea is None:
+            self._tarea = asyncio.create_task(self._mantener_conexion())
+
+    async def detener(self) -> None:
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+        await self._cerrar_conexion()
+
+    async def _mantener_conexion(self) -> None:
+        """Conecta, escucha y reconecta si la conexión se pierde."""
+        while True:
+            try:
+                self._conexion_perdida = asyncio.Event()
+                self._conexion = await asyncpg.connect(
+                    host=DB_HOST, port=DB_PORT, user=DB_USER, password=DB_PASS, database=DB_NAME
+                )
+                self._conexion.add_termination_listener(lambda _: self._conexion_perdida.set())
+                await self._conexion.add_listener(CANAL_CAMBIOS, self._recibir)
+                # Pudimos perder eventos mientras no había conexión
+                self._publicar(EVENTO_RESYNC)
+                await self._conexion_perdida.wait()
+                logger.warning("Conexión LISTEN perdida, reintentando.")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("No se pudo abrir la conexión LISTEN: %s", e)
+            await self._cerrar_conexion()
+            await asyncio.sleep(ESPERA_RECONEXION_SEGUNDOS)
+
+    async def _cerrar_conexion(self) -> None:
+        if self._conexion is not None and not self._conexion.is_closed():
+            try:
+                await self._conexion.close(timeout=5)
+            except Exception:
+                self._conexion.terminate()
+        self._conexion = None
+
+    # --- Reparto de eventos ---
+
+    def _recibir(self, conexion, pid, canal, payload: str) -> None:
+        try:
+            evento = json.loads(payload)
+        except json.JSONDecodeError:
+            logger.warning("Evento con payload inválido: %r", payload)
+            return
+        self._publicar(evento)
+
+    def _publicar(self, evento: dict) -> None:
+        for oyente in self._oyentes:
+            try:
+                oyente(evento)
+            except Exception:
+                logger.exception("Error en oyente del bus de cambios")
+        for suscripcion in list(self._suscripciones):
+            if evento is EVENTO_RESYNC or suscripcion.acepta(evento):
+                suscripcion.entregar(evento)
+
+    # --- Suscripciones ---
+
+    def agregar_oyente(self, oyente: Callable[[dict], None]) -> None:
+        """Registra un callback síncrono que no debe bloquear (se llama desde el loop)."""
+        if oyente not in self._oyentes:
+            self._oyentes.append(oyente)
+
+    def suscribir(self, op_id: Optional[int] = None, puesto_id: Optional[int] = None) -> Suscripcion:
+        suscripcion = Suscripcion(op_id=op_id, puesto_id=puesto_id)
+        self._suscripciones.add(suscripcion)
+        return suscripcion
+
+    def cancelar(self, suscripcion: Suscripcion) -> None:
+        self._suscripciones.discard(suscripcion)
+
+    @property
+    def suscriptores(self) -> int:
+        return len(self._suscripciones)
+
+
+# Instancia única por worker (se inicia en el lifespan de main.py)
+bus_cambios = BusCambios()
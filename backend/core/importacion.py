@@ -0,0 +1,327 @@
+# backend/core/importacion.py
+
+import csv
+import io
+import json
+from itertools import islice
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+from fastapi import UploadFile
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from backend.core.numeracion import reservar_numeros
+from backend.models.maestros import ClienteORM
+from backend.schemas.importacion import ErrorImportacion, FormatoImportacion, ResultadoImportacion
+from backend.schemas.maestros import ClienteImport, PedidoImport
+
+# --- CONFIGURACIÓN ---
+
+# Filas que se validan, copian y confirman juntas (acota la memoria usada por la importación)
+TAMANIO_BLOQUE = 5000
+# Tope de errores que se devuelven en la respuesta (el total siempre se informa)
+MAX_ERRORES_REPORTADOS = 1000
+
+# Un cargador recibe las filas válidas de un bloque (número de fila, modelo) y devuelve
+# (insertados, actualizados, errores) después de escribirlas en la base de datos.
+Cargador = Callable[
+    [AsyncSession, list[tuple[int, BaseModel]]],
+    Awaitable[tuple[int, int, list[ErrorImportacion]]],
+]
+
+# =================================================================
+# LECTURA POR STREAMING
+# =================================================================
+
+def _iterar_csv(texto: io.TextIOBase) -> Iterator[tuple[int, Optional[dict]]]:
+    lector = csv.DictReader(texto)
+    for fila in lector:
+        datos = {
+            clave: (valor if valor != "" else None)
+            for clave, valor in fila.items()
+            if clave is not None
+        }
+        yield lector.line_num, datos
+
+def _iterar_ndjson(texto: io.TextIOBase) -> Iterator[tuple[int, Optional[dict]]]:
+    for numero, linea in enumerate(texto, start=1):
+        if not linea.strip():
+            continue
+        try:
+            datos = json.loads(linea)
+        except json.JSONDecodeError:
+            datos = None
+        yield numero, datos if isinstance(datos, dict) else None
+
+async def leer_bloques(
+    archivo: UploadFile, formato: FormatoImportacion, tamanio: int = TAMANIO_BLOQUE
+) -> AsyncIterator[list[tuple[int, Optional[dict]]]]:
+    """
+    Lee el archivo subido en bloques de 'tamanio' filas sin cargarlo entero en memoria.
+    La lectura (disco) se hace en el threadpool para no bloquear el event loop.
+    Cada fila es (número de fila, dict) o (número de fila, None) si no se pudo interpretar.
+    """
+    texto = io.TextIOWrapper(archivo.file, encoding="utf-8-sig", newline="")
+    try:
+        filas = _iterar_csv(texto) if formato == FormatoImportacion.CSV else _iterar_ndjson(texto)
+        while True:
+            bloque = await run_in_threadpool(lambda: list(islice(filas, tamanio)))
+            if not bloque:
+                break
+            yield bloque
+    finally:
+        # Soltamos el wrapper sin cerrar el archivo subido (lo cierra FastAPI)
+        texto.detach()
+
+# =================================================================
+# VALIDACIÓN Y COPY
+# =================================================================
+
+def _describir_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(parte) for parte in detalle['loc']) or 'fila'}: {detalle['msg']}"
+        for detalle in error.errors()
+    )
+
+def validar_bloque(
+    bloque: list[tuple[int, Optional[dict]]], esquema: type[BaseModel]
+) -> tuple[list[tuple[int, BaseModel]], list[ErrorImportacion]]:
+    """Valida cada fila con las reglas del esquema Pydantic (las mismas del endpoint de alta)."""
+    validas, errores = [], []
+    for numero, datos in bloque:
+        if datos is None:
+            errores.append(ErrorImportacion(fila=numero, detalle="Fila con formato inválido."))
+            continue
+        try:
+            validas.append((numero, esquema.model_validate(datos)))
+        except ValidationError as e:
+            errores.append(ErrorImportacion(fila=numero, detalle=_describir_error(e)))
+    return validas, errores
+
+async def copiar_a_staging(
+    db_session: AsyncSession, ddl_staging: str, tabla: str, columnas: list[str], registros: list[tuple]
+) -> None:
+    """Crea la tabla temporal de staging (se borra al confirmar) y la carga con COPY (asyncpg)."""
+    await db_session.execute(text(ddl_staging))
+    await copiar_registros(db_session, tabla, columnas, registros)
+
+async def copiar_registros(
+    db_session: AsyncSession, tabla: str, columnas: list[str], registros: list[tuple]
+) -> None:
+    """Carga registros con COPY (asyncpg) dentro de la transacción de la sesión."""
+    conexion = await db_session.connection()
+    raw = await conexion.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(tabla, records=registros, columns=columnas)
+
+# =================================================================
+# PIPELINE GENÉRICO
+# =================================================================
+
+async def importar(
+    db_session: AsyncSession,
+    archivo: UploadFile,
+    formato: FormatoImportacion,
+    esquema: type[BaseModel],
+    cargador: Cargador,
+) -> ResultadoImportacion:
+    """
+    Importa el archivo bloque a bloque: valida, carga por COPY en staging y hace upsert.
+    Cada bloque es una transacción: si un bloque falla se revierte solo ese bloque
+    y sus filas se informan como error.
+    """
+    resultado = ResultadoImportacion()
+
+    def registrar_errores(errores: list[ErrorImportacion]):
+        resultado.total_errores += len(errores)
+        espacio = MAX_ERRORES_REPORTADOS - len(resultado.errores)
+        if espacio > 0:
+            resultado.errores.extend(errores[:espacio])
+
+    async for bloque in leer_bloques(archivo, formato):
+        resultado.filas_leidas += len(bloque)
+        validas, errores = validar_bloque(bloque, esquema)
+        registrar_errores(errores)
+
+        if not validas:
+            continue
+
+        try:
+            insertados, actualizados, errores_carga = await cargador(db_session, validas)
+            await db_session.commit()
+        except Exception as e:
+            await db_session.rollback()
+            registrar_errores([
+                ErrorImportacion(fila=numero, detalle=f"Bloque rechazado por la base de datos: {str(e)}")
+                for numero, _ in validas
+            ])
+            continue
+
+        resultado.insertados += insertados
+        resultado.actualizados += actualizados
+        registrar_errores(errores_carga)
+
+    return resultado
+
+# =================================================================
+# CARGADORES POR ENTIDAD
+# =================================================================
+
+STAGING_CLIENTES = """
+    CREATE TEMP TABLE _staging_clientes (
+        fila integer,
+        cliente_id integer,
+        nombre varchar(255),
+        direccion varchar(255),
+        localidad varchar(100),
+        telefono varchar(50)
+    ) ON COMMIT DROP
+"""
+
+UPSERT_CLIENTES = """
+    INSERT INTO clientes AS c (cliente_id, nombre, direccion, localidad, telefono)
+    SELECT
+        COALESCE(s.cliente_id, nextval(pg_get_serial_sequence('clientes', 'cliente_id'))),
+        s.nombre, s.direccion, s.localidad, s.telefono
+    FROM _staging_clientes s
+    ON CONFLICT (cliente_id) DO UPDATE SET
+        nombre = EXCLUDED.nombre,
+        direccion = EXCLUDED.direccion,
+        localidad = EXCLUDED.localidad,
+        telefono = EXCLUDED.telefono
+    RETURNING (xmax = 0) AS insertado
+"""
+
+# Si el bloque trae IDs explícitos, la secuencia se adelanta al máximo ANTES del upsert
+# para que los clientes nuevos (sin ID) no choquen con los IDs importados.
+AJUSTAR_SECUENCIA_CLIENTES = """
+    SELECT setval(
+        pg_get_serial_sequence('clientes', 'cliente_id'),
+        GREATEST(
+            (SELECT COALESCE(max(cliente_id), 0) FROM _staging_clientes),
+            (SELECT COALESCE(max(cliente_id), 0) FROM clientes),
+            nextval(pg_get_serial_sequence('clientes', 'cliente_id'))
+        )
+    )
+"""
+
+def _deduplicar(
+    validas: list[tuple[int, BaseModel]], clave: str
+) -> tuple[list[tuple[int, BaseModel]], list[ErrorImportacion]]:
+    """Si una clave se repite dentro del bloque prevalece la última fila (un upsert no puede tocar dos veces la misma fila)."""
+    ultimas: dict = {}
+    errores = []
+    for numero, modelo in validas:
+        valor = getattr(modelo, clave)
+        if valor is not None and valor in ultimas:
+            errores.append(ErrorImportacion(
+                fila=ultimas[valor],
+                detalle=f"{clave} {valor} repetido en el archivo; prevalece la fila {numero}.",
+            ))
+        if valor is not None:
+            ultimas[valor] = numero
+    finales = [
+        (numero, modelo) for numero, modelo in validas
+        if getattr(modelo, clave) is None or ultimas[getattr(modelo, clave)] == numero
+    ]
+    return finales, errores
+
+async def cargar_clientes(
+    db_session: AsyncSession, validas: list[tuple[int, ClienteImport]]
+) -> tuple[int, int, list[ErrorImportacion]]:
+    """Upsert de clientes por cliente_id (sin cliente_id se inserta un cliente nuevo)."""
+    filas, errores = _deduplicar(validas, "cliente_id")
+
+    registros = [
+        (numero, c.cliente_id, c.nombre, c.direccion, c.localidad, c.telefono)
+        for numero, c in filas
+    ]
+    await copiar_a_staging(
+        db_session, STAGING_CLIENTES, "_staging_clientes",
+        ["fila", "cliente_id", "nombre", "direccion", "localidad", "telefono"],
+        registros,
+    )
+
+    if any(c.cliente_id is not None for _, c in filas):
+        await db_session.execute(text(AJUSTAR_SECUENCIA_CLIENTES))
+
+    insertados = (await db_session.execute(text(UPSERT_CLIENTES))).scalars().all()
+
+    total_insertados = sum(1 for insertado in insertados if insertado)
+    return total_insertados, len(insertados) - total_insertados, errores
+
+STAGING_PEDIDOS = """
+    CREATE TEMP TABLE _staging_pedidos (
+        fila integer,
+        numero_pedido_externo varchar(50),
+        cliente_id integer,
+        fecha_entrega_estimada date,
+        detalle text,
+        observaciones text
+    ) ON COMMIT DROP
+"""
+
+UPSERT_PEDIDOS = """
+    INSERT INTO pedidos AS p (numero_pedido_externo, cliente_id, fecha_entrega_estimada, detalle, observaciones)
+    SELECT s.numero_pedido_externo, s.cliente_id, s.fecha_entrega_estimada, s.detalle, s.observaciones
+    FROM _staging_pedidos s
+    ON CONFLICT (numero_pedido_externo) DO UPDATE SET
+        cliente_id = EXCLUDED.cliente_id,
+        fecha_entrega_estimada = EXCLUDED.fecha_entrega_estimada,
+        detalle = EXCLUDED.detalle,
+        observaciones = EXCLUDED.observaciones
+    RETURNING (xmax = 0) AS insertado
+"""
+
+async def cargar_pedidos(
+    db_session: AsyncSession, validas: list[tuple[int, PedidoImport]]
+) -> tuple[int, int, list[ErrorImportacion]]:
+    """
+    Upsert de pedidos por numero_pedido_externo. Los pedidos sin número reciben uno del
+    numerador, reservado en bloque dentro de la misma transacción.
+    """
+    filas, errores = _deduplicar(validas, "numero_pedido_externo")
+
+    # 1. Verificar los clientes referenciados con una sola consulta
+    cliente_ids = {p.cliente_id for _, p in filas}
+    existentes = set((await db_session.execute(
+        select(ClienteORM.cliente_id).where(ClienteORM.cliente_id.in_(cliente_ids))
+    )).scalars().all())
+
+    con_cliente = []
+    for numero, pedido in filas:
+        if pedido.cliente_id in existentes:
+            con_cliente.append((numero, pedido))
+        else:
+            errores.append(ErrorImportacion(fila=numero, detalle=f"Cliente con ID {pedido.cliente_id} no encontrado."))
+
+    if not con_cliente:
+        return 0, 0, errores
+
+    # 2. Reservar los números de los pedidos nuevos (solo de las filas que se van a cargar)
+    sin_numero = sum(1 for _, p in con_cliente if p.numero_pedido_externo is None)
+    reservados = await reservar_numeros(db_session, "ultimo_pedido", sin_numero)
+    if len(reservados) != sin_numero:
+        raise RuntimeError("Fallo al generar número de pedido.")
+    numeros = iter(reservados)
+
+    registros = [
+        (
+            numero,
+            p.numero_pedido_externo if p.numero_pedido_externo is not None else next(numeros),
+            p.cliente_id, p.fecha_entrega_estimada, p.detalle, p.observaciones,
+        )
+        for numero, p in con_cliente
+    ]
+
+    # 3. COPY a staging y upsert
+    await copiar_a_staging(
+        db_session, STAGING_PEDIDOS, "_staging_pedidos",
+        ["fila", "numero_pedido_externo", "cliente_id", "fecha_entrega_estimada", "detalle", "observaciones"],
+        registros,
+    )
+    insertados = (await db_session.execute(text(UPSERT_PEDIDOS))).scalars().all()
+
+    total_insertados = sum(1 for insertado in insertados if insertado)
+    return total_insertados, len(insertados) - total_insertados, errores
@@ -0,0 +1,227 @@
+# backend/core/instrumentacion.py
+#
+# Instrumentación SQL por solicitud. Los eventos del engine registran cada sentencia en el
+# registro de la solicitud en curso (un ContextVar, que SQLAlchemy propaga a sus greenlets).
+# El middleware publica el resumen en el encabezado Server-Timing y en un log estructurado,
+# y marca como posible N+1 las sentencias con la misma forma repetidas dentro de la solicitud.
+
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger("backend.solicitudes")
+
+# --- CONFIGURACIÓN ---
+
+# Repeticiones de una misma forma de sentencia a partir de las cuales se avisa N+1
+UMBRAL_N_MAS_1 = int(os.getenv("SQL_UMBRAL_N_MAS_1", "5"))
+# Largo máximo del SQL que se incluye en logs y encabezados
+MAX_LARGO_SQL = 300
+
+# Listas de parámetros ($1, $2, ...) y literales: se colapsan para comparar "formas"
+_PARAMETROS = re.compile(r"(\$\d+|%\(\w+\)s|\?)(\s*,\s*(\$\d+|%\(\w+\)s|\?))*")
+_NUMEROS = re.compile(r"\b\d+\b")
+_ESPACIOS = re.compile(r"\s+")
+
+
+def forma_sentencia(sql: str) -> str:
+    """SQL sin valores: dos sentencias con la misma forma solo difieren en parámetros."""
+    sql = _PARAMETROS.sub("?", sql)
+    sql = _NUMEROS.sub("N", sql)
+    return _ESPACIOS.sub(" ", sql).strip()
+
+
+class RegistroConsultas:
+    """Acumula las sentencias ejecutadas durante una solicitud (o un bloque de código)."""
+
+    def __init__(self, scope: Optional[dict] = None):
+        # Scope ASGI de la solicitud (la ruta la completa el router antes de llegar al endpoint)
+        self.scope = scope
+        self.cantidad = 0
+        self.tiempo_total = 0.0
+        self.mas_lenta_ms = 0.0
+        self.mas_lenta_sql: Optional[str] = None
+        self.formas: Counter[str] = Counter()
+
+    def registrar(self, sql: str, duracion: float) -> None:
+        self.cantidad += 1
+        self.tiempo_total += duracion
+        ms = duracion * 1000
+        if ms > self.mas_lenta_ms:
+            self.mas_lenta_ms = ms
+            self.mas_lenta_sql = sql
+        self.formas[forma_sentencia(sql)] += 1
+
+    def absorber(self, otro: "RegistroConsultas") -> None:
+        self.cantidad += otro.cantidad
+        self.tiempo_total += otro.tiempo_total
+        if otro.mas_lenta_ms > self.mas_lenta_ms:
+            self.mas_lenta_ms = otro.mas_lenta_ms
+            self.mas_lenta_sql = otro.mas_lenta_sql
+        self.formas.update(otro.formas)
+
+    @property
+    def db_ms(self) -> float:
+        return self.tiempo_total * 1000
+
+    def sospechas_n_mas_1(self, umbral: int = UMBRAL_N_MAS_1) -> list[dict]:
+        return [
+            {"forma": forma[:MAX_LARGO_SQL], "repeticiones": veces}
+            for forma, veces in self.formas.most_common()
+            if veces >= umbral
+        ]
+
+
+_registro_actual: ContextVar[Optional[RegistroConsultas]] = ContextVar("registro_consultas", default=None)
+
+
+def registro_actual() -> Optional[RegistroConsultas]:
+    return _registro_actual.get()
+
+
+# =================================================================
+# EVENTOS DEL ENGINE
+# =================================================================
+
+# Callbacks síncronos (sql, parametros, duracion, registro) llamados tras cada sentencia.
+# Corren dentro de la ejecución: deben descartar rápido lo que no les interesa.
+_observadores: list[Callable] = []
+
+def agregar_observador(observador: Callable) -> None:
+    if observador not in _observadores:
+        _observadores.append(observador)
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("inicios_consulta", []).append(time.perf_counter())
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    duracion = time.perf_counter() - conn.info["inicios_consulta"].pop()
+    registro = _registro_actual.get()
+    if registro is not None:
+        registro.registrar(statement, duracion)
+    for observador in _observadores:
+        observador(statement, parameters, duracion, registro)
+
+def _error_al_ejecutar(contexto_excepcion):
+    # La sentencia falló: descartar su marca de inicio para no desalinear la pila
+    inicios = contexto_excepcion.connection.info.get("inicios_consulta") if contexto_excepcion.connection else None
+    if inicios:
+        inicios.pop()
+
+def instrumentar_engine(engine: AsyncEngine) -> None:
+    """Engancha los eventos de ejecución del engine (una sola vez, al importar main.py)."""
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _antes_de_ejecutar):
+        event.listen(sync_engine, "before_cursor_execute", _antes_de_ejecutar)
+        event.listen(sync_engine, "after_cursor_execute", _despues_de_ejecutar)
+        event.listen(sync_engine, "handle_error", _error_al_ejecutar)
+
+
+# =================================================================
+# MIDDLEWARE
+# =================================================================
+
+def plantilla_ruta(scope) -> str:
+    """Plantilla de la ruta resuelta (p. ej. '/op/{op_id}'); el path crudo si no hubo match."""
+    ruta = scope.get("route")
+    return getattr(ruta, "path", None) or scope.get("path", "")
+
+
+class InstrumentacionMiddleware:
+    """
+    Abre un RegistroConsultas por solicitud, agrega Server-Timing a la respuesta y deja una
+    línea de log JSON con el resumen (a WARNING si hay sospecha de N+1).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registro = RegistroConsultas(scope)
+        padre = _registro_actual.get()
+        token = _registro_actual.set(registro)
+        inicio = time.perf_counter()
+        estado = {"status": 500}
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado["status"] = mensaje["status"]
+                total_ms = (time.perf_counter() - inicio) * 1000
+                timing = (
+                    f'db;dur={registro.db_ms:.1f};desc="{registro.cantidad} consultas", '
+                    f"app;dur={total_ms:.1f}"
+                )
+                mensaje = {**mensaje, "headers": list(mensaje.get("headers", [])) + [(b"server-timing", timing.encode())]}
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _registro_actual.reset(token)
+            # Un presupuesto_consultas() abierto alrededor de la solicitud también la cuenta
+            if padre is not None:
+                padre.absorber(registro)
+            self._log(scope, estado["status"], (time.perf_counter() - inicio) * 1000, registro)
+
+    @staticmethod
+    def _log(scope, status: int, duracion_ms: float, registro: RegistroConsultas) -> None:
+        sospechas = registro.sospechas_n_mas_1()
+        nivel = logging.WARNING if sospechas else logging.INFO
+        if not logger.isEnabledFor(nivel):
+            return
+        logger.log(nivel, json.dumps({
+            "evento": "solicitud",
+            "metodo": scope.get("method"),
+            "ruta": plantilla_ruta(scope),
+            "status": status,
+            "duracion_ms": round(duracion_ms, 1),
+            "consultas": registro.cantidad,
+            "db_ms": round(registro.db_ms, 1),
+            "consulta_mas_lenta_ms": round(registro.mas_lenta_ms, 1),
+            "consulta_mas_lenta": (registro.mas_lenta_sql or "")[:MAX_LARGO_SQL] or None,
+            "n_mas_1": sospechas or None,
+        }, ensure_ascii=False))
+
+
+# =================================================================
+# PRESUPUESTO DE CONSULTAS (para pruebas y scripts)
+# =================================================================
+
+@asynccontextmanager
+async def presupuesto_consultas(maximo: int, permitir_n_mas_1: bool = False):
+    """
+    Falla con AssertionError si el bloque ejecuta más de 'maximo' sentencias (o, salvo que se
+    permita, si repite una misma forma N+1). Cuenta tanto llamadas directas como solicitudes
+    hechas con un cliente ASGI en proceso (httpx.ASGITransport):
+
+        async with presupuesto_consultas(6):
+            await cliente.get("/op/?limit=50")
+    """
+    registro = RegistroConsultas()
+    token = _registro_actual.set(registro)
+    try:
+        yield registro
+    finally:
+        _registro_actual.reset(token)
+
+    if registro.cantidad > maximo:
+        raise AssertionError(
+            f"Se ejecutaron {registro.cantidad} consultas (presupuesto: {maximo}). "
+            f"Formas más repetidas: {registro.formas.most_common(3)}"
+        )
+    sospechas = registro.sospechas_n_mas_1()
+    if sospechas and not permitir_n_mas_1:
+        raise AssertionError(f"Posible N+1: {sospechas}")
@@ -0,0 +1,205 @@
+# backend/core/metricas.py
+#
+# Métricas en formato de texto de Prometheus para GET /metrics (ver routers/monitoreo.py).
+# Sin dependencias externas: contadores e histogramas en memoria del worker. Todo corre en el
+# hilo del event loop (incluidos los greenlets de SQLAlchemy), así que no hacen falta locks:
+# registrar una observación es un bisect y un par de sumas.
+# Con varios workers, cada uno expone sus propias series (Prometheus las agrega).
+
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# --- BUCKETS ---
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+BUCKETS_ESPERA = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+# Etiqueta para solicitudes que no resolvieron a ninguna ruta (evita una serie por URL inventada)
+RUTA_DESCONOCIDA = "sin_ruta"
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _etiquetas(nombres: tuple[str, ...], valores: tuple, extra: str = "") -> str:
+    partes = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+class Contador:
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...] = ()):
+        self.nombre, self.ayuda, self.etiquetas = nombre, ayuda, etiquetas
+        self._valores: dict[tuple, float] = {}
+
+    def inc(self, *valores, cantidad: float = 1) -> None:
+        self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def exponer(self) -> Iterable[str]:
+        yield f"# HELP {self.nombre} {self.ayuda}"
+        yield f"# TYPE {self.nombre} counter"
+        for valores, total in self._valores.items():
+            yield f"{self.nombre}{_etiquetas(self.etiquetas, valores)} {total}"
+
+
+class Indicador:
+    """
+    Valor actual, fijado a mano o leído de una función al exponer. Con tipo="counter" expone
+    un contador que ya lleva otro componente (p. ej. los aciertos de la cache).
+    """
+
+    def __init__(self, nombre: str, ayuda: str, funcion: Optional[Callable[[], float]] = None, tipo: str = "gauge"):
+        self.nombre, self.ayuda, self.funcion, self.tipo = nombre, ayuda, funcion, tipo
+        self.valor = 0.0
+
+    def exponer(self) -> Iterable[str]:
+        yield f"# HELP {self.nombre} {self.ayuda}"
+        yield f"# TYPE {self.nombre} {self.tipo}"
+        yield f"{self.nombre} {self.funcion() if self.funcion else self.valor}"
+
+
+class Histograma:
+    def __init__(self, nombre: str, ayuda: str, buckets: tuple[float, ...], etiquetas: tuple[str, ...] = ()):
+        self.nombre, self.ayuda, self.buckets, self.etiquetas = nombre, ayuda, buckets, etiquetas
+        # Por combinación de etiquetas: [conteos por bucket (no acumulados) + infinito, suma]
+        self._series: dict[tuple, list] = {}
+
+    def observar(self, valor: float, *valores) -> None:
+        serie = self._series.get(valores)
+        if serie is None:
+            serie = self._series[valores] = [[0] * (len(self.buckets) + 1), 0.0]
+        serie[0][bisect_left(self.buckets, valor)] += 1
+        serie[1] += valor
+
+    def exponer(self) -> Iterable[str]:
+        yield f"# HELP {self.nombre} {self.ayuda}"
+        yield f"# TYPE {self.nombre} histogram"
+        for valores, (conteos, suma) in self._series.items():
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + ("+Inf",), conteos):
+                acumulado += conteo
+                etiquetas = _etiquetas(self.etiquetas, valores, 'le="%s"' % limite)
+                yield f"{self.nombre}_bucket{etiquetas} {acumulado}"
+            yield f"{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {suma}"
+            yield f"{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {acumulado}"
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._metricas: list = []
+
+    def registrar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def exponer(self) -> str:
+        return "\n".join(linea for metrica in self._metricas for linea in metrica.exponer()) + "\n"
+
+
+registro_metricas = RegistroMetricas()
+
+# --- HTTP ---
+
+solicitudes_total = registro_metricas.registrar(Contador(
+    "federici_http_solicitudes_total", "Solicitudes HTTP atendidas.", ("metodo", "ruta", "status")))
+duracion_solicitudes = registro_metricas.registrar(Histograma(
+    "federici_http_duracion_segundos", "Latencia de las solicitudes HTTP por plantilla de ruta.",
+    BUCKETS_LATENCIA, ("metodo", "ruta")))
+tamanio_respuestas = registro_metricas.registrar(Histograma(
+    "federici_http_respuesta_bytes", "Tamaño del cuerpo de las respuestas HTTP.", BUCKETS_BYTES, ("ruta",)))
+solicitudes_en_curso = registro_metricas.registrar(Indicador(
+    "federici_http_solicitudes_en_curso", "Solicitudes HTTP en curso en este worker."))
+
+# --- POOL DE CONEXIONES ---
+
+espera_pool = registro_metricas.registrar(Histograma(
+    "federici_db_pool_espera_segundos", "Tiempo para obtener una conexión del pool (incluye abrirla).",
+    BUCKETS_ESPERA))
+
+# --- NUMERADORES ---
+
+espera_numerador = registro_metricas.registrar(Histograma(
+    "federici_numerador_espera_segundos", "Tiempo para bloquear y actualizar la fila de numeradores.",
+    BUCKETS_ESPERA, ("tipo",)))
+
+
+class PoolMedido(AsyncAdaptedQueuePool):
+    """
+    Pool de SQLAlchemy que mide cuánto espera cada checkout y cuántos checkouts hay esperando
+    en este momento (ver database.py y core/salud.py).
+    """
+
+    en_espera = 0
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        PoolMedido.en_espera += 1
+        try:
+            return super()._do_get()
+        finally:
+            PoolMedido.en_espera -= 1
+            espera_pool.observar(time.perf_counter() - inicio)
+
+
+def registrar_metricas_pool(pool) -> None:
+    """Indicadores del pool leídos al exponer (no cuestan nada mientras nadie consulta /metrics)."""
+    for nombre, ayuda, funcion in (
+        ("federici_db_pool_tamanio", "Conexiones permanentes configuradas en el pool.", pool.size),
+        ("federici_db_pool_en_uso", "Conexiones prestadas (checked out).", pool.checkedout),
+        ("federici_db_pool_libres", "Conexiones disponibles en el pool (checked in).", pool.checkedin),
+        # overflow() es negativo mientras el pool no abrió todas sus conexiones permanentes
+        ("federici_db_pool_overflow", "Conexiones abiertas por encima del tamaño del pool.", lambda: max(pool.overflow(), 0)),
+        ("federici_db_pool_en_espera", "Checkouts esperando una conexión libre.", lambda: PoolMedido.en_espera),
+    ):
+        registro_metricas.registrar(Indicador(nombre, ayuda, funcion))
+
+
+def registrar_metricas_externas(prefijo: str, ayuda: str, estadisticas: Callable[[], dict], claves: dict[str, str]) -> None:
+    """
+    Expone valores de un dict de estadísticas ya existente (cache, coalescencia).
+    'claves' mapea clave del dict -> tipo de métrica ("counter" o "gauge"); los contadores
+    llevan el sufijo _total como pide la convención de Prometheus.
+    """
+    for clave, tipo in claves.items():
+        nombre = f"{prefijo}_{clave}_total" if tipo == "counter" else f"{prefijo}_{clave}"
+        registro_metricas.registrar(Indicador(
+            nombre, f"{ayuda} ({clave}).", lambda clave=clave: estadisticas().get(clave) or 0, tipo,
+        ))
+
+
+class MetricasMiddleware:
+    """Mide latencia, tamaño y status por plantilla de ruta, y las solicitudes en curso."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        estado = {"status": 500, "bytes": 0}
+        solicitudes_en_curso.valor += 1
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado["status"] = mensaje["status"]
+            elif mensaje["type"] == "http.response.body":
+                estado["bytes"] += len(mensaje.get("body", b""))
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            solicitudes_en_curso.valor -= 1
+            ruta = getattr(scope.get("route"), "path", None) or RUTA_DESCONOCIDA
+            metodo = scope["method"]
+            duracion_solicitudes.observar(time.perf_counter() - inicio, metodo, ruta)
+            tamanio_respuestas.observar(estado["bytes"], ruta)
+            solicitudes_total.inc(metodo, ruta, estado["status"])
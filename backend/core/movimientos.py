@@ -0,0 +1,73 @@
+# backend/core/movimientos.py
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.schemas.movimientos import MovimientoCreate
+
+# --- REGISTRO DE MOVIMIENTOS EN UNA SOLA SENTENCIA ---
+# 1. 'eventos' desarma los arrays recibidos (unnest) conservando el orden original.
+# 2. 'validos' descarta eventos de lotes inexistentes o de pasos que no son de la ruta del lote,
+#    y toma puesto y secuencia del paso.
+# 3. 'insertados' agrega los eventos al historial (solo inserción).
+# 4. 'ultimos' se queda con el evento más reciente de cada lote del lote de eventos.
+# 5. 'posiciones' materializa la posición actual en 'lotes'. Un evento más viejo que la
+#    posición actual (escáner que sube eventos atrasados) queda en el historial pero no la pisa.
+REGISTRAR_MOVIMIENTOS = text("""
+    WITH eventos AS (
+        SELECT e.lote_interno_id, e.detalle_id, e.tipo,
+               COALESCE(e.fecha_hora, now()) AS fecha_hora, e.orden
+        FROM unnest(
+            CAST(:lotes AS integer[]),
+            CAST(:detalles AS integer[]),
+            CAST(:tipos AS smallint[]),
+            CAST(:fechas AS timestamptz[])
+        ) WITH ORDINALITY AS e(lote_interno_id, detalle_id, tipo, fecha_hora, orden)
+    ),
+    validos AS (
+        SELECT e.*, d.puesto_id, d.secuencia
+        FROM eventos e
+        JOIN lotes l ON l.lote_interno_id = e.lote_interno_id
+        JOIN rutas_detalle d ON d.detalle_id = e.detalle_id AND d.ruta_id = l.ruta_id
+    ),
+    insertados AS (
+        INSERT INTO lote_movimientos (lote_interno_id, detalle_id, puesto_id, secuencia, tipo, fecha_hora)
+        SELECT lote_interno_id, detalle_id, puesto_id, secuencia, tipo, fecha_hora
+        FROM validos
+        ORDER BY orden
+        RETURNING movimiento_id, lote_interno_id, detalle_id, puesto_id, secuencia, tipo, fecha_hora
+    ),
+    ultimos AS (
+        SELECT DISTINCT ON (lote_interno_id) *
+        FROM insertados
+        ORDER BY lote_interno_id, fecha_hora DESC, movimiento_id DESC
+    ),
+    posiciones AS (
+        UPDATE lotes l SET
+            detalle_actual_id = u.detalle_id,
+            puesto_actual_id = u.puesto_id,
+            secuencia_actual = u.secuencia,
+            movimiento_actual = u.tipo,
+            fecha_movimiento_actual = u.fecha_hora
+        FROM ultimos u
+        WHERE l.lote_interno_id = u.lote_interno_id
+          AND (l.fecha_movimiento_actual IS NULL OR l.fecha_movimiento_actual <= u.fecha_hora)
+        RETURNING l.lote_interno_id
+    )
+    SELECT orden FROM validos
+""")
+
+async def registrar_movimientos(db_session: AsyncSession, eventos: list[MovimientoCreate]) -> list[int]:
+    """
+    Registra un lote de eventos de escaneo y actualiza la posición actual de cada lote
+    en la misma sentencia. NO confirma la transacción.
+    Devuelve las posiciones (base 0) de los eventos rechazados.
+    """
+    result = await db_session.execute(REGISTRAR_MOVIMIENTOS, {
+        "lotes": [e.lote_interno_id for e in eventos],
+        "detalles": [e.detalle_id for e in eventos],
+        "tipos": [e.tipo.value for e in eventos],
+        "fechas": [e.fecha_hora for e in eventos],
+    })
+    aceptados = {orden - 1 for orden in result.scalars().all()}
+    return [indice for indice in range(len(eventos)) if indice not in aceptados]
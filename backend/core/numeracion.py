@@ -1,9 +1,16 @@
 # backend/core/numeracion.py
 
+import time
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 from typing import Optional
 from backend.models.auxiliares import Numerador # Importar el modelo
+from backend.core.metricas import espera_numerador
+
+def formatear_numero(tipo: str, numero: int) -> str:
+    """Formatea el número según el tipo de contador (Ej: P-000001 o OP-000001)."""
+    prefijo = "P" if tipo == 'ultimo_pedido' else "OP"
+    return f"{prefijo}-{numero:06}"
 
 async def generar_siguiente_numero(session: AsyncSession, tipo: str) -> Optional[str]:
     """
@@ -12,7 +19,9 @@ async def generar_siguiente_numero(session: AsyncSession, tipo: str) -> Optional
     try:
         # 1. Selecciona el valor actual y BLOQUEA la fila (FOR UPDATE)
         stmt = select(getattr(Numerador, tipo)).where(Numerador.id == 1).with_for_update()
+        inicio = time.perf_counter()
         result = await session.execute(stmt)
+        espera_numerador.observar(time.perf_counter() - inicio, tipo)
         ultimo_numero = result.scalar_one_or_none()
         
         if ultimo_numero is None:
@@ -30,8 +39,7 @@ async def generar_siguiente_numero(session: AsyncSession, tipo: str) -> Optional
         await session.execute(update_stmt)
         
         # 3. Formatear el número (Ej: P-000001 o OP-000001)
-        prefijo = "P" if tipo == 'ultimo_pedido' else "OP"
-        numero_formateado = f"{prefijo}-{nuevo_numero_int:06}"
+        numero_formateado = formatear_numero(tipo, nuevo_numero_int)
         
         # 4. Confirma la transacción (liberando el bloqueo)
         await session.commit()
@@ -40,4 +48,31 @@ async def generar_siguiente_numero(session: AsyncSession, tipo: str) -> Optional
 
     except Exception as e:
         await session.rollback()
-        raise e
\ No newline at end of file
+        raise e
+
+async def reservar_numeros(session: AsyncSession, tipo: str, cantidad: int) -> list[str]:
+    """
+    Reserva un bloque de 'cantidad' números consecutivos con un único UPDATE ... RETURNING.
+    NO confirma la transacción: el bloqueo de la fila se libera con el commit del llamador,
+    de modo que la reserva y los registros que la usan son atómicos.
+    """
+    if cantidad <= 0:
+        return []
+
+    columna = getattr(Numerador, tipo)
+    inicio = time.perf_counter()
+    result = await session.execute(
+        update(Numerador)
+        .where(Numerador.id == 1)
+        .values({tipo: columna + cantidad})
+        .returning(columna)
+    )
+    # Incluye la espera por el bloqueo de la fila si otra transacción está reservando
+    espera_numerador.observar(time.perf_counter() - inicio, tipo)
+    ultimo_numero = result.scalar_one_or_none()
+
+    if ultimo_numero is None:
+        return []
+
+    primero = ultimo_numero - cantidad + 1
+    return [formatear_numero(tipo, numero) for numero in range(primero, ultimo_numero + 1)]
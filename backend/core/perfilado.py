@@ -0,0 +1,173 @@
+# backend/core/perfilado.py
+#
+# Perfilado bajo demanda de una solicitud puntual. Un administrador agrega el encabezado
+# "X-Perfilar: 1" (o "?perfilar=1") y la solicitud se ejecuta dentro de un profiler por muestreo
+# (pyinstrument, opcional) que cubre todo lo que hace FastAPI: resolución de dependencias
+# (get_current_user, get_db_session), consultas, hidratación del ORM, validación de Pydantic y
+# serialización JSON. El perfil queda en formato speedscope (https://www.speedscope.app):
+#   - "1": se guarda en memoria del worker y la respuesta trae "X-Perfil-Id"
+#     (descarga en GET /monitoreo/perfiles/{perfil_id}).
+#   - "devolver": la respuesta es el perfil en lugar del cuerpo original.
+# Sin el encabezado ni el parámetro, el costo es revisar un encabezado y la query string.
+
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import parse_qs
+
+from sqlalchemy import select
+
+from backend.core.instrumentacion import plantilla_ruta
+from backend.core.security import decode_token
+from backend.database import AsyncSessionLocal
+from backend.models.usuarios import UserORM
+
+logger = logging.getLogger("backend.perfilado")
+
+# --- CONFIGURACIÓN ---
+
+PERFILADO_ACTIVO = os.getenv("PERFILADO_ACTIVO", "1") != "0"
+# Intervalo de muestreo del profiler
+INTERVALO_MS = float(os.getenv("PERFILADO_INTERVALO_MS", "1"))
+# Perfiles que se conservan por worker (son JSON de decenas a cientos de KB)
+CAPACIDAD = int(os.getenv("PERFILADO_CAPACIDAD", "20"))
+
+ENCABEZADO = b"x-perfilar"
+PARAMETRO = "perfilar"
+MODOS = ("1", "devolver")
+
+
+def _modo_solicitado(scope) -> Optional[str]:
+    for nombre, valor in scope["headers"]:
+        if nombre == ENCABEZADO:
+            return valor.decode("latin-1")
+    query = scope.get("query_string", b"")
+    if PARAMETRO.encode() in query:
+        valores = parse_qs(query.decode("latin-1")).get(PARAMETRO)
+        if valores:
+            return valores[0]
+    return None
+
+
+async def _es_admin(scope) -> bool:
+    """Mismo criterio que get_current_admin, pero fuera del sistema de dependencias."""
+    autorizacion = next((v for n, v in scope["headers"] if n == b"authorization"), b"").decode("latin-1")
+    esquema, _, token = autorizacion.partition(" ")
+    payload = decode_token(token) if esquema.lower() == "bearer" and token else None
+    user_id = payload.get("user_id") if payload else None
+    if user_id is None:
+        return False
+    async with AsyncSessionLocal() as session:
+        fila = (await session.execute(
+            select(UserORM.is_active, UserORM.is_admin).where(UserORM.user_id == user_id)
+        )).one_or_none()
+    return bool(fila and fila.is_active and fila.is_admin)
+
+
+class AlmacenPerfiles:
+    def __init__(self, capacidad: int = CAPACIDAD):
+        self._perfiles: deque[dict] = deque(maxlen=capacidad)
+        self._siguiente_id = 1
+
+    def reservar_id(self) -> int:
+        """El ID se informa en los encabezados, antes de que el perfil esté completo."""
+        perfil_id = self._siguiente_id
+        self._siguiente_id += 1
+        return perfil_id
+
+    def guardar(self, perfil_id: int, resumen: dict, perfil: str) -> None:
+        self._perfiles.append({"perfil_id": perfil_id, **resumen, "bytes": len(perfil), "perfil": perfil})
+
+    def listar(self) -> list[dict]:
+        return [{k: v for k, v in p.items() if k != "perfil"} for p in reversed(self._perfiles)]
+
+    def obtener(self, perfil_id: int) -> Optional[str]:
+        return next((p["perfil"] for p in self._perfiles if p["perfil_id"] == perfil_id), None)
+
+
+almacen_perfiles = AlmacenPerfiles()
+
+
+class PerfiladoMiddleware:
+    """
+    Va por fuera de la coalescencia (marca el scope para que no comparta la ejecución) y por
+    dentro de las métricas.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        modo = _modo_solicitado(scope) if PERFILADO_ACTIVO and scope["type"] == "http" else None
+        if modo is None:
+            await self.app(scope, receive, send)
+            return
+
+        # 1. Validar el pedido
+        if modo not in MODOS:
+            await self._responder(send, 400, {"detail": f"Modo de perfilado inválido. Use: {', '.join(MODOS)}"})
+            return
+        if not await _es_admin(scope):
+            await self._responder(send, 403, {"detail": "Se requieren permisos de administrador"})
+            return
+        try:
+            from pyinstrument import Profiler
+            from pyinstrument.renderers import SpeedscopeRenderer
+        except ImportError:
+            await self._responder(send, 501, {"detail": "Perfilado no disponible: falta instalar pyinstrument"})
+            return
+
+        # 2. Ejecutar la solicitud dentro del profiler (async_mode sigue solo a esta tarea)
+        scope["perfilar"] = True
+        perfil_id = almacen_perfiles.reservar_id()
+        estado = {"status": 500}
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado["status"] = mensaje["status"]
+            if modo == "devolver":
+                return  # El cuerpo original se descarta: se responde con el perfil
+            if mensaje["type"] == "http.response.start":
+                mensaje = {**mensaje, "headers": list(mensaje.get("headers", [])) + [
+                    (b"x-perfil-id", str(perfil_id).encode())
+                ]}
+            await send(mensaje)
+
+        profiler = Profiler(interval=INTERVALO_MS / 1000, async_mode="enabled")
+        inicio = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            profiler.stop()
+            duracion_ms = (time.perf_counter() - inicio) * 1000
+
+        # 3. Guardar o devolver el perfil
+        perfil = profiler.output(renderer=SpeedscopeRenderer())
+        resumen = {
+            "fecha": datetime.now(timezone.utc).isoformat(),
+            "metodo": scope["method"],
+            "ruta": plantilla_ruta(scope),
+            "path": scope["path"],
+            "status": estado["status"],
+            "duracion_ms": round(duracion_ms, 1),
+        }
+        almacen_perfiles.guardar(perfil_id, resumen, perfil)
+        logger.info(json.dumps({"evento": "perfil", "perfil_id": perfil_id, **resumen}, ensure_ascii=False))
+
+        if modo == "devolver":
+            await send({"type": "http.response.start", "status": 200, "headers": [
+                (b"content-type", b"application/json"),
+                (b"x-perfil-id", str(perfil_id).encode()),
+                (b"x-perfil-status", str(estado["status"]).encode()),
+            ]})
+            await send({"type": "http.response.body", "body": perfil.encode()})
+
+    @staticmethod
+    async def _responder(send, status: int, cuerpo: dict) -> None:
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": json.dumps(cuerpo, ensure_ascii=False).encode()})
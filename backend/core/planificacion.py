@@ -0,0 +1,145 @@
+# backend/core/planificacion.py
+#
+# Motor de planificación a capacidad finita. El cálculo (calcular_plan) es una función pura
+# sobre tuplas simples para poder ejecutarse en un proceso aparte: no toca la base de datos
+# ni el event loop. La carga de datos y el guardado del plan están en routers/planificacion.py.
+
+import asyncio
+import heapq
+import math
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from backend.schemas.movimientos import TipoMovimiento
+from backend.core.procesos import ejecutar_en_proceso
+
+# --- CONFIGURACIÓN ---
+
+# Capacidad asumida para un puesto sin registro (p. ej. eliminado después de crear la ruta)
+CAPACIDAD_POR_DEFECTO = 1
+
+# --- TIPOS DE ENTRADA/SALIDA (tuplas para que el pasaje entre procesos sea barato) ---
+
+# Lote abierto: (lote_interno_id, op_id, ruta_id, fecha_compromiso, secuencia_actual,
+#                movimiento_actual, fecha_movimiento_actual)
+LoteAPlanificar = tuple[int, int, int, Optional[date], Optional[int], Optional[int], Optional[datetime]]
+# Paso de ruta: (detalle_id, puesto_id, secuencia, minutos_estandar), ordenados por secuencia
+PasoRuta = tuple[int, int, int, int]
+# Fila de planificacion_lotes / planificacion_operaciones (mismo orden que las columnas)
+FilaLote = tuple[int, int, int, int, datetime, datetime, Optional[date], int]
+FilaOperacion = tuple[int, int, int, int, int, datetime, datetime]
+
+
+def _pasos_pendientes(lote: LoteAPlanificar, pasos: list[PasoRuta], inicio: datetime) -> tuple[bool, list[tuple]]:
+    """
+    Devuelve (en_curso, pasos) con los pasos que le faltan al lote según su posición:
+    sin posición = ruta completa; INGRESO = desde el paso actual; INICIO = el paso actual
+    descontando el tiempo ya trabajado; FIN = desde el paso siguiente.
+    """
+    _, _, _, _, secuencia_actual, movimiento_actual, fecha_movimiento = lote
+    en_curso = False
+    pendientes = []
+
+    for detalle_id, puesto_id, secuencia, minutos in pasos:
+        if secuencia_actual is not None:
+            if secuencia < secuencia_actual:
+                continue
+            if secuencia == secuencia_actual:
+                if movimiento_actual == TipoMovimiento.FIN:
+                    continue
+                if movimiento_actual == TipoMovimiento.INICIO and fecha_movimiento is not None:
+                    transcurrido = (inicio - fecha_movimiento).total_seconds() / 60
+                    minutos = max(0.0, minutos - transcurrido)
+                    en_curso = True
+        pendientes.append((detalle_id, puesto_id, secuencia, minutos))
+
+    return en_curso, pendientes
+
+
+def _vencimiento(fecha_compromiso: Optional[date], inicio: datetime) -> float:
+    """Minutos desde 'inicio' hasta el final del día de compromiso (infinito si no hay fecha)."""
+    if fecha_compromiso is None:
+        return math.inf
+    limite = datetime.combine(fecha_compromiso + timedelta(days=1), time.min, tzinfo=inicio.tzinfo)
+    return (limite - inicio).total_seconds() / 60
+
+
+def calcular_plan(
+    corrida_id: int,
+    lotes: list[LoteAPlanificar],
+    rutas: dict[int, list[PasoRuta]],
+    capacidades: dict[int, int],
+    inicio: datetime,
+) -> tuple[list[FilaLote], list[FilaOperacion]]:
+    """
+    Heurística de despacho por fecha de entrega más temprana (EDD) con capacidad finita.
+
+    1. Los lotes se ordenan en una cola de prioridad: primero los que ya están en curso en un
+       puesto (lo ocupan de hecho), luego por vencimiento, OP y lote.
+    2. Cada puesto tiene un heap con el instante en que se libera cada una de sus 'capacidad'
+       posiciones; cada paso se asigna a la que se libera antes, respetando que el paso
+       anterior del lote haya terminado (precedencia de la ruta).
+
+    Costo O(P log C) con P = pasos planificados y C = capacidad del puesto más grande.
+    El tiempo es continuo (sin calendario de turnos) y medido en minutos desde 'inicio'.
+    """
+
+    # 1. COLA DE PRIORIDAD DE LOTES
+    cola = []
+    for lote in lotes:
+        lote_id, op_id, ruta_id, fecha_compromiso = lote[:4]
+        en_curso, pendientes = _pasos_pendientes(lote, rutas.get(ruta_id, []), inicio)
+        if not pendientes:
+            continue
+        vencimiento = _vencimiento(fecha_compromiso, inicio)
+        cola.append((0 if en_curso else 1, vencimiento, op_id, lote_id, fecha_compromiso, pendientes))
+    heapq.heapify(cola)
+
+    # 2. DESPACHO CONTRA LA CAPACIDAD DE CADA PUESTO
+    puestos: dict[int, list[float]] = {}
+    filas_lotes: list[FilaLote] = []
+    filas_operaciones: list[FilaOperacion] = []
+    orden = 0
+
+    while cola:
+        _, vencimiento, op_id, lote_id, fecha_compromiso, pendientes = heapq.heappop(cola)
+        orden += 1
+        listo = 0.0
+        comienzo = None
+
+        for detalle_id, puesto_id, secuencia, minutos in pendientes:
+            libres = puestos.get(puesto_id)
+            if libres is None:
+                libres = [0.0] * max(1, capacidades.get(puesto_id, CAPACIDAD_POR_DEFECTO))
+                puestos[puesto_id] = libres
+
+            desde = max(listo, libres[0])
+            hasta = desde + minutos
+            heapq.heapreplace(libres, hasta)
+
+            if comienzo is None:
+                comienzo = desde
+            listo = hasta
+            filas_operaciones.append((
+                corrida_id, lote_id, secuencia, detalle_id, puesto_id,
+                inicio + timedelta(minutes=desde), inicio + timedelta(minutes=hasta),
+            ))
+
+        atraso = 0 if listo <= vencimiento else math.ceil(listo - vencimiento)
+        filas_lotes.append((
+            corrida_id, lote_id, op_id, orden,
+            inicio + timedelta(minutes=comienzo), inicio + timedelta(minutes=listo),
+            fecha_compromiso, atraso,
+        ))
+
+    return filas_lotes, filas_operaciones
+
+
+# =================================================================
+# EJECUCIÓN EN EL POOL DE PROCESOS
+# =================================================================
+
+async def calcular_plan_en_pool(*args) -> tuple[list[FilaLote], list[FilaOperacion]]:
+    """Ejecuta calcular_plan en el pool de procesos compartido (core/procesos.py) sin bloquear el event loop."""
+    return await ejecutar_en_proceso(calcular_plan, *args)
@@ -0,0 +1,54 @@
+# backend/core/procesos.py
+#
+# Pool de procesos único por worker para el cálculo pesado (planificación y cualquier trabajo
+# en segundo plano que use ContextoTrabajo.ejecutar_en_proceso): el event loop no se bloquea
+# y los procesos del pool se comparten en lugar de que cada módulo arme el suyo.
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+# --- CONFIGURACIÓN ---
+
+# Procesos del pool por worker (se crea al primer uso). PLANIFICACION_PROCESOS es el nombre anterior.
+PROCESOS_CALCULO = int(os.getenv("PROCESOS_CALCULO", os.getenv("PLANIFICACION_PROCESOS", "1")))
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def obtener_pool() -> ProcessPoolExecutor:
+    """Crea el pool la primera vez que se usa ('spawn': el hijo no hereda conexiones ni el loop)."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=PROCESOS_CALCULO,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def cerrar_pool() -> None:
+    """Apaga el pool (shutdown de la aplicación)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def ejecutar_en_proceso(funcion: Callable, *args) -> Any:
+    """Corre una función pura (importable y con argumentos serializables) en el pool."""
+    global _pool
+    pool = obtener_pool()
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(pool, funcion, *args)
+    except BrokenProcessPool:
+        # Un proceso murió (p. ej. por memoria): se apaga el pool roto (libera sus recursos y
+        # el hilo de gestión) y el próximo uso crea otro
+        if _pool is pool:
+            _pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
@@ -0,0 +1,56 @@
+# backend/core/rutas.py
+
+from bisect import bisect_right
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.auxiliares import COMPILAR_RUTAS, RutaMaestraORM
+
+
+async def compilar_rutas(db_session: AsyncSession, ruta_ids: Optional[list[int]] = None, puesto_id: Optional[int] = None) -> None:
+    """
+    Recompila las rutas indicadas por ID o las que usan un puesto (no confirma la transacción).
+    """
+    if ruta_ids is not None:
+        await db_session.execute(
+            text(COMPILAR_RUTAS.format(condicion="r.ruta_id = ANY(:ruta_ids)")), {"ruta_ids": ruta_ids}
+        )
+    if puesto_id is not None:
+        await db_session.execute(
+            text(COMPILAR_RUTAS.format(
+                condicion="r.ruta_id IN (SELECT ruta_id FROM rutas_detalle WHERE puesto_id = :puesto_id)"
+            )),
+            {"puesto_id": puesto_id},
+        )
+
+
+def paso_compilado(ruta: RutaMaestraORM, indice: int) -> dict:
+    """Arma el paso en la posición 'indice' de los arreglos de la ruta compilada."""
+    return {
+        "detalle_id": ruta.pasos_detalle_ids[indice],
+        "secuencia": ruta.pasos_secuencias[indice],
+        "puesto_id": ruta.pasos_puesto_ids[indice],
+        "nombre_puesto": ruta.pasos_nombres[indice],
+        "minutos_estandar": ruta.pasos_minutos[indice],
+    }
+
+
+def siguiente_paso(ruta: RutaMaestraORM, secuencia_actual: Optional[int]) -> Optional[dict]:
+    """
+    Paso que sigue a 'secuencia_actual' (el primero si el lote aún no tiene posición).
+    En rutas validadas la secuencia n está en el índice n - 1, así que el siguiente es el
+    índice n; las rutas anteriores a la validación pueden tener huecos y se resuelven con bisect.
+    """
+    secuencias = ruta.pasos_secuencias
+    if secuencia_actual is None:
+        indice = 0
+    elif 0 < secuencia_actual <= len(secuencias) and secuencias[secuencia_actual - 1] == secuencia_actual:
+        indice = secuencia_actual
+    else:
+        indice = bisect_right(secuencias, secuencia_actual)
+
+    if indice >= len(secuencias):
+        return None
+    return paso_compilado(ruta, indice)
@@ -0,0 +1,162 @@
+# backend/core/salud.py
+#
+# Estado de salud del worker para los endpoints /health/live y /health/ready (routers/salud.py).
+# Una tarea de fondo hace un ping a PostgreSQL por una conexión dedicada (no ocupa el pool) y
+# mide de paso el retraso del event loop; los endpoints solo leen esos valores en memoria, así
+# que el balanceador puede consultarlos cada segundo sin costo para la base.
+
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+import asyncpg
+from sqlalchemy import text
+
+from backend.core.metricas import PoolMedido, solicitudes_en_curso
+from backend.database import DB_HOST, DB_NAME, DB_USER, DB_PASS, DB_PORT, MAX_OVERFLOW, POOL_SIZE, engine
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURACIÓN ---
+
+# Cada cuánto se mide la base
+INTERVALO_PING_SEGUNDOS = float(os.getenv("SALUD_INTERVALO_PING", "1"))
+# Un ping que tarda más que esto cuenta como fallido
+TIMEOUT_PING_SEGUNDOS = float(os.getenv("SALUD_TIMEOUT_PING", "2"))
+# Latencia de ida y vuelta a la base a partir de la cual el worker deja de estar listo
+MAX_LATENCIA_DB_MS = float(os.getenv("SALUD_MAX_LATENCIA_DB_MS", "250"))
+# Fracción de conexiones (pool + overflow) prestadas a partir de la cual se considera saturado
+MAX_SATURACION_POOL = float(os.getenv("SALUD_MAX_SATURACION_POOL", "0.9"))
+# Retraso del event loop tolerado (un handler bloqueante lo dispara)
+MAX_RETRASO_LOOP_MS = float(os.getenv("SALUD_MAX_RETRASO_LOOP_MS", "500"))
+# Solicitudes en curso en el worker (0 = sin tope)
+MAX_SOLICITUDES_EN_CURSO = int(os.getenv("SALUD_MAX_SOLICITUDES_EN_CURSO", "0"))
+# Conexiones del pool que se abren durante el arranque (las primeras solicitudes no pagan el connect)
+CONEXIONES_CALENTAMIENTO = int(os.getenv("SALUD_CONEXIONES_CALENTAMIENTO", str(min(POOL_SIZE, 4))))
+
+
+class EstadoSalud:
+    def __init__(self):
+        self.calentamiento_completo = False
+        self.apagando = False
+        self.ultimo_ping: Optional[float] = None  # time.monotonic() del último ping exitoso
+        self.latencia_db_ms: Optional[float] = None
+        self.error_db: Optional[str] = None
+        self.retraso_loop_ms = 0.0
+        self._conexion: Optional[asyncpg.Connection] = None
+        self._tarea: Optional[asyncio.Task] = None
+
+    # --- Ciclo de vida ---
+
+    async def iniciar(self) -> None:
+        """Primer ping sincrónico (para no arrancar 'no listo' un segundo) y tarea de fondo."""
+        await self._medir_db()
+        if self._tarea is None:
+            self._tarea = asyncio.create_task(self._bucle())
+
+    async def calentar(self) -> None:
+        """Abre CONEXIONES_CALENTAMIENTO conexiones del pool a la vez y las devuelve; luego marca el worker listo."""
+        async def abrir():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        await asyncio.gather(*(abrir() for _ in range(CONEXIONES_CALENTAMIENTO)))
+        self.calentamiento_completo = True
+
+    async def detener(self) -> None:
+        # Se llama desde el shutdown del lifespan, cuando uvicorn ya no acepta conexiones:
+        # solo deja constancia en evaluar() (el balanceador dejó de enviar tráfico antes)
+        self.apagando = True
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+        await self._cerrar_conexion()
+
+    async def _bucle(self) -> None:
+        while True:
+            esperado = time.monotonic() + INTERVALO_PING_SEGUNDOS
+            await asyncio.sleep(INTERVALO_PING_SEGUNDOS)
+            # Si el loop estuvo bloqueado, el sleep vuelve tarde
+            self.retraso_loop_ms = max(time.monotonic() - esperado, 0.0) * 1000
+            await self._medir_db()
+
+    async def _medir_db(self) -> None:
+        try:
+            if self._conexion is None or self._conexion.is_closed():
+                self._conexion = await asyncpg.connect(
+                    host=DB_HOST, port=int(DB_PORT), user=DB_USER, password=DB_PASS, database=DB_NAME,
+                    timeout=TIMEOUT_PING_SEGUNDOS,
+                )
+            inicio = time.perf_counter()
+            await self._conexion.fetchval("SELECT 1", timeout=TIMEOUT_PING_SEGUNDOS)
+            self.latencia_db_ms = (time.perf_counter() - inicio) * 1000
+            self.ultimo_ping = time.monotonic()
+            self.error_db = None
+        except Exception as e:
+            self.latencia_db_ms = None
+            self.error_db = f"{type(e).__name__}: {e}"
+            logger.warning("Ping a la base fallido: %s", self.error_db)
+            await self._cerrar_conexion()
+
+    async def _cerrar_conexion(self) -> None:
+        if self._conexion is not None:
+            try:
+                await self._conexion.close(timeout=TIMEOUT_PING_SEGUNDOS)
+            except Exception:
+                self._conexion.terminate()
+            self._conexion = None
+
+    # --- Evaluación (solo lee memoria) ---
+
+    def evaluar(self) -> tuple[bool, dict]:
+        """(listo, detalle de cada chequeo)."""
+        pool = engine.pool
+        capacidad = POOL_SIZE + MAX_OVERFLOW
+        saturacion = pool.checkedout() / capacidad if capacidad else 0.0
+        edad_ping = time.monotonic() - self.ultimo_ping if self.ultimo_ping is not None else None
+
+        chequeos = {
+            "calentamiento": {
+                "ok": self.calentamiento_completo and not self.apagando,
+                "completo": self.calentamiento_completo,
+                "apagando": self.apagando,
+            },
+            "base_de_datos": {
+                # Un ping viejo significa que el bucle dejó de medir: tampoco es confiable
+                "ok": (
+                    self.error_db is None
+                    and self.latencia_db_ms is not None
+                    and self.latencia_db_ms <= MAX_LATENCIA_DB_MS
+                    and edad_ping is not None
+                    and edad_ping <= INTERVALO_PING_SEGUNDOS + TIMEOUT_PING_SEGUNDOS + 1
+                ),
+                "latencia_ms": round(self.latencia_db_ms, 2) if self.latencia_db_ms is not None else None,
+                "edad_medicion_s": round(edad_ping, 2) if edad_ping is not None else None,
+                "error": self.error_db,
+            },
+            "pool": {
+                "ok": saturacion < MAX_SATURACION_POOL,
+                "en_uso": pool.checkedout(),
+                "capacidad": capacidad,
+                "saturacion": round(saturacion, 3),
+                "en_espera": PoolMedido.en_espera,
+            },
+            "event_loop": {
+                "ok": self.retraso_loop_ms <= MAX_RETRASO_LOOP_MS,
+                "retraso_ms": round(self.retraso_loop_ms, 1),
+            },
+            "solicitudes": {
+                "ok": MAX_SOLICITUDES_EN_CURSO <= 0 or solicitudes_en_curso.valor <= MAX_SOLICITUDES_EN_CURSO,
+                "en_curso": int(solicitudes_en_curso.valor),
+            },
+        }
+        return all(chequeo["ok"] for chequeo in chequeos.values()), chequeos
+
+
+estado_salud = EstadoSalud()
@@ -101,3 +101,17 @@ async def get_current_user(
         raise HTTPException(status_code=400, detail="Usuario inactivo")
         
     return db_user
+
+
+# --- Dependencia de Administrador ---
+
+async def get_current_admin(current_user: UserORM = Depends(get_current_user)) -> UserORM:
+    """
+    Dependencia para endpoints de diagnóstico y operación: exige un usuario con is_admin.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Se requieren permisos de administrador",
+        )
+    return current_user
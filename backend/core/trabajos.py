@@ -0,0 +1,335 @@
+# backend/core/trabajos.py
+#
+# Trabajos en segundo plano (corridas de planificación, exportaciones, importaciones grandes)
+# para que una operación pesada no ocupe el worker que atiende la solicitud. La cola es la
+# tabla 'trabajos' (models/trabajos.py) y cada worker de la API corre un EjecutorTrabajos que:
+#
+#   1. Toma pendientes con SELECT ... FOR UPDATE SKIP LOCKED, respetando la concurrencia de
+#      cada tipo en todo el cluster (el conteo y la toma se serializan por tipo con un advisory
+#      lock de transacción) y un tope de trabajos simultáneos por worker.
+#   2. Ejecuta cada trabajo como tarea asyncio; el cálculo pesado va al pool de procesos
+#      compartido (core/procesos.py) con contexto.ejecutar_en_proceso() o con los helpers del
+#      módulo del trabajo (p. ej. calcular_plan_en_pool), para no bloquear el event loop.
+#   3. Guarda progreso, resultado o error, y reintenta con espera exponencial.
+#   4. Marca latidos: si un worker muere, otro devuelve sus trabajos a la cola. Un trabajo
+#      puede ejecutarse más de una vez (p. ej. si se cae a la mitad): debe ser idempotente.
+#
+# Los tipos se registran con registrar_tipo_trabajo() desde el módulo que los implementa.
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import AsyncSessionLocal
+from backend.models.trabajos import TrabajoORM
+from backend.core.procesos import ejecutar_en_proceso
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURACIÓN ---
+
+# Cada cuánto se buscan trabajos pendientes (un alta en este mismo worker despierta antes)
+INTERVALO_SONDEO_SEGUNDOS = float(os.getenv("TRABAJOS_INTERVALO", "1"))
+# Trabajos simultáneos por worker de la API, de cualquier tipo
+MAX_TRABAJOS_POR_WORKER = int(os.getenv("TRABAJOS_MAX_POR_WORKER", "2"))
+# Cada cuánto se renueva el latido de los trabajos en curso, y cuándo se da por muerto al worker
+INTERVALO_LATIDO_SEGUNDOS = float(os.getenv("TRABAJOS_INTERVALO_LATIDO", "10"))
+LATIDO_VENCIDO_SEGUNDOS = float(os.getenv("TRABAJOS_LATIDO_VENCIDO", "60"))
+# Espera antes del primer reintento; se duplica en cada intento siguiente
+ESPERA_REINTENTO_SEGUNDOS = float(os.getenv("TRABAJOS_ESPERA_REINTENTO", "30"))
+# Al apagar, cuánto se espera a los trabajos en curso antes de devolverlos a la cola
+TIMEOUT_APAGADO_SEGUNDOS = float(os.getenv("TRABAJOS_TIMEOUT_APAGADO", "20"))
+
+# Primera clave del advisory lock por tipo (la segunda es hashtext(tipo))
+BLOQUEO_TRABAJOS = 340_003
+
+
+class TrabajoFallido(Exception):
+    """Error definitivo (p. ej. parámetros inválidos): el trabajo falla sin reintentos."""
+
+
+class DefinicionTrabajo:
+    """
+    Tipo de trabajo registrado. 'funcion' es una corrutina que recibe un ContextoTrabajo y
+    devuelve el resultado (un dict serializable a JSON, o None).
+    'concurrencia': ejecuciones simultáneas de este tipo en todo el cluster.
+    """
+
+    def __init__(
+        self,
+        nombre: str,
+        funcion: Callable[["ContextoTrabajo"], Awaitable[Optional[dict]]],
+        concurrencia: int = 1,
+        max_intentos: int = 3,
+        timeout_segundos: Optional[float] = None,
+    ):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.concurrencia = concurrencia
+        self.max_intentos = max_intentos
+        self.timeout_segundos = timeout_segundos
+
+
+_TIPOS: dict[str, DefinicionTrabajo] = {}
+
+def registrar_tipo_trabajo(
+    nombre: str,
+    funcion: Callable[["ContextoTrabajo"], Awaitable[Optional[dict]]],
+    concurrencia: int = 1,
+    max_intentos: int = 3,
+    timeout_segundos: Optional[float] = None,
+) -> None:
+    """Registra un tipo de trabajo (se llama al importar el módulo que lo implementa)."""
+    _TIPOS[nombre] = DefinicionTrabajo(nombre, funcion, concurrencia, max_intentos, timeout_segundos)
+
+def obtener_tipo_trabajo(nombre: str) -> Optional[DefinicionTrabajo]:
+    return _TIPOS.get(nombre)
+
+def tipos_trabajo() -> list[DefinicionTrabajo]:
+    return list(_TIPOS.values())
+
+
+async def encolar_trabajo(db_session: AsyncSession, tipo: str, parametros: dict) -> TrabajoORM:
+    """Inserta el trabajo como pendiente, confirma la transacción y despierta al ejecutor local."""
+    definicion = _TIPOS[tipo]
+    trabajo = TrabajoORM(tipo=tipo, parametros=parametros, max_intentos=definicion.max_intentos)
+    db_session.add(trabajo)
+    await db_session.commit()
+    await db_session.refresh(trabajo)
+    ejecutor_trabajos.despertar()
+    return trabajo
+
+
+class ContextoTrabajo:
+    """Lo que recibe la función de un trabajo: sus parámetros, el intento y cómo informar avance."""
+
+    def __init__(self, ejecutor: "EjecutorTrabajos", trabajo_id: int, parametros: dict, intento: int):
+        self._ejecutor = ejecutor
+        self.trabajo_id = trabajo_id
+        self.parametros = parametros
+        self.intento = intento
+
+    async def progreso(self, porcentaje: int, mensaje: Optional[str] = None) -> None:
+        """Guarda el avance (0 a 100); también renueva el latido."""
+        async with AsyncSessionLocal() as db_session:
+            await db_session.execute(
+                update(TrabajoORM)
+                .where(TrabajoORM.trabajo_id == self.trabajo_id, TrabajoORM.worker == self._ejecutor.nombre)
+                .values(progreso=max(0, min(int(porcentaje), 100)), mensaje=mensaje, latido=func.now())
+            )
+            await db_session.commit()
+
+    async def ejecutar_en_proceso(self, funcion: Callable, *args) -> Any:
+        """Corre una función pura (importable y con argumentos serializables) en el pool de procesos."""
+        return await ejecutar_en_proceso(funcion, *args)
+
+
+class EjecutorTrabajos:
+    def __init__(self):
+        # Identifica al worker en la tabla (cada proceso de uvicorn importa el módulo: pid propio)
+        self.nombre = f"{socket.gethostname()}:{os.getpid()}"
+        self._tarea: Optional[asyncio.Task] = None
+        self._despertar = asyncio.Event()
+        self._en_curso: dict[int, asyncio.Task] = {}
+        self._ultimo_latido = 0.0
+        self.completados = 0
+        self.fallidos = 0
+        self.reintentos = 0
+
+    # --- Ciclo de vida ---
+
+    async def iniciar(self) -> None:
+        if self._tarea is None:
+            self._tarea = asyncio.create_task(self._bucle())
+
+    async def detener(self) -> None:
+        """Deja de tomar trabajos, espera los en curso hasta TIMEOUT_APAGADO y devuelve el resto a la cola."""
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+
+        en_curso = list(self._en_curso.values())
+        if en_curso:
+            _, sin_terminar = await asyncio.wait(en_curso, timeout=TIMEOUT_APAGADO_SEGUNDOS)
+            for tarea in sin_terminar:
+                tarea.cancel()
+            await asyncio.gather(*sin_terminar, return_exceptions=True)
+
+
+    def despertar(self) -> None:
+        self._despertar.set()
+
+    # --- Bucle ---
+
+    async def _bucle(self) -> None:
+        while True:
+            try:
+                await self._ciclo()
+            except Exception:
+                logger.exception("Error en el ciclo de trabajos")
+            try:
+                await asyncio.wait_for(self._despertar.wait(), timeout=INTERVALO_SONDEO_SEGUNDOS)
+            except asyncio.TimeoutError:
+                pass
+            self._despertar.clear()
+
+    async def _ciclo(self) -> None:
+        if time.monotonic() - self._ultimo_latido >= INTERVALO_LATIDO_SEGUNDOS:
+            await self._latir()
+            self._ultimo_latido = time.monotonic()
+
+        for definicion in tipos_trabajo():
+            while len(self._en_curso) < MAX_TRABAJOS_POR_WORKER:
+                tomado = await self._tomar(definicion)
+                if tomado is None:
+                    break
+                trabajo_id, parametros, intento = tomado
+                tarea = asyncio.create_task(self._ejecutar(definicion, trabajo_id, parametros, intento))
+                self._en_curso[trabajo_id] = tarea
+                tarea.add_done_callback(lambda _, trabajo_id=trabajo_id: self._al_terminar(trabajo_id))
+
+    def _al_terminar(self, trabajo_id: int) -> None:
+        self._en_curso.pop(trabajo_id, None)
+        # Con un lugar libre se busca el siguiente sin esperar el sondeo
+        self.despertar()
+
+    async def _latir(self) -> None:
+        """Renueva el latido de los trabajos propios y devuelve a la cola los de workers muertos."""
+        async with AsyncSessionLocal() as db_session:
+            if self._en_curso:
+                await db_session.execute(
+                    update(TrabajoORM)
+                    .where(TrabajoORM.trabajo_id.in_(list(self._en_curso)), TrabajoORM.worker == self.nombre)
+                    .values(latido=func.now())
+                )
+            huerfanos = await db_session.execute(text("""
+                UPDATE trabajos SET
+                    estado = CASE WHEN intentos >= max_intentos THEN 'fallido' ELSE 'pendiente' END,
+                    finalizado = CASE WHEN intentos >= max_intentos THEN now() END,
+                    error = 'El worker ' || coalesce(worker, '?') || ' dejó de responder.',
+                    disponible_desde = now(), worker = NULL, latido = NULL
+                WHERE estado = 'en_curso' AND latido < now() - make_interval(secs => :vencido)
+                RETURNING trabajo_id
+            """), {"vencido": LATIDO_VENCIDO_SEGUNDOS})
+            recuperados = huerfanos.scalars().all()
+            await db_session.commit()
+        if recuperados:
+            logger.warning("Trabajos huérfanos devueltos a la cola o fallidos: %s", recuperados)
+
+    async def _tomar(self, definicion: DefinicionTrabajo) -> Optional[tuple[int, dict, int]]:
+        """Toma el pendiente más antiguo del tipo si no se alcanzó su concurrencia en el cluster."""
+        async with AsyncSessionLocal() as db_session:
+            # 1. SERIALIZAR EL CONTEO Y LA TOMA DE ESTE TIPO (el lock se libera con el commit)
+            await db_session.execute(
+                text("SELECT pg_advisory_xact_lock(:clave, hashtext(:tipo))"),
+                {"clave": BLOQUEO_TRABAJOS, "tipo": definicion.nombre},
+            )
+            en_curso = (await db_session.execute(
+                select(func.count()).where(TrabajoORM.tipo == definicion.nombre, TrabajoORM.estado == "en_curso")
+            )).scalar_one()
+            if en_curso >= definicion.concurrencia:
+                await db_session.rollback()
+                return None
+
+            # 2. TOMAR EL MÁS ANTIGUO DISPONIBLE (SKIP LOCKED: no espera filas que otro tiene bloqueadas)
+            siguiente = (
+                select(TrabajoORM.trabajo_id)
+                .where(
+                    TrabajoORM.tipo == definicion.nombre,
+                    TrabajoORM.estado == "pendiente",
+                    TrabajoORM.disponible_desde <= func.now(),
+                )
+                .order_by(TrabajoORM.disponible_desde, TrabajoORM.trabajo_id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            fila = (await db_session.execute(
+                update(TrabajoORM)
+                .where(TrabajoORM.trabajo_id == siguiente)
+                .values(
+                    estado="en_curso", intentos=TrabajoORM.intentos + 1, iniciado=func.now(),
+                    latido=func.now(), worker=self.nombre, progreso=0, mensaje=None,
+                )
+                .returning(TrabajoORM.trabajo_id, TrabajoORM.parametros, TrabajoORM.intentos)
+            )).first()
+            await db_session.commit()
+        return tuple(fila) if fila is not None else None
+
+    # --- Ejecución ---
+
+    async def _ejecutar(self, definicion: DefinicionTrabajo, trabajo_id: int, parametros: dict, intento: int) -> None:
+        contexto = ContextoTrabajo(self, trabajo_id, parametros, intento)
+        try:
+            if definicion.timeout_segundos:
+                resultado = await asyncio.wait_for(definicion.funcion(contexto), timeout=definicion.timeout_segundos)
+            else:
+                resultado = await definicion.funcion(contexto)
+        except asyncio.CancelledError:
+            # Apagado del worker: vuelve a la cola sin gastar el intento
+            await self._finalizar(
+                trabajo_id, estado="pendiente", intentos=TrabajoORM.intentos - 1,
+                mensaje="Interrumpido por el apagado del worker.", iniciado=None,
+            )
+            raise
+        except Exception as e:
+            error = str(getattr(e, "detail", "")) or f"{type(e).__name__}: {e}"
+            if isinstance(e, asyncio.TimeoutError):
+                error = f"Tiempo agotado ({definicion.timeout_segundos} s)."
+            if not isinstance(e, TrabajoFallido) and intento < definicion.max_intentos:
+                espera = ESPERA_REINTENTO_SEGUNDOS * 2 ** (intento - 1)
+                logger.warning("Trabajo %s (%s) falló en el intento %s, se reintenta en %s s: %s",
+                               trabajo_id, definicion.nombre, intento, espera, error)
+                self.reintentos += 1
+                await self._finalizar(
+                    trabajo_id, estado="pendiente", error=error,
+                    disponible_desde=func.now() + timedelta(seconds=espera),
+                )
+            else:
+                logger.error("Trabajo %s (%s) fallido: %s", trabajo_id, definicion.nombre, error)
+                self.fallidos += 1
+                await self._finalizar(trabajo_id, estado="fallido", error=error, finalizado=func.now())
+        else:
+            self.completados += 1
+            await self._finalizar(
+                trabajo_id, estado="completado", resultado=resultado, error=None,
+                progreso=100, finalizado=func.now(),
+            )
+
+    async def _finalizar(self, trabajo_id: int, **valores) -> None:
+        # Solo si sigue siendo propio: si se lo dio por huérfano, otro worker ya lo retomó
+        async with AsyncSessionLocal() as db_session:
+            await db_session.execute(
+                update(TrabajoORM)
+                .where(
+                    TrabajoORM.trabajo_id == trabajo_id,
+                    TrabajoORM.worker == self.nombre,
+                    TrabajoORM.estado == "en_curso",
+                )
+                .values(worker=None, latido=None, **valores)
+            )
+            await db_session.commit()
+
+    # --- Métricas ---
+
+    def estadisticas(self) -> dict:
+        return {
+            "en_curso": len(self._en_curso),
+            "completados": self.completados,
+            "fallidos": self.fallidos,
+            "reintentos": self.reintentos,
+        }
+
+
+ejecutor_trabajos = EjecutorTrabajos()
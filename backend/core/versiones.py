@@ -0,0 +1,70 @@
+# backend/core/versiones.py
+#
+# Concurrencia optimista para los PUT de pedidos, OP y lotes.
+# Cada fila lleva una columna 'version' que un trigger incrementa cuando cambia un campo editable
+# (models/maestros.py). Los GET de detalle la devuelven como ETag ("7"); el PUT debe mandarla en
+# If-Match y el UPDATE solo toca la fila si la versión sigue siendo esa (WHERE id = :id AND
+# version IN (...)). Si no toca nada, otro usuario la cambió antes: 412 con la versión actual,
+# sin haber tomado locks ni hecho un SELECT previo.
+
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
+from sqlalchemy import true
+
+
+def etag(version: int) -> str:
+    """ETag fuerte a partir de la versión de la fila."""
+    return f'"{version}"'
+
+
+def versiones_if_match(if_match: Optional[str] = Header(None)) -> Optional[list[int]]:
+    """
+    Dependencia de los PUT: versiones aceptadas según If-Match, o None si vale cualquiera
+    ('*': el cliente acepta pisar la versión vigente, RFC 9110 13.1.1).
+    Sin el encabezado no se sabe sobre qué versión se editó, así que se rechaza (428).
+    """
+    # 1. El encabezado es obligatorio
+    if not if_match:
+        raise HTTPException(
+            status_code=status.HTTP_428_PRECONDITION_REQUIRED,
+            detail="Se requiere el encabezado If-Match con la ETag obtenida en el GET.",
+        )
+    if if_match.strip() == "*":
+        return None
+
+    # 2. Lista de ETags separadas por coma. If-Match compara en forma fuerte: una ETag débil
+    #    (W/"...") nunca coincidiría y el cliente recibiría un 412 engañoso, así que se rechaza
+    versiones = []
+    for valor in if_match.split(","):
+        valor = valor.strip()
+        if valor.startswith("W/"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"If-Match no admite ETags débiles: {valor}. Use la ETag del GET.",
+            )
+        try:
+            versiones.append(int(valor.strip('"')))
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"If-Match inválido: {valor}",
+            )
+    return versiones
+
+
+def condicion_version(columna, versiones: Optional[list[int]]):
+    """Condición del UPDATE para las versiones de versiones_if_match (None: cualquiera)."""
+    return columna.in_(versiones) if versiones is not None else true()
+
+
+def precondicion_fallida(version_actual: int) -> HTTPException:
+    """412 con la versión vigente (en el cuerpo y como ETag) para que el cliente recargue y reintente."""
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail={
+            "mensaje": "El registro fue modificado por otro usuario. Recargue los datos antes de guardar.",
+            "version_actual": version_actual,
+        },
+        headers={"ETag": etag(version_actual)},
+    )
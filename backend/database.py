@@ -2,9 +2,14 @@
 
 import os
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.orm import sessionmaker
 from typing import AsyncGenerator
 
+# CLAVE: Usamos la misma Base que los modelos (backend/models/base.py) para que
+# create_all conozca todas las tablas mapeadas.
+from backend.models.base import Base
+from backend.core.metricas import PoolMedido, registrar_metricas_pool
+
 # --- CONFIGURACIÓN DE CONEXIÓN ---
 
 # Obtener variables de entorno
@@ -19,17 +24,53 @@ ASYNC_SQLALCHEMY_DATABASE_URL = (
     f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
 
+# Workers del servidor (lo fija servidor.py; uvicorn usa la misma variable)
+WORKERS = max(int(os.getenv("WEB_CONCURRENCY", "1")), 1)
+# Presupuesto global de conexiones a PostgreSQL para todos los workers juntos (0 = sin
+# presupuesto: cada worker usa DB_POOL_SIZE + DB_MAX_OVERFLOW). Debe quedar por debajo del
+# max_connections del servidor, descontando otros clientes.
+DB_CONEXIONES_MAX = int(os.getenv("DB_CONEXIONES_MAX", "0"))
+# EXPLAIN simultáneos del registro de consultas lentas (core/consultas_lentas.py), cada uno por
+# una conexión propia; solo se abren si el muestreo está activo (SQL_LENTA_EXPLAIN_MUESTREO > 0)
+MAX_CONEXIONES_EXPLAIN = 2
+EXPLAIN_ACTIVO = float(os.getenv("SQL_LENTA_EXPLAIN_MUESTREO", "0")) > 0
+# Conexiones de cada worker que no pasan por el pool: LISTEN del bus de eventos, ping de salud
+# y, si están activos, los EXPLAIN muestreados
+CONEXIONES_DEDICADAS_POR_WORKER = 2 + (MAX_CONEXIONES_EXPLAIN if EXPLAIN_ACTIVO else 0)
+
+
+def dimensionar_pool(presupuesto: int, workers: int) -> tuple[int, int]:
+    """(pool_size, max_overflow) de cada worker para no pasar el presupuesto entre todos."""
+    por_worker = presupuesto // workers - CONEXIONES_DEDICADAS_POR_WORKER
+    if por_worker < 1:
+        raise RuntimeError(
+            f"DB_CONEXIONES_MAX={presupuesto} no alcanza para {workers} workers "
+            f"(mínimo {workers * (CONEXIONES_DEDICADAS_POR_WORKER + 1)})."
+        )
+    # La mitad fija y la otra mitad como overflow (se cierra al devolverse)
+    pool_size = max(por_worker // 2, 1)
+    return pool_size, por_worker - pool_size
+
+
+# Tamaño del pool de conexiones por worker (también lo usa core/salud.py para la saturación)
+if DB_CONEXIONES_MAX > 0:
+    POOL_SIZE, MAX_OVERFLOW = dimensionar_pool(DB_CONEXIONES_MAX, WORKERS)
+else:
+    POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+
 # Crear el motor de conexión
 engine = create_async_engine(
     ASYNC_SQLALCHEMY_DATABASE_URL, 
-    echo=True, # Muestra las consultas SQL en la consola (útil para debug)
-    pool_size=10, 
-    max_overflow=20
+    # DB_ECHO=1 muestra las consultas SQL en la consola (solo para debug; la instrumentación
+    # por solicitud está en core/instrumentacion.py)
+    echo=os.getenv("DB_ECHO", "0") == "1",
+    pool_size=POOL_SIZE, 
+    max_overflow=MAX_OVERFLOW,
+    # Igual al pool por defecto, pero mide la espera de cada checkout (ver GET /metrics)
+    poolclass=PoolMedido,
 )
-
-# Declarative Base para los modelos ORM
-class Base(DeclarativeBase):
-    pass
+registrar_metricas_pool(engine.pool)
 
 # Creador de sesiones asíncronas
 AsyncSessionLocal = sessionmaker(
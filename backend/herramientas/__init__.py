@@ -0,0 +1,9 @@
+# backend/herramientas/__init__.py
+#
+# Herramientas de mantenimiento que se ejecutan a mano contra la base configurada (variables
+# DB_* de database.py), desde la raíz del repositorio:
+#
+#   Auditoría de índices (FKs sin índice, índices sin uso, tablas con muchos seq scans) y
+#   stubs de migración para los índices que faltan:
+#     python -m backend.herramientas.indices
+#     python -m backend.herramientas.indices --stubs migracion_indices.sql --estricto
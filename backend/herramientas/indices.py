@@ -0,0 +1,228 @@
+# backend/herramientas/indices.py
+#
+# Auditoría de índices: cruza Base.metadata con el catálogo y las estadísticas de la base. Uso:
+#
+#   python -m backend.herramientas.indices [--min-filas 1000] [--top 15] [--json]
+#                                         [--stubs migracion.sql] [--estricto]
+#
+# Informa:
+#   1. FKs sin índice en la columna que referencia. PostgreSQL indexa la clave referenciada
+#      pero no la que referencia: sin índice, cada DELETE/UPDATE del padre (y cada
+#      selectinload o "¿tiene hijos?") recorre la tabla hija entera. Se indica si el índice
+#      falta solo en models/ (existe en la base, p. ej. creado a mano) o en ambos.
+#   2. Índices sin uso (idx_scan = 0 desde el último reset de estadísticas), salvo únicos y
+#      PKs. Cuidado: las estadísticas son de este servidor (no de las réplicas) y un índice
+#      puede usarse solo en procesos esporádicos (cierre de mes, archivado).
+#   3. Tablas con más filas leídas por seq scan, según pg_stat_user_tables.
+#
+# Con --stubs genera, para cada FK sin índice, el CREATE INDEX CONCURRENTLY para aplicar a mano
+# en producción y la línea registrar_ddl(...) para el módulo de modelos que declara la tabla
+# (en el arranque corre dentro de una transacción, así que ahí va sin CONCURRENTLY y, si ya se
+# aplicó a mano, IF NOT EXISTS lo vuelve un no-op). --estricto sale con código 1 si hay FKs sin
+# índice, para usarlo en CI.
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from sqlalchemy import Table, UniqueConstraint, text
+
+import backend.models  # noqa: F401  (registra todos los modelos)
+from backend.database import engine
+from backend.models.base import Base
+
+CONSULTA_FKS = text("""
+    SELECT c.conrelid::regclass::text AS tabla,
+           c.conname AS restriccion,
+           c.confrelid::regclass::text AS referencia,
+           array_agg(a.attname::text ORDER BY k.orden) AS columnas,
+           greatest(t.reltuples, 0)::bigint AS filas,
+           EXISTS (
+               SELECT 1 FROM pg_index i
+               WHERE i.indrelid = c.conrelid
+                 AND i.indpred IS NULL
+                 AND (i.indkey::int2[])[0:cardinality(c.conkey) - 1] @> c.conkey
+           ) AS indexada
+    FROM pg_constraint c
+    JOIN pg_class t ON t.oid = c.conrelid
+    CROSS JOIN LATERAL unnest(c.conkey) WITH ORDINALITY AS k(attnum, orden)
+    JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum
+    WHERE c.contype = 'f' AND t.relnamespace = 'public'::regnamespace
+    GROUP BY c.oid, c.conrelid, c.conname, c.confrelid, c.conkey, t.reltuples
+    ORDER BY 1, 2
+""")
+
+CONSULTA_INDICES_SIN_USO = text("""
+    SELECT s.relname AS tabla,
+           s.indexrelname AS indice,
+           pg_relation_size(s.indexrelid) AS bytes,
+           pg_get_indexdef(s.indexrelid) AS definicion,
+           EXISTS (
+               SELECT 1 FROM pg_constraint c
+               WHERE c.contype = 'f' AND c.conrelid = i.indrelid
+                 AND (i.indkey::int2[])[0:cardinality(c.conkey) - 1] @> c.conkey
+           ) AS respalda_fk
+    FROM pg_stat_user_indexes s
+    JOIN pg_index i ON i.indexrelid = s.indexrelid
+    WHERE s.schemaname = 'public' AND s.idx_scan = 0
+      AND NOT i.indisunique AND NOT i.indisprimary
+    ORDER BY pg_relation_size(s.indexrelid) DESC, s.relname
+""")
+
+CONSULTA_SEQ_SCANS = text("""
+    SELECT relname AS tabla, seq_scan, seq_tup_read, coalesce(idx_scan, 0) AS idx_scan,
+           n_live_tup AS filas, seq_tup_read / seq_scan AS filas_por_scan
+    FROM pg_stat_user_tables
+    WHERE schemaname = 'public' AND seq_scan > 0 AND n_live_tup >= :min_filas
+    ORDER BY seq_tup_read DESC
+    LIMIT :top
+""")
+
+CONSULTA_RESET = text("SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()")
+
+
+# --- LADO DE models/ ---
+
+def _modulos_por_tabla() -> dict[str, str]:
+    """Tabla -> módulo de models/ que la declara (para saber dónde va el stub)."""
+    return {m.local_table.name: m.class_.__module__ for m in Base.registry.mappers}
+
+def indexada_en_modelos(tabla: Table, columnas: list[str]) -> bool:
+    """Si algún índice, PK o UNIQUE declarado empieza por 'columnas' (en cualquier orden)."""
+    candidatas = [list(tabla.primary_key.columns.keys())]
+    for indice in tabla.indexes:
+        if indice.dialect_options["postgresql"].get("where") is None:
+            candidatas.append([c.name for c in indice.columns])
+    for restriccion in tabla.constraints:
+        if isinstance(restriccion, UniqueConstraint):
+            candidatas.append([c.name for c in restriccion.columns])
+    return any(set(c[:len(columnas)]) == set(columnas) for c in candidatas)
+
+
+def nombre_indice(tabla: str, columnas: list[str]) -> str:
+    # Misma convención que index=True de SQLAlchemy (ix_<tabla>_<columna>)
+    return f"ix_{tabla}_{'_'.join(columnas)}"[:63]
+
+
+# --- AUDITORÍA ---
+
+async def auditar(min_filas: int, top: int) -> dict:
+    async with engine.connect() as conn:
+        fks = [dict(f._mapping) for f in await conn.execute(CONSULTA_FKS)]
+        sin_uso = [dict(f._mapping) for f in await conn.execute(CONSULTA_INDICES_SIN_USO)]
+        seq_scans = [dict(f._mapping) for f in await conn.execute(CONSULTA_SEQ_SCANS, {"min_filas": min_filas, "top": top})]
+        stats_reset = (await conn.execute(CONSULTA_RESET)).scalar()
+
+    modulos = _modulos_por_tabla()
+    fks_sin_indice = []
+    for fk in fks:
+        tabla = Base.metadata.tables.get(fk["tabla"])
+        fk["en_modelos"] = tabla is not None and indexada_en_modelos(tabla, fk["columnas"])
+        fk["modulo"] = modulos.get(fk["tabla"])
+        if not fk["indexada"] or not fk["en_modelos"]:
+            fks_sin_indice.append(fk)
+    # Las FKs sin índice en la base primero, las tablas más grandes arriba
+    fks_sin_indice.sort(key=lambda f: (f["indexada"], -f["filas"], f["tabla"]))
+
+    return {
+        "stats_reset": stats_reset.isoformat() if stats_reset else None,
+        "fks_sin_indice": fks_sin_indice,
+        "indices_sin_uso": sin_uso,
+        "seq_scans": seq_scans,
+    }
+
+
+def _tamanio(bytes_: int) -> str:
+    for unidad in ("B", "kB", "MB", "GB"):
+        if bytes_ < 1024:
+            return f"{bytes_:.0f} {unidad}"
+        bytes_ /= 1024
+    return f"{bytes_:.1f} TB"
+
+
+def imprimir(informe: dict) -> None:
+    print(f"Estadísticas desde: {informe['stats_reset'] or 'creación del cluster'}\n")
+
+    print("FKs sin índice")
+    if not informe["fks_sin_indice"]:
+        print("  (ninguna)")
+    for fk in informe["fks_sin_indice"]:
+        donde = "falta en models/" if fk["indexada"] else "falta en la base"
+        origen = f"{fk['tabla']}({', '.join(fk['columnas'])})"
+        print(f"  {origen:<40} -> {fk['referencia']:<20} {fk['filas']:>10} filas  {donde}")
+
+    print("\nÍndices sin uso (idx_scan = 0)")
+    if not informe["indices_sin_uso"]:
+        print("  (ninguno)")
+    for indice in informe["indices_sin_uso"]:
+        # Uno sin uso que respalda una FK igual evita recorrer la tabla al borrar el padre
+        nota = "  (respalda una FK: no borrar)" if indice["respalda_fk"] else ""
+        print(f"  {indice['indice']:<45} {indice['tabla']:<26} {_tamanio(indice['bytes']):>9}{nota}")
+
+    print("\nTablas con más filas leídas por seq scan")
+    print(f"  {'tabla':<28} {'seq_scan':>10} {'filas leídas':>14} {'filas/scan':>11} {'idx_scan':>10} {'filas':>10}")
+    for t in informe["seq_scans"]:
+        print(
+            f"  {t['tabla']:<28} {t['seq_scan']:>10} {t['seq_tup_read']:>14} "
+            f"{t['filas_por_scan']:>11} {t['idx_scan']:>10} {t['filas']:>10}"
+        )
+
+
+def generar_stubs(fks_sin_indice: list[dict]) -> str:
+    """SQL para aplicar a mano y, comentado, el registrar_ddl para cada módulo de modelos."""
+    lineas = [
+        "-- Índices para FKs sin índice (generado por backend/herramientas/indices.py).",
+        "-- 1. Aplicar a mano en producción, fuera de una transacción (no bloquea escrituras):",
+        "",
+    ]
+    por_modulo: dict[str, list[str]] = {}
+    for fk in fks_sin_indice:
+        nombre = nombre_indice(fk["tabla"], fk["columnas"])
+        columnas = ", ".join(fk["columnas"])
+        if not fk["indexada"]:
+            lineas.append(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {nombre} ON {fk['tabla']} ({columnas});")
+        por_modulo.setdefault(fk["modulo"] or "(tabla sin modelo)", []).append(
+            f'    "CREATE INDEX IF NOT EXISTS {nombre} ON {fk["tabla"]} ({columnas})",'
+        )
+
+    lineas += ["", "-- 2. Declararlos en models/ para las bases nuevas y los demás entornos:"]
+    for modulo, sentencias in sorted(por_modulo.items()):
+        lineas += ["--", f"-- {modulo}", "-- registrar_ddl("]
+        lineas += [f"-- {s}" for s in sentencias]
+        lineas.append("-- )")
+    return "\n".join(lineas) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Auditoría de índices contra la base configurada.")
+    parser.add_argument("--min-filas", type=int, default=1000, help="Tablas más chicas no se listan en seq scans")
+    parser.add_argument("--top", type=int, default=15, help="Tablas a listar en seq scans")
+    parser.add_argument("--json", action="store_true", help="Imprimir el informe en JSON")
+    parser.add_argument("--stubs", type=Path, help="Escribir la migración de los índices que faltan")
+    parser.add_argument("--estricto", action="store_true", help="Salir con código 1 si hay FKs sin índice")
+    args = parser.parse_args()
+
+    async def ejecutar():
+        try:
+            return await auditar(args.min_filas, args.top)
+        finally:
+            await engine.dispose()
+
+    informe = asyncio.run(ejecutar())
+    if args.json:
+        print(json.dumps(informe, indent=2, ensure_ascii=False))
+    else:
+        imprimir(informe)
+
+    if args.stubs:
+        args.stubs.write_text(generar_stubs(informe["fks_sin_indice"]))
+        print(f"\nStubs de migración en {args.stubs}", file=sys.stderr)
+
+    if args.estricto and informe["fks_sin_indice"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,10 +14,27 @@ from backend.routers import (
     lotes, 
     users,      # Router de Usuarios (Registro y Perfil /me)
     auth_router, # Router de Autenticación (Login)
-    # rutas,     # Asegúrate de que este router exista si lo importas
+    rutas,      # Maestros de Producción (Productos, Puestos, Rutas)
+    eventos,    # Stream de cambios en tiempo real (SSE)
+    planificacion, # Planificación a capacidad finita
+    monitoreo,  # Métricas internas (cache)
+    salud,      # /health/live y /health/ready para el balanceador
+    trabajos,   # Trabajos en segundo plano (estado, progreso y resultado)
 )
 # Base de datos
 from backend.database import Base, engine
+from backend.models.ddl import aplicar_ddl
+from backend.core.eventos import bus_cambios
+from backend.core.procesos import cerrar_pool
+from backend.core.cache import cache_respuestas
+from backend.core.coalescencia import CoalescenciaMiddleware
+from backend.core.instrumentacion import InstrumentacionMiddleware, instrumentar_engine
+from backend.core.consultas_lentas import activar_registro_consultas_lentas
+from backend.core.metricas import MetricasMiddleware
+from backend.core.perfilado import PerfiladoMiddleware
+from backend.core.salud import estado_salud
+from backend.core.trabajos import ejecutor_trabajos
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # Importar modelos para que Base.metadata los detecte
@@ -37,6 +54,10 @@ import backend.models
 # CICLO DE VIDA (LIFESPAN) Y CREACIÓN DE TABLAS
 # =================================================================
 
+# Clave del advisory lock que serializa el DDL de arranque entre workers
+BLOQUEO_DDL_ARRANQUE = 340_002
+
+
 async def create_db_and_tables():
     """
     Función que crea todas las tablas de la base de datos basadas en los 
@@ -44,8 +65,14 @@ async def create_db_and_tables():
     """
     print("Iniciando la creación/recreación de tablas...")
     async with engine.begin() as conn:
+        # Con varios workers arrancando a la vez, uno aplica el DDL y los demás esperan acá
+        # (el lock se libera con el commit); create_all y los CREATE ... IF NOT EXISTS en
+        # paralelo chocan en el catálogo.
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:clave)"), {"clave": BLOQUEO_DDL_ARRANQUE})
         # CREATE_ALL es la clave para que todas las tablas, incluida 'users', se creen
         await conn.run_sync(Base.metadata.create_all)
+        # Columnas nuevas en tablas existentes, funciones y triggers (ver models/ddl.py)
+        await aplicar_ddl(conn)
     print("Base de datos y tablas inicializadas correctamente.")
 
 
@@ -56,9 +83,27 @@ async def lifespan(app: FastAPI):
     """
     # Llama a la función de creación de tablas al arrancar el servidor
     await create_db_and_tables() 
+    # Conexión dedicada LISTEN/NOTIFY de este worker para el stream de cambios
+    # (también invalida la cache de respuestas con los cambios hechos por otros workers)
+    bus_cambios.agregar_oyente(cache_respuestas.invalidar_por_evento)
+    await bus_cambios.iniciar()
+    # Ping periódico a la base y conexiones precalentadas: recién entonces /health/ready da 200
+    await estado_salud.iniciar()
+    await estado_salud.calentar()
+    # Cada worker toma trabajos en segundo plano de la tabla 'trabajos'
+    await ejecutor_trabajos.iniciar()
     print("Manejador de ciclo de vida ejecutado: Startup completo.")
     yield
-    # Código de limpieza si fuera necesario al apagar (shutdown)
+    # Limpieza al apagar (shutdown). Esto corre recién después de que uvicorn dejó de aceptar
+    # conexiones y esperó las solicitudes en curso: el balanceador ya ve fallar los chequeos
+    # por conexión rechazada, no por un 503 de /health/ready
+    await estado_salud.detener()
+    # Los trabajos que no terminan a tiempo vuelven a la cola para otro worker
+    await ejecutor_trabajos.detener()
+    await bus_cambios.detener()
+    cerrar_pool()
+    # Las solicitudes en curso ya terminaron (uvicorn las espera antes del shutdown del lifespan)
+    await engine.dispose()
 
 
 # =================================================================
@@ -82,12 +127,45 @@ origins = [
     "*"
 ]
 
+# Conteo de consultas SQL y tiempo de base por solicitud (Server-Timing + log estructurado).
+# Va por dentro de la coalescencia: solo se mide la ejecución que realmente consulta la base.
+instrumentar_engine(engine)
+# Consultas sobre SQL_LENTA_UMBRAL_MS quedan en GET /monitoreo/consultas-lentas
+activar_registro_consultas_lentas()
+app.add_middleware(InstrumentacionMiddleware)
+
+# Coalescencia de GET idénticos concurrentes (listados pesados que piden muchas terminales a la vez).
+# Se agrega antes que CORS para quedar por dentro: CORS arma sus encabezados para cada cliente.
+app.add_middleware(
+    CoalescenciaMiddleware,
+    rutas=[
+        "/op/",
+        "/pedidos/",
+        "/clientes/",
+        "/lotes/",
+        "/produccion/rutas/",
+        "/produccion/puestos-trabajo/",
+        "/produccion/puestos-trabajo/cola",
+        "/planificacion/lotes",
+    ],
+)
+
+# Perfilado bajo demanda (X-Perfilar, solo administradores). Por fuera de la coalescencia para
+# que la solicitud perfilada no reciba una respuesta compartida.
+app.add_middleware(PerfiladoMiddleware)
+
+# Métricas HTTP para GET /metrics. Por fuera de la coalescencia: cuenta también las solicitudes
+# que recibieron una respuesta compartida, con la latencia que vio el cliente.
+app.add_middleware(MetricasMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Encabezados de respuesta que el frontend necesita leer (ETag para el If-Match de los PUT)
+    expose_headers=["ETag", "X-Cache", "X-Perfil-Id"],
 )
 
 
@@ -103,13 +181,17 @@ app.include_router(users.router)
 app.include_router(clientes.router)
 app.include_router(pedidos.router)
 app.include_router(op.router)
-# Si el router 'rutas' no existe, descomenta o crea el archivo:
-# app.include_router(rutas.router) 
+app.include_router(rutas.router)
 app.include_router(lotes.router)
+app.include_router(eventos.router)
+app.include_router(planificacion.router)
+app.include_router(monitoreo.router)
+app.include_router(salud.router)
+app.include_router(trabajos.router)
 
 
 # =================================================================
-# RUTA RAIZ (Health Check)
+# RUTA RAIZ (para chequeos de salud reales ver /health/live y /health/ready)
 # =================================================================
 
 @app.get("/")
@@ -3,5 +3,9 @@
 from backend.models import usuarios
 from backend.models import maestros 
 from backend.models import auxiliares
-
-
+from backend.models import movimientos
+from backend.models import eventos
+from backend.models import planificacion
+from backend.models import trabajos
+from backend.models import archivo
+from backend.models import grilla
@@ -0,0 +1,85 @@
+# backend/models/archivo.py
+
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import BigInteger, Date, DateTime, ForeignKey, Index, SmallInteger, String, Text, text
+from typing import Optional
+from datetime import date, datetime
+
+from backend.models.base import Base # Importar la Base
+from backend.models.ddl import registrar_ddl
+from backend.models.auxiliares import ProductoORM, RutaMaestraORM
+from backend.models.maestros import PedidoORM
+
+# =================================================================
+# ARCHIVO (DATOS FRÍOS)
+# =================================================================
+# OPs cerradas (todos sus lotes LIBERADO) con sus lotes y movimientos, movidas fuera de las
+# tablas calientes por el trabajo 'archivado' (core/archivo.py). Las columnas son las mismas
+# que en op / lotes / lote_movimientos (el traspaso copia por nombre de columna): una columna
+# nueva en esas tablas también se agrega acá. Sin triggers: son de solo lectura.
+
+class OpArchivoORM(Base):
+    __tablename__ = "op_archivo"
+    op_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    numero_op_externo: Mapped[str] = mapped_column(String(50), unique=True)
+    fecha: Mapped[date] = mapped_column(Date)
+    pedido_id: Mapped[Optional[int]] = mapped_column(ForeignKey("pedidos.pedido_id"), index=True)
+    fecha_estimada_entrega: Mapped[Optional[date]] = mapped_column(Date)
+    detalle: Mapped[Optional[str]] = mapped_column(Text)
+    observaciones: Mapped[Optional[str]] = mapped_column(Text)
+    lotes_total: Mapped[int] = mapped_column(default=0)
+    lotes_en_espera: Mapped[int] = mapped_column(default=0)
+    lotes_en_proceso: Mapped[int] = mapped_column(default=0)
+    lotes_liberados: Mapped[int] = mapped_column(default=0)
+    version: Mapped[int] = mapped_column(default=1)
+
+    # Momento del traspaso
+    archivado_en: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=text("now()"))
+
+    # Mismos nombres que OpORM para responder con el esquema OP
+    pedido: Mapped[Optional["PedidoORM"]] = relationship(viewonly=True)
+    lotes: Mapped[list["LoteArchivoORM"]] = relationship(back_populates="op_asociada")
+
+
+class LoteArchivoORM(Base):
+    __tablename__ = "lotes_archivo"
+    lote_interno_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    lote_numero_visible: Mapped[Optional[str]] = mapped_column(String(50), index=True)
+    estado: Mapped[int] = mapped_column(SmallInteger)
+    producto_id: Mapped[int] = mapped_column(ForeignKey("productos.producto_id"), index=True)
+    ruta_id: Mapped[int] = mapped_column(ForeignKey("rutas_maestras.ruta_id"), index=True)
+    op_id: Mapped[int] = mapped_column(ForeignKey("op_archivo.op_id"), index=True)
+    detalle_actual_id: Mapped[Optional[int]] = mapped_column(ForeignKey("rutas_detalle.detalle_id"))
+    puesto_actual_id: Mapped[Optional[int]] = mapped_column()
+    secuencia_actual: Mapped[Optional[int]] = mapped_column()
+    movimiento_actual: Mapped[Optional[int]] = mapped_column(SmallInteger)
+    fecha_movimiento_actual: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    version: Mapped[int] = mapped_column(default=1)
+
+    archivado_en: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=text("now()"))
+
+    # Mismos nombres que LoteORM para responder con el esquema Lote
+    producto: Mapped["ProductoORM"] = relationship(viewonly=True)
+    ruta: Mapped["RutaMaestraORM"] = relationship(viewonly=True)
+    op_asociada: Mapped["OpArchivoORM"] = relationship(back_populates="lotes")
+
+
+class LoteMovimientoArchivoORM(Base):
+    __tablename__ = "lote_movimientos_archivo"
+    movimiento_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    lote_interno_id: Mapped[int] = mapped_column(ForeignKey("lotes_archivo.lote_interno_id", ondelete="CASCADE"))
+    detalle_id: Mapped[int] = mapped_column(ForeignKey("rutas_detalle.detalle_id"))
+    puesto_id: Mapped[int] = mapped_column()
+    secuencia: Mapped[int] = mapped_column()
+    tipo: Mapped[int] = mapped_column(SmallInteger)
+    fecha_hora: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index("ix_lote_movimientos_archivo_lote_fecha", "lote_interno_id", "fecha_hora"),
+    )
+
+
+# Candidatas a archivar: OPs con todos sus lotes liberados (complemento de ix_op_pendientes)
+registrar_ddl(
+    "CREATE INDEX IF NOT EXISTS ix_op_cerradas ON op (fecha, op_id) WHERE lotes_total > 0 AND lotes_liberados = lotes_total",
+)
@@ -2,8 +2,10 @@
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import Integer, String, Date, Text, ForeignKey, text, SmallInteger
+from sqlalchemy.dialects.postgresql import ARRAY
 from typing import Optional, List
 from backend.models.base import Base # Importar la Base
+from backend.models.ddl import registrar_ddl
 #from .maestros import LoteORM
 
 # Modelo para la tabla 'numeradores'
@@ -27,6 +29,8 @@ class PuestoTrabajoORM(Base):
     puesto_trabajo_id: Mapped[int] = mapped_column(primary_key=True)
     nombre: Mapped[str] = mapped_column(String(100), unique=True)
     descripcion: Mapped[Optional[str]] = mapped_column(Text)
+    # Lotes que el puesto puede procesar en paralelo (usado por la planificación)
+    capacidad: Mapped[int] = mapped_column(SmallInteger, default=1, server_default=text("1"))
 
 # Rutas Maestras (Encabezado)
 class RutaMaestraORM(Base):
@@ -34,6 +38,15 @@ class RutaMaestraORM(Base):
     ruta_id: Mapped[int] = mapped_column(primary_key=True)
     nombre_ruta: Mapped[str] = mapped_column(String(100), unique=True)
     producto_id: Mapped[int] = mapped_column(ForeignKey("productos.producto_id"))
+
+    # Ruta compilada (ver COMPILAR_RUTAS): arreglos paralelos ordenados por secuencia,
+    # se leen en una sola fila sin cargar detalles ni puestos. Cada recompilación sube la versión.
+    version: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+    pasos_detalle_ids: Mapped[list[int]] = mapped_column(ARRAY(Integer), default=list, server_default=text("'{}'"))
+    pasos_secuencias: Mapped[list[int]] = mapped_column(ARRAY(Integer), default=list, server_default=text("'{}'"))
+    pasos_puesto_ids: Mapped[list[int]] = mapped_column(ARRAY(Integer), default=list, server_default=text("'{}'"))
+    pasos_nombres: Mapped[list[str]] = mapped_column(ARRAY(Text), default=list, server_default=text("'{}'"))
+    pasos_minutos: Mapped[list[int]] = mapped_column(ARRAY(Integer), default=list, server_default=text("'{}'"))
     
     # Relaciones
     producto: Mapped["ProductoORM"] = relationship(back_populates="rutas")
@@ -48,9 +61,11 @@ class RutaMaestraORM(Base):
 class RutaDetalleORM(Base):
     __tablename__ = "rutas_detalle"
     detalle_id: Mapped[int] = mapped_column(primary_key=True)
-    ruta_id: Mapped[int] = mapped_column(ForeignKey("rutas_maestras.ruta_id"))
-    puesto_id: Mapped[int] = mapped_column(ForeignKey("puestos_trabajo.puesto_trabajo_id"))
+    ruta_id: Mapped[int] = mapped_column(ForeignKey("rutas_maestras.ruta_id"), index=True)
+    puesto_id: Mapped[int] = mapped_column(ForeignKey("puestos_trabajo.puesto_trabajo_id"), index=True)
     secuencia: Mapped[int] = mapped_column()
+    # Tiempo estándar del paso por lote, en minutos (usado por la planificación)
+    minutos_estandar: Mapped[int] = mapped_column(default=60, server_default=text("60"))
     
     # Relaciones de vuelta
     ruta_maestra: Mapped["RutaMaestraORM"] = relationship(back_populates="detalles")
@@ -58,3 +73,58 @@ class RutaDetalleORM(Base):
 
 # CLAVE: Añadir back_populates a ProductoORM
 ProductoORM.rutas = relationship("RutaMaestraORM", back_populates="producto")
+
+# Columnas de planificación para bases ya creadas (en bases nuevas las crea create_all)
+registrar_ddl(
+    "ALTER TABLE puestos_trabajo ADD COLUMN IF NOT EXISTS capacidad SMALLINT NOT NULL DEFAULT 1",
+    "ALTER TABLE rutas_detalle ADD COLUMN IF NOT EXISTS minutos_estandar INTEGER NOT NULL DEFAULT 60",
+)
+
+# Índices de FKs para bases ya creadas (mismos nombres que index=True; ver herramientas/indices.py)
+registrar_ddl(
+    "CREATE INDEX IF NOT EXISTS ix_rutas_detalle_ruta_id ON rutas_detalle (ruta_id)",
+    "CREATE INDEX IF NOT EXISTS ix_rutas_detalle_puesto_id ON rutas_detalle (puesto_id)",
+)
+
+# --- COMPILACIÓN DE RUTAS ---
+# Reconstruye los arreglos de las rutas que cumplen la condición desde sus pasos y puestos
+# y sube la versión. Se ejecuta al escribir (alta de ruta, cambio de nombre de un puesto),
+# nunca al leer.
+COMPILAR_RUTAS = """
+    UPDATE rutas_maestras r SET
+        version = r.version + 1,
+        (pasos_detalle_ids, pasos_secuencias, pasos_puesto_ids, pasos_nombres, pasos_minutos) = (
+            SELECT coalesce(array_agg(d.detalle_id ORDER BY d.secuencia), '{{}}'),
+                   coalesce(array_agg(d.secuencia ORDER BY d.secuencia), '{{}}'),
+                   coalesce(array_agg(d.puesto_id ORDER BY d.secuencia), '{{}}'),
+                   coalesce(array_agg(p.nombre::text ORDER BY d.secuencia), '{{}}'),
+                   coalesce(array_agg(d.minutos_estandar ORDER BY d.secuencia), '{{}}')
+            FROM rutas_detalle d
+            JOIN puestos_trabajo p ON p.puesto_trabajo_id = d.puesto_id
+            WHERE d.ruta_id = r.ruta_id
+        )
+    WHERE {condicion}
+"""
+
+# Bases ya creadas: agregar las columnas y compilar todas las rutas una única vez
+registrar_ddl(
+    f"""
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'rutas_maestras' AND column_name = 'version'
+        ) THEN
+            ALTER TABLE rutas_maestras
+                ADD COLUMN version INTEGER NOT NULL DEFAULT 0,
+                ADD COLUMN pasos_detalle_ids INTEGER[] NOT NULL DEFAULT '{{}}',
+                ADD COLUMN pasos_secuencias INTEGER[] NOT NULL DEFAULT '{{}}',
+                ADD COLUMN pasos_puesto_ids INTEGER[] NOT NULL DEFAULT '{{}}',
+                ADD COLUMN pasos_nombres TEXT[] NOT NULL DEFAULT '{{}}',
+                ADD COLUMN pasos_minutos INTEGER[] NOT NULL DEFAULT '{{}}';
+            {COMPILAR_RUTAS.format(condicion="true")};
+        END IF;
+    END;
+    $$
+    """,
+)
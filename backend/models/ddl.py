@@ -0,0 +1,20 @@
+# backend/models/ddl.py
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+# --- DDL COMPLEMENTARIO ---
+# create_all solo crea tablas que no existen: no agrega columnas a tablas ya creadas
+# ni instala funciones o triggers. Cada módulo de modelos registra aquí esas sentencias.
+# TODAS deben ser idempotentes (IF NOT EXISTS / CREATE OR REPLACE), porque se ejecutan
+# en cada arranque, después de create_all y en el orden en que se registran.
+_SENTENCIAS: list[str] = []
+
+def registrar_ddl(*sentencias: str) -> None:
+    """Registra sentencias DDL idempotentes para ejecutar al iniciar la aplicación."""
+    _SENTENCIAS.extend(sentencias)
+
+async def aplicar_ddl(conn: AsyncConnection) -> None:
+    """Ejecuta todas las sentencias registradas (una por execute: asyncpg no admite varias)."""
+    for sentencia in _SENTENCIAS:
+        await conn.execute(text(sentencia))
@@ -0,0 +1,69 @@
+# backend/models/eventos.py
+
+from backend.models.ddl import registrar_ddl
+
+# --- NOTIFICACIÓN DE CAMBIOS (LISTEN/NOTIFY) ---
+# Cada escritura en lotes, op, pedidos, clientes y rutas publica un evento compacto en el canal
+# 'federici_cambios' (ver core/eventos.py). Además del stream SSE, lo usa la cache de respuestas.
+# El NOTIFY se entrega al confirmar la transacción, por lo que los clientes nunca ven cambios
+# revertidos.
+# Formato: {"t": tabla, "a": I/U/D, "id": pk, ...claves para filtrar}
+registrar_ddl(
+    """
+    CREATE OR REPLACE FUNCTION fn_notificar_cambio() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        fila RECORD;
+        evento jsonb;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            fila := OLD;
+        ELSE
+            fila := NEW;
+        END IF;
+
+        IF TG_TABLE_NAME = 'lotes' THEN
+            evento := jsonb_build_object(
+                't', 'lote', 'id', fila.lote_interno_id, 'op', fila.op_id,
+                'estado', fila.estado, 'puesto', fila.puesto_actual_id
+            );
+            IF TG_OP = 'UPDATE' AND OLD.puesto_actual_id IS DISTINCT FROM NEW.puesto_actual_id THEN
+                evento := evento || jsonb_build_object('puesto_ant', OLD.puesto_actual_id);
+            END IF;
+        ELSIF TG_TABLE_NAME = 'op' THEN
+            evento := jsonb_build_object('t', 'op', 'id', fila.op_id, 'op', fila.op_id, 'pedido', fila.pedido_id);
+        ELSIF TG_TABLE_NAME = 'pedidos' THEN
+            evento := jsonb_build_object('t', 'pedido', 'id', fila.pedido_id, 'cliente', fila.cliente_id);
+        ELSIF TG_TABLE_NAME = 'clientes' THEN
+            evento := jsonb_build_object('t', 'cliente', 'id', fila.cliente_id);
+        ELSE
+            evento := jsonb_build_object('t', 'ruta', 'id', fila.ruta_id);
+        END IF;
+
+        PERFORM pg_notify('federici_cambios', (evento || jsonb_build_object('a', left(TG_OP, 1)))::text);
+        RETURN NULL;
+    END;
+    $$
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_notificar_lotes AFTER INSERT OR UPDATE OR DELETE ON lotes
+    FOR EACH ROW EXECUTE FUNCTION fn_notificar_cambio()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_notificar_op AFTER INSERT OR UPDATE OR DELETE ON op
+    FOR EACH ROW EXECUTE FUNCTION fn_notificar_cambio()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_notificar_pedidos AFTER INSERT OR UPDATE OR DELETE ON pedidos
+    FOR EACH ROW EXECUTE FUNCTION fn_notificar_cambio()
+    """,
+    # Clientes y rutas solo se notifican al cambiar o borrarse (un alta no deja nada viejo en cache)
+    """
+    CREATE OR REPLACE TRIGGER tg_notificar_clientes AFTER UPDATE OR DELETE ON clientes
+    FOR EACH ROW EXECUTE FUNCTION fn_notificar_cambio()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_notificar_rutas AFTER UPDATE OR DELETE ON rutas_maestras
+    FOR EACH ROW EXECUTE FUNCTION fn_notificar_cambio()
+    """,
+)
@@ -0,0 +1,215 @@
+# backend/models/grilla.py
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Index, SmallInteger, String
+from typing import Optional
+
+from backend.models.base import Base # Importar la Base
+from backend.models.ddl import registrar_ddl
+
+# =================================================================
+# GRILLA DE LOTES (MODELO DE LECTURA DESNORMALIZADO)
+# =================================================================
+
+# Una fila plana por lote con todo lo que muestra la grilla de planta (GET /lotes/grid):
+# se lee con un único recorrido de índice, sin el joinedload de lote -> OP -> pedido -> cliente
+# ni el de producto y ruta. La mantienen los triggers de abajo en la misma transacción que la
+# escritura. La posición del lote (puesto actual) no va acá: cada escaneo de planta
+# actualizaría la grilla.
+class LoteGrillaORM(Base):
+    __tablename__ = "lotes_grilla"
+    lote_interno_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    lote_numero_visible: Mapped[Optional[str]] = mapped_column(String(50))
+    estado: Mapped[int] = mapped_column(SmallInteger)
+    op_id: Mapped[int] = mapped_column()
+    numero_op_externo: Mapped[str] = mapped_column(String(50))
+    pedido_id: Mapped[Optional[int]] = mapped_column()
+    numero_pedido_externo: Mapped[Optional[str]] = mapped_column(String(50))
+    cliente_id: Mapped[Optional[int]] = mapped_column()
+    cliente_nombre: Mapped[Optional[str]] = mapped_column(String(255))
+    producto_id: Mapped[int] = mapped_column()
+    producto_nombre: Mapped[str] = mapped_column(String(100))
+    ruta_id: Mapped[int] = mapped_column()
+    ruta_nombre: Mapped[str] = mapped_column(String(100))
+
+    # Filtros de la grilla, cada uno ya ordenado por lote (keyset sin ordenar en memoria).
+    # op_id, pedido_id y cliente_id también los usan los triggers al renombrar; productos y
+    # rutas se renombran poco y no justifican un índice más en cada alta de lote.
+    __table_args__ = (
+        Index("ix_lotes_grilla_estado_lote", "estado", "lote_interno_id"),
+        Index("ix_lotes_grilla_op_lote", "op_id", "lote_interno_id"),
+        Index("ix_lotes_grilla_cliente_lote", "cliente_id", "lote_interno_id"),
+        Index("ix_lotes_grilla_pedido", "pedido_id"),
+    )
+
+
+# Proyección de un conjunto de lotes ({origen}: 'lotes' o una tabla de transición)
+PROYECCION_GRILLA = """
+    SELECT l.lote_interno_id, l.lote_numero_visible, l.estado,
+           l.op_id, o.numero_op_externo, o.pedido_id, p.numero_pedido_externo,
+           p.cliente_id, c.nombre, l.producto_id, pr.nombre, l.ruta_id, r.nombre_ruta
+    FROM {origen} l
+    JOIN op o ON o.op_id = l.op_id
+    LEFT JOIN pedidos p ON p.pedido_id = o.pedido_id
+    LEFT JOIN clientes c ON c.cliente_id = p.cliente_id
+    JOIN productos pr ON pr.producto_id = l.producto_id
+    JOIN rutas_maestras r ON r.ruta_id = l.ruta_id
+"""
+
+COLUMNAS_GRILLA = """
+    lote_interno_id, lote_numero_visible, estado, op_id, numero_op_externo, pedido_id,
+    numero_pedido_externo, cliente_id, cliente_nombre, producto_id, producto_nombre, ruta_id, ruta_nombre
+"""
+
+# Lotes actualizados que cambiaron algún campo de la grilla (los movimientos de planta no)
+LOTES_CAMBIADOS = """(
+    SELECT n.* FROM nuevos n JOIN viejos v ON v.lote_interno_id = n.lote_interno_id
+    WHERE (v.lote_numero_visible, v.estado, v.op_id, v.producto_id, v.ruta_id)
+          IS DISTINCT FROM (n.lote_numero_visible, n.estado, n.op_id, n.producto_id, n.ruta_id)
+)"""
+
+# Padres de un conjunto de lotes, bloqueados antes de copiar sus datos. Sin esto, en READ
+# COMMITTED un alta de lote (que solo toma KEY SHARE por la FK) puede leer la OP, el pedido o
+# el cliente mientras otra transacción los renombra: el trigger de maestros de esa otra
+# transacción no ve el lote nuevo (todavía no confirmado) y la fila copiada quedaría vieja.
+# Cada sentencia espera a que confirme quien modifica al padre y lee con una foto nueva.
+# La OP se toma FOR NO KEY UPDATE (el lock que igual toma el trigger de contadores, así dos
+# altas concurrentes en la misma OP no se bloquean mutuamente) y siempre en orden de id.
+BLOQUEAR_PADRES = """
+    PERFORM 1 FROM op WHERE op_id IN (SELECT op_id FROM {origen} l)
+    ORDER BY op_id FOR NO KEY UPDATE;
+    PERFORM 1 FROM pedidos WHERE pedido_id IN (
+        SELECT o.pedido_id FROM op o JOIN {origen} l ON l.op_id = o.op_id
+    ) ORDER BY pedido_id FOR SHARE;
+    PERFORM 1 FROM clientes WHERE cliente_id IN (
+        SELECT p.cliente_id FROM pedidos p JOIN op o ON o.pedido_id = p.pedido_id JOIN {origen} l ON l.op_id = o.op_id
+    ) ORDER BY cliente_id FOR SHARE;
+    PERFORM 1 FROM productos WHERE producto_id IN (SELECT producto_id FROM {origen} l)
+    ORDER BY producto_id FOR SHARE;
+    PERFORM 1 FROM rutas_maestras WHERE ruta_id IN (SELECT ruta_id FROM {origen} l)
+    ORDER BY ruta_id FOR SHARE;
+"""
+
+# Lotes: trigger POR SENTENCIA con tablas de transición, como los contadores (un cambio masivo
+# o una importación tocan la grilla una sola vez). En UPDATE solo se reescriben los lotes que
+# cambiaron algún campo de la grilla: los movimientos de planta no la tocan.
+# Maestros: triggers por fila con WHEN, para que los UPDATE que no cambian lo que muestra la
+# grilla (contadores de la OP, compilación de rutas) no entren a plpgsql.
+registrar_ddl(
+    f"""
+    CREATE OR REPLACE FUNCTION fn_lotes_grilla() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            {BLOQUEAR_PADRES.format(origen="nuevos")}
+            INSERT INTO lotes_grilla ({COLUMNAS_GRILLA})
+            {PROYECCION_GRILLA.format(origen="nuevos")};
+        ELSIF TG_OP = 'DELETE' THEN
+            DELETE FROM lotes_grilla g USING viejos v WHERE g.lote_interno_id = v.lote_interno_id;
+        ELSIF EXISTS (SELECT 1 FROM {LOTES_CAMBIADOS} l) THEN
+            {BLOQUEAR_PADRES.format(origen=LOTES_CAMBIADOS)}
+            INSERT INTO lotes_grilla AS g ({COLUMNAS_GRILLA})
+            {PROYECCION_GRILLA.format(origen=LOTES_CAMBIADOS)}
+            ON CONFLICT (lote_interno_id) DO UPDATE SET
+                lote_numero_visible = EXCLUDED.lote_numero_visible,
+                estado = EXCLUDED.estado,
+                op_id = EXCLUDED.op_id,
+                numero_op_externo = EXCLUDED.numero_op_externo,
+                pedido_id = EXCLUDED.pedido_id,
+                numero_pedido_externo = EXCLUDED.numero_pedido_externo,
+                cliente_id = EXCLUDED.cliente_id,
+                cliente_nombre = EXCLUDED.cliente_nombre,
+                producto_id = EXCLUDED.producto_id,
+                producto_nombre = EXCLUDED.producto_nombre,
+                ruta_id = EXCLUDED.ruta_id,
+                ruta_nombre = EXCLUDED.ruta_nombre;
+        END IF;
+        RETURN NULL;
+    END;
+    $$
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_lotes_grilla_ins AFTER INSERT ON lotes
+    REFERENCING NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_lotes_grilla()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_lotes_grilla_upd AFTER UPDATE ON lotes
+    REFERENCING OLD TABLE AS viejos NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_lotes_grilla()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_lotes_grilla_del AFTER DELETE ON lotes
+    REFERENCING OLD TABLE AS viejos
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_lotes_grilla()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION fn_lotes_grilla_maestros() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_TABLE_NAME = 'op' THEN
+            UPDATE lotes_grilla g SET
+                numero_op_externo = NEW.numero_op_externo,
+                pedido_id = NEW.pedido_id,
+                (numero_pedido_externo, cliente_id, cliente_nombre) = (
+                    SELECT p.numero_pedido_externo, p.cliente_id, c.nombre
+                    FROM pedidos p JOIN clientes c ON c.cliente_id = p.cliente_id
+                    WHERE p.pedido_id = NEW.pedido_id
+                )
+            WHERE g.op_id = NEW.op_id;
+        ELSIF TG_TABLE_NAME = 'pedidos' THEN
+            UPDATE lotes_grilla g SET
+                numero_pedido_externo = NEW.numero_pedido_externo,
+                cliente_id = NEW.cliente_id,
+                cliente_nombre = (SELECT c.nombre FROM clientes c WHERE c.cliente_id = NEW.cliente_id)
+            WHERE g.pedido_id = NEW.pedido_id;
+        ELSIF TG_TABLE_NAME = 'clientes' THEN
+            UPDATE lotes_grilla SET cliente_nombre = NEW.nombre WHERE cliente_id = NEW.cliente_id;
+        ELSIF TG_TABLE_NAME = 'productos' THEN
+            UPDATE lotes_grilla SET producto_nombre = NEW.nombre WHERE producto_id = NEW.producto_id;
+        ELSIF TG_TABLE_NAME = 'rutas_maestras' THEN
+            UPDATE lotes_grilla SET ruta_nombre = NEW.nombre_ruta WHERE ruta_id = NEW.ruta_id;
+        END IF;
+        RETURN NULL;
+    END;
+    $$
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_lotes_grilla_op AFTER UPDATE ON op
+    FOR EACH ROW
+    WHEN ((OLD.numero_op_externo, OLD.pedido_id) IS DISTINCT FROM (NEW.numero_op_externo, NEW.pedido_id))
+    EXECUTE FUNCTION fn_lotes_grilla_maestros()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_lotes_grilla_pedidos AFTER UPDATE ON pedidos
+    FOR EACH ROW
+    WHEN ((OLD.numero_pedido_externo, OLD.cliente_id) IS DISTINCT FROM (NEW.numero_pedido_externo, NEW.cliente_id))
+    EXECUTE FUNCTION fn_lotes_grilla_maestros()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_lotes_grilla_clientes AFTER UPDATE ON clientes
+    FOR EACH ROW WHEN (OLD.nombre IS DISTINCT FROM NEW.nombre)
+    EXECUTE FUNCTION fn_lotes_grilla_maestros()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_lotes_grilla_productos AFTER UPDATE ON productos
+    FOR EACH ROW WHEN (OLD.nombre IS DISTINCT FROM NEW.nombre)
+    EXECUTE FUNCTION fn_lotes_grilla_maestros()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_lotes_grilla_rutas AFTER UPDATE ON rutas_maestras
+    FOR EACH ROW WHEN (OLD.nombre_ruta IS DISTINCT FROM NEW.nombre_ruta)
+    EXECUTE FUNCTION fn_lotes_grilla_maestros()
+    """,
+    # Bases ya creadas: cargar la grilla una única vez (después la mantienen los triggers)
+    f"""
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM lotes_grilla) AND EXISTS (SELECT 1 FROM lotes) THEN
+            INSERT INTO lotes_grilla ({COLUMNAS_GRILLA})
+            {PROYECCION_GRILLA.format(origen="lotes")};
+        END IF;
+    END;
+    $$
+    """,
+)
@@ -1,11 +1,12 @@
 # backend/models/maestros.py
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, Date, Text, ForeignKey, text, SmallInteger
+from sqlalchemy import Integer, String, Date, DateTime, Text, ForeignKey, text, SmallInteger
 from typing import Optional
-from datetime import date
+from datetime import date, datetime
 
 from backend.models.base import Base # Importar la Base
+from backend.models.ddl import registrar_ddl
 from backend.models.auxiliares import ProductoORM # Importar modelos auxiliares
 from .auxiliares import RutaMaestraORM
 # Modelo para la tabla 'clientes'
@@ -24,10 +25,12 @@ class PedidoORM(Base):
     pedido_id: Mapped[int] = mapped_column(primary_key=True)
     numero_pedido_externo: Mapped[str] = mapped_column(String(50), unique=True)
     fecha: Mapped[date] = mapped_column(Date, server_default=text("CURRENT_DATE"))
-    cliente_id: Mapped[int] = mapped_column(ForeignKey("clientes.cliente_id"))
+    cliente_id: Mapped[int] = mapped_column(ForeignKey("clientes.cliente_id"), index=True)
     fecha_entrega_estimada: Mapped[Optional[date]] = mapped_column(Date)
     detalle: Mapped[Optional[str]] = mapped_column(Text)
     observaciones: Mapped[Optional[str]] = mapped_column(Text)
+    # Versión para concurrencia optimista (ETag / If-Match, ver core/versiones.py)
+    version: Mapped[int] = mapped_column(default=1, server_default=text("1"))
     
     # Relación
     cliente: Mapped["ClienteORM"] = relationship(back_populates="pedidos")
@@ -39,10 +42,18 @@ class OpORM(Base):
     op_id: Mapped[int] = mapped_column(primary_key=True)
     numero_op_externo: Mapped[str] = mapped_column(String(50), unique=True)
     fecha: Mapped[date] = mapped_column(Date, server_default=text("CURRENT_DATE"))
-    pedido_id: Mapped[Optional[int]] = mapped_column(ForeignKey("pedidos.pedido_id"))
+    pedido_id: Mapped[Optional[int]] = mapped_column(ForeignKey("pedidos.pedido_id"), index=True)
     fecha_estimada_entrega: Mapped[Optional[date]] = mapped_column(Date)
     detalle: Mapped[Optional[str]] = mapped_column(Text)
     observaciones: Mapped[Optional[str]] = mapped_column(Text)
+
+    # Contadores de progreso por estado de sus lotes (mantenidos por triggers, ver abajo)
+    lotes_total: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+    lotes_en_espera: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+    lotes_en_proceso: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+    lotes_liberados: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+    # Versión para concurrencia optimista (no cambia con los contadores, solo con los campos editables)
+    version: Mapped[int] = mapped_column(default=1, server_default=text("1"))
     
     # Relación
     pedido: Mapped[Optional["PedidoORM"]] = relationship(back_populates="ops")
@@ -69,7 +80,198 @@ class LoteORM(Base):
     # OP asociada (siempre se carga el lote con la OP)
     op_id: Mapped[int] = mapped_column(ForeignKey("op.op_id"), index=True) 
 
+    # Posición actual en la ruta (materializada desde lote_movimientos, ver core/movimientos.py)
+    detalle_actual_id: Mapped[Optional[int]] = mapped_column(ForeignKey("rutas_detalle.detalle_id"))
+    puesto_actual_id: Mapped[Optional[int]] = mapped_column()
+    secuencia_actual: Mapped[Optional[int]] = mapped_column()
+    movimiento_actual: Mapped[Optional[int]] = mapped_column(SmallInteger)
+    fecha_movimiento_actual: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+
+    # Versión para concurrencia optimista (no cambia con la posición, solo con los campos editables)
+    version: Mapped[int] = mapped_column(default=1, server_default=text("1"))
+
     # Relaciones ORM
     producto: Mapped["ProductoORM"] = relationship(back_populates="lotes")
     ruta: Mapped["RutaMaestraORM"] = relationship(back_populates="lotes_asociados")
-    op_asociada: Mapped["OpORM"] = relationship(back_populates="lotes")
\ No newline at end of file
+    op_asociada: Mapped["OpORM"] = relationship(back_populates="lotes")
+
+
+# Índices de FKs para bases ya creadas (mismos nombres que index=True; ver herramientas/indices.py).
+# Con tablas grandes conviene crearlos antes a mano con CREATE INDEX CONCURRENTLY.
+registrar_ddl(
+    "CREATE INDEX IF NOT EXISTS ix_pedidos_cliente_id ON pedidos (cliente_id)",
+    "CREATE INDEX IF NOT EXISTS ix_op_pedido_id ON op (pedido_id)",
+)
+
+
+# --- CONTADORES DE PROGRESO DE LA OP ---
+# Un trigger POR SENTENCIA sobre lotes ajusta los contadores de cada OP afectada una sola vez,
+# cubriendo tanto las altas/cambios individuales como los masivos. Las filas de 'op' se
+# bloquean en orden de op_id para que dos cambios masivos concurrentes no se bloqueen mutuamente.
+registrar_ddl(
+    # Bases ya creadas: agregar columnas y calcular los contadores una única vez
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'op' AND column_name = 'lotes_total'
+        ) THEN
+            ALTER TABLE op
+                ADD COLUMN lotes_total INTEGER NOT NULL DEFAULT 0,
+                ADD COLUMN lotes_en_espera INTEGER NOT NULL DEFAULT 0,
+                ADD COLUMN lotes_en_proceso INTEGER NOT NULL DEFAULT 0,
+                ADD COLUMN lotes_liberados INTEGER NOT NULL DEFAULT 0;
+            UPDATE op o SET
+                lotes_total = c.total,
+                lotes_en_espera = c.en_espera,
+                lotes_en_proceso = c.en_proceso,
+                lotes_liberados = c.liberados
+            FROM (
+                SELECT op_id,
+                       count(*) AS total,
+                       count(*) FILTER (WHERE estado = 1) AS en_espera,
+                       count(*) FILTER (WHERE estado = 2) AS en_proceso,
+                       count(*) FILTER (WHERE estado = 3) AS liberados
+                FROM lotes
+                GROUP BY op_id
+            ) c
+            WHERE o.op_id = c.op_id;
+        END IF;
+    END;
+    $$
+    """,
+    # Índice parcial para "OPs con lotes pendientes"
+    "CREATE INDEX IF NOT EXISTS ix_op_pendientes ON op (op_id) WHERE lotes_liberados < lotes_total",
+    """
+    CREATE OR REPLACE FUNCTION fn_op_progreso_lotes() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            WITH deltas AS (
+                SELECT op_id, count(*) AS total,
+                       count(*) FILTER (WHERE estado = 1) AS en_espera,
+                       count(*) FILTER (WHERE estado = 2) AS en_proceso,
+                       count(*) FILTER (WHERE estado = 3) AS liberados
+                FROM nuevos GROUP BY op_id
+            ),
+            bloqueo AS (
+                SELECT o.op_id FROM op o JOIN deltas d ON d.op_id = o.op_id
+                ORDER BY o.op_id FOR UPDATE OF o
+            )
+            UPDATE op o SET
+                lotes_total = o.lotes_total + d.total,
+                lotes_en_espera = o.lotes_en_espera + d.en_espera,
+                lotes_en_proceso = o.lotes_en_proceso + d.en_proceso,
+                lotes_liberados = o.lotes_liberados + d.liberados
+            FROM deltas d JOIN bloqueo b ON b.op_id = d.op_id
+            WHERE o.op_id = d.op_id;
+        ELSIF TG_OP = 'DELETE' THEN
+            WITH deltas AS (
+                SELECT op_id, count(*) AS total,
+                       count(*) FILTER (WHERE estado = 1) AS en_espera,
+                       count(*) FILTER (WHERE estado = 2) AS en_proceso,
+                       count(*) FILTER (WHERE estado = 3) AS liberados
+                FROM viejos GROUP BY op_id
+            ),
+            bloqueo AS (
+                SELECT o.op_id FROM op o JOIN deltas d ON d.op_id = o.op_id
+                ORDER BY o.op_id FOR UPDATE OF o
+            )
+            UPDATE op o SET
+                lotes_total = o.lotes_total - d.total,
+                lotes_en_espera = o.lotes_en_espera - d.en_espera,
+                lotes_en_proceso = o.lotes_en_proceso - d.en_proceso,
+                lotes_liberados = o.lotes_liberados - d.liberados
+            FROM deltas d JOIN bloqueo b ON b.op_id = d.op_id
+            WHERE o.op_id = d.op_id;
+        ELSE
+            WITH deltas AS (
+                SELECT op_id, sum(total) AS total, sum(en_espera) AS en_espera,
+                       sum(en_proceso) AS en_proceso, sum(liberados) AS liberados
+                FROM (
+                    SELECT op_id, 1 AS total, (estado = 1)::int AS en_espera,
+                           (estado = 2)::int AS en_proceso, (estado = 3)::int AS liberados
+                    FROM nuevos
+                    UNION ALL
+                    SELECT op_id, -1, -(estado = 1)::int, -(estado = 2)::int, -(estado = 3)::int
+                    FROM viejos
+                ) cambios
+                GROUP BY op_id
+                HAVING sum(total) <> 0 OR sum(en_espera) <> 0 OR sum(en_proceso) <> 0 OR sum(liberados) <> 0
+            ),
+            bloqueo AS (
+                SELECT o.op_id FROM op o JOIN deltas d ON d.op_id = o.op_id
+                ORDER BY o.op_id FOR UPDATE OF o
+            )
+            UPDATE op o SET
+                lotes_total = o.lotes_total + d.total,
+                lotes_en_espera = o.lotes_en_espera + d.en_espera,
+                lotes_en_proceso = o.lotes_en_proceso + d.en_proceso,
+                lotes_liberados = o.lotes_liberados + d.liberados
+            FROM deltas d JOIN bloqueo b ON b.op_id = d.op_id
+            WHERE o.op_id = d.op_id;
+        END IF;
+        RETURN NULL;
+    END;
+    $$
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_op_progreso_lotes_ins AFTER INSERT ON lotes
+    REFERENCING NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_op_progreso_lotes()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_op_progreso_lotes_upd AFTER UPDATE ON lotes
+    REFERENCING OLD TABLE AS viejos NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_op_progreso_lotes()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_op_progreso_lotes_del AFTER DELETE ON lotes
+    REFERENCING OLD TABLE AS viejos
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_op_progreso_lotes()
+    """,
+)
+
+
+# --- VERSIONES (CONCURRENCIA OPTIMISTA) ---
+# Un trigger por fila incrementa 'version' solo cuando cambia algún campo editable, venga el
+# cambio de un PUT, de una importación o de un cambio de estado masivo. Los contadores de la
+# OP y la posición del lote los mantienen otros triggers y no invalidan la ETag.
+# ADD COLUMN con DEFAULT constante no reescribe la tabla.
+registrar_ddl(
+    "ALTER TABLE pedidos ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    "ALTER TABLE op ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    "ALTER TABLE lotes ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    """
+    CREATE OR REPLACE FUNCTION fn_incrementar_version() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW.version := OLD.version + 1;
+        RETURN NEW;
+    END;
+    $$
+    """,
+    # El WHEN se evalúa sin entrar a plpgsql: las filas sin cambios editables no pagan la función
+    """
+    CREATE OR REPLACE TRIGGER tg_version_pedidos BEFORE UPDATE ON pedidos
+    FOR EACH ROW
+    WHEN ((OLD.cliente_id, OLD.fecha_entrega_estimada, OLD.detalle, OLD.observaciones)
+          IS DISTINCT FROM (NEW.cliente_id, NEW.fecha_entrega_estimada, NEW.detalle, NEW.observaciones))
+    EXECUTE FUNCTION fn_incrementar_version()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_version_op BEFORE UPDATE ON op
+    FOR EACH ROW
+    WHEN ((OLD.pedido_id, OLD.fecha_estimada_entrega, OLD.detalle, OLD.observaciones)
+          IS DISTINCT FROM (NEW.pedido_id, NEW.fecha_estimada_entrega, NEW.detalle, NEW.observaciones))
+    EXECUTE FUNCTION fn_incrementar_version()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_version_lotes BEFORE UPDATE ON lotes
+    FOR EACH ROW
+    WHEN ((OLD.lote_numero_visible, OLD.estado, OLD.producto_id, OLD.ruta_id, OLD.op_id)
+          IS DISTINCT FROM (NEW.lote_numero_visible, NEW.estado, NEW.producto_id, NEW.ruta_id, NEW.op_id))
+    EXECUTE FUNCTION fn_incrementar_version()
+    """,
+)
@@ -0,0 +1,169 @@
+# backend/models/movimientos.py
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import BigInteger, Date, DateTime, ForeignKey, Index, SmallInteger, text
+from datetime import date, datetime
+
+from backend.models.base import Base # Importar la Base
+from backend.models.ddl import registrar_ddl
+
+# Movimiento de un lote por los pasos de su ruta (tabla de solo inserción, alto volumen)
+class LoteMovimientoORM(Base):
+    __tablename__ = "lote_movimientos"
+    movimiento_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    lote_interno_id: Mapped[int] = mapped_column(ForeignKey("lotes.lote_interno_id", ondelete="CASCADE"))
+    detalle_id: Mapped[int] = mapped_column(ForeignKey("rutas_detalle.detalle_id"))
+
+    # Desnormalizados desde rutas_detalle al registrar el evento
+    puesto_id: Mapped[int] = mapped_column()
+    secuencia: Mapped[int] = mapped_column()
+
+    # Tipo de evento (1=ingreso al puesto, 2=inicio, 3=fin)
+    tipo: Mapped[int] = mapped_column(SmallInteger)
+    fecha_hora: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=text("now()"))
+
+    # Único índice secundario: historial de un lote en orden cronológico
+    __table_args__ = (
+        Index("ix_lote_movimientos_lote_fecha", "lote_interno_id", "fecha_hora"),
+    )
+
+# Posición materializada en 'lotes' para bases ya creadas (en bases nuevas las crea create_all)
+registrar_ddl(
+    "ALTER TABLE lotes ADD COLUMN IF NOT EXISTS detalle_actual_id INTEGER REFERENCES rutas_detalle (detalle_id)",
+    "ALTER TABLE lotes ADD COLUMN IF NOT EXISTS puesto_actual_id INTEGER",
+    "ALTER TABLE lotes ADD COLUMN IF NOT EXISTS secuencia_actual INTEGER",
+    "ALTER TABLE lotes ADD COLUMN IF NOT EXISTS movimiento_actual SMALLINT",
+    "ALTER TABLE lotes ADD COLUMN IF NOT EXISTS fecha_movimiento_actual TIMESTAMP WITH TIME ZONE",
+)
+
+# =================================================================
+# CONTADORES DE COLA POR PUESTO (WIP)
+# =================================================================
+
+# Lotes en cola y en proceso por puesto, según la posición materializada del lote:
+# último movimiento INGRESO = en espera, INICIO = en proceso (FIN ya no ocupa el puesto).
+class PuestoColaORM(Base):
+    __tablename__ = "puestos_cola"
+    puesto_id: Mapped[int] = mapped_column(ForeignKey("puestos_trabajo.puesto_trabajo_id", ondelete="CASCADE"), primary_key=True)
+    en_espera: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+    en_proceso: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+
+# Lotes terminados (movimientos FIN) por puesto y día
+class PuestoProduccionDiariaORM(Base):
+    __tablename__ = "puestos_produccion_diaria"
+    puesto_id: Mapped[int] = mapped_column(ForeignKey("puestos_trabajo.puesto_trabajo_id", ondelete="CASCADE"), primary_key=True)
+    fecha: Mapped[date] = mapped_column(Date, primary_key=True)
+    terminados: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+
+# Los contadores se mantienen con triggers POR SENTENCIA con tablas de transición:
+# un UPDATE masivo de lotes o un lote de eventos de escaneo ajusta cada contador una sola vez.
+registrar_ddl(
+    """
+    CREATE OR REPLACE FUNCTION fn_puestos_cola_lotes() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO puestos_cola AS c (puesto_id, en_espera, en_proceso)
+            SELECT puesto_actual_id,
+                   count(*) FILTER (WHERE movimiento_actual = 1),
+                   count(*) FILTER (WHERE movimiento_actual = 2)
+            FROM nuevos
+            WHERE puesto_actual_id IS NOT NULL AND movimiento_actual IN (1, 2)
+            GROUP BY puesto_actual_id
+            ON CONFLICT (puesto_id) DO UPDATE SET
+                en_espera = c.en_espera + EXCLUDED.en_espera,
+                en_proceso = c.en_proceso + EXCLUDED.en_proceso;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE puestos_cola c SET
+                en_espera = c.en_espera - d.en_espera,
+                en_proceso = c.en_proceso - d.en_proceso
+            FROM (
+                SELECT puesto_actual_id AS puesto_id,
+                       count(*) FILTER (WHERE movimiento_actual = 1) AS en_espera,
+                       count(*) FILTER (WHERE movimiento_actual = 2) AS en_proceso
+                FROM viejos
+                WHERE puesto_actual_id IS NOT NULL AND movimiento_actual IN (1, 2)
+                GROUP BY puesto_actual_id
+            ) d
+            WHERE c.puesto_id = d.puesto_id;
+        ELSE
+            INSERT INTO puestos_cola AS c (puesto_id, en_espera, en_proceso)
+            SELECT puesto_id, sum(espera), sum(proceso)
+            FROM (
+                SELECT puesto_actual_id AS puesto_id,
+                       (movimiento_actual = 1)::int AS espera,
+                       (movimiento_actual = 2)::int AS proceso
+                FROM nuevos
+                WHERE puesto_actual_id IS NOT NULL AND movimiento_actual IN (1, 2)
+                UNION ALL
+                SELECT puesto_actual_id,
+                       -(movimiento_actual = 1)::int,
+                       -(movimiento_actual = 2)::int
+                FROM viejos
+                WHERE puesto_actual_id IS NOT NULL AND movimiento_actual IN (1, 2)
+            ) deltas
+            GROUP BY puesto_id
+            HAVING sum(espera) <> 0 OR sum(proceso) <> 0
+            ON CONFLICT (puesto_id) DO UPDATE SET
+                en_espera = c.en_espera + EXCLUDED.en_espera,
+                en_proceso = c.en_proceso + EXCLUDED.en_proceso;
+        END IF;
+        RETURN NULL;
+    END;
+    $$
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_puestos_cola_lotes_ins AFTER INSERT ON lotes
+    REFERENCING NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_puestos_cola_lotes()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_puestos_cola_lotes_upd AFTER UPDATE ON lotes
+    REFERENCING OLD TABLE AS viejos NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_puestos_cola_lotes()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_puestos_cola_lotes_del AFTER DELETE ON lotes
+    REFERENCING OLD TABLE AS viejos
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_puestos_cola_lotes()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION fn_puestos_produccion_diaria() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO puestos_produccion_diaria AS p (puesto_id, fecha, terminados)
+        SELECT puesto_id, fecha_hora::date, count(*)
+        FROM nuevos
+        WHERE tipo = 3
+        GROUP BY puesto_id, fecha_hora::date
+        ON CONFLICT (puesto_id, fecha) DO UPDATE SET
+            terminados = p.terminados + EXCLUDED.terminados;
+        RETURN NULL;
+    END;
+    $$
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tg_puestos_produccion_diaria AFTER INSERT ON lote_movimientos
+    REFERENCING NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_puestos_produccion_diaria()
+    """,
+    # Carga inicial en bases con datos previos (solo si los contadores están vacíos)
+    """
+    INSERT INTO puestos_cola (puesto_id, en_espera, en_proceso)
+    SELECT puesto_actual_id,
+           count(*) FILTER (WHERE movimiento_actual = 1),
+           count(*) FILTER (WHERE movimiento_actual = 2)
+    FROM lotes
+    WHERE puesto_actual_id IS NOT NULL AND movimiento_actual IN (1, 2)
+      AND NOT EXISTS (SELECT 1 FROM puestos_cola)
+    GROUP BY puesto_actual_id
+    """,
+    """
+    INSERT INTO puestos_produccion_diaria (puesto_id, fecha, terminados)
+    SELECT puesto_id, fecha_hora::date, count(*)
+    FROM lote_movimientos
+    WHERE tipo = 3 AND fecha_hora >= current_date
+      AND NOT EXISTS (SELECT 1 FROM puestos_produccion_diaria)
+    GROUP BY puesto_id, fecha_hora::date
+    """,
+)
@@ -0,0 +1,54 @@
+# backend/models/planificacion.py
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Date, DateTime, ForeignKey, Index, text
+from typing import Optional
+from datetime import date, datetime
+
+from backend.models.base import Base # Importar la Base
+
+# Corrida de planificación: cada ejecución guarda un plan completo e inmutable.
+# Las lecturas usan siempre la última corrida (o una indicada), sin recalcular.
+class PlanificacionCorridaORM(Base):
+    __tablename__ = "planificacion_corridas"
+    corrida_id: Mapped[int] = mapped_column(primary_key=True)
+    fecha_hora: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=text("now()"))
+    # Instante desde el que se planifica (t = 0 del plan)
+    inicio: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    fin_estimado: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    lotes: Mapped[int] = mapped_column(default=0)
+    operaciones: Mapped[int] = mapped_column(default=0)
+    lotes_atrasados: Mapped[int] = mapped_column(default=0)
+    duracion_ms: Mapped[int] = mapped_column(default=0)
+
+# Resumen por lote dentro de una corrida (orden de despacho, fin estimado y atraso)
+class PlanificacionLoteORM(Base):
+    __tablename__ = "planificacion_lotes"
+    corrida_id: Mapped[int] = mapped_column(ForeignKey("planificacion_corridas.corrida_id", ondelete="CASCADE"), primary_key=True)
+    lote_interno_id: Mapped[int] = mapped_column(primary_key=True)
+    op_id: Mapped[int] = mapped_column()
+    orden: Mapped[int] = mapped_column()
+    inicio: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    fin: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    fecha_compromiso: Mapped[Optional[date]] = mapped_column(Date)
+    atraso_minutos: Mapped[int] = mapped_column(default=0)
+
+    __table_args__ = (
+        Index("ix_planificacion_lotes_corrida_orden", "corrida_id", "orden"),
+    )
+
+# Operación planificada: un paso de la ruta de un lote en un puesto
+class PlanificacionOperacionORM(Base):
+    __tablename__ = "planificacion_operaciones"
+    corrida_id: Mapped[int] = mapped_column(ForeignKey("planificacion_corridas.corrida_id", ondelete="CASCADE"), primary_key=True)
+    lote_interno_id: Mapped[int] = mapped_column(primary_key=True)
+    secuencia: Mapped[int] = mapped_column(primary_key=True)
+    detalle_id: Mapped[int] = mapped_column()
+    puesto_id: Mapped[int] = mapped_column()
+    inicio: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    fin: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+    # Agenda de un puesto en orden cronológico
+    __table_args__ = (
+        Index("ix_planificacion_operaciones_puesto", "corrida_id", "puesto_id", "inicio"),
+    )
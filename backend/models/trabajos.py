@@ -0,0 +1,48 @@
+# backend/models/trabajos.py
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import DateTime, Index, SmallInteger, String, Text, text
+from sqlalchemy.dialects.postgresql import JSONB
+from typing import Optional
+from datetime import datetime
+
+from backend.models.base import Base # Importar la Base
+
+# Trabajo en segundo plano (ver core/trabajos.py). La tabla es la cola: cada worker de la API
+# toma los pendientes con SELECT ... FOR UPDATE SKIP LOCKED y deja acá progreso y resultado.
+# Estados: pendiente -> en_curso -> completado | fallido (o cancelado si nunca empezó).
+class TrabajoORM(Base):
+    __tablename__ = "trabajos"
+    trabajo_id: Mapped[int] = mapped_column(primary_key=True)
+    tipo: Mapped[str] = mapped_column(String(50))
+    estado: Mapped[str] = mapped_column(String(20), default="pendiente", server_default=text("'pendiente'"))
+    parametros: Mapped[dict] = mapped_column(JSONB, default=dict, server_default=text("'{}'"))
+    resultado: Mapped[Optional[dict]] = mapped_column(JSONB)
+    error: Mapped[Optional[str]] = mapped_column(Text)
+
+    # Avance informado por el propio trabajo (0 a 100)
+    progreso: Mapped[int] = mapped_column(SmallInteger, default=0, server_default=text("0"))
+    mensaje: Mapped[Optional[str]] = mapped_column(Text)
+
+    # Reintentos: 'intentos' cuenta las ejecuciones empezadas; un fallo vuelve a 'pendiente'
+    # con disponible_desde en el futuro hasta agotar max_intentos
+    intentos: Mapped[int] = mapped_column(SmallInteger, default=0, server_default=text("0"))
+    max_intentos: Mapped[int] = mapped_column(SmallInteger, default=1, server_default=text("1"))
+    disponible_desde: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=text("now()"))
+
+    creado: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=text("now()"))
+    iniciado: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    finalizado: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    # Worker que lo ejecuta y su último latido: un en_curso sin latido reciente quedó huérfano
+    worker: Mapped[Optional[str]] = mapped_column(String(100))
+    latido: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # Cola: solo los pendientes, en orden de llegada por tipo
+        Index(
+            "ix_trabajos_pendientes", "tipo", "disponible_desde", "trabajo_id",
+            postgresql_where=text("estado = 'pendiente'"),
+        ),
+        # Concurrencia por tipo y detección de huérfanos
+        Index("ix_trabajos_en_curso", "tipo", "latido", postgresql_where=text("estado = 'en_curso'")),
+    )
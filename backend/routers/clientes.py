@@ -1,13 +1,16 @@
 # backend/routers/clientes.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from typing import Optional
 
 from backend.database import get_db_session
 from backend.models.maestros import ClienteORM
-from backend.schemas.maestros import ClienteCreate, Cliente, PaginatedClientes
+from backend.schemas.maestros import ClienteCreate, Cliente, PaginatedClientes, ClienteImport
+from backend.schemas.importacion import FormatoImportacion, ResultadoImportacion
+from backend.core.importacion import importar, cargar_clientes
+from backend.core.cache import cache_respuestas
 
 router = APIRouter(
     prefix="/clientes",
@@ -27,6 +30,19 @@ async def create_cliente(
     await db_session.refresh(db_cliente)
     return db_cliente
 
+# ENDPOINT: IMPORTACIÓN MASIVA (CSV / NDJSON)
+@router.post("/importar", response_model=ResultadoImportacion)
+async def importar_clientes(
+    archivo: UploadFile = File(..., description="Archivo CSV (con encabezado) o NDJSON con los clientes."),
+    formato: FormatoImportacion = FormatoImportacion.CSV,
+    db_session: AsyncSession = Depends(get_db_session)
+):
+    """
+    Importa clientes en bloques (COPY a staging + upsert por cliente_id).
+    Las filas se validan con las mismas reglas que el alta individual y se devuelve un reporte de errores por fila.
+    """
+    return await importar(db_session, archivo, formato, ClienteImport, cargar_clientes)
+
 # ENDPOINT: READ ALL (Paginación)
 @router.get("/", response_model=PaginatedClientes)
 async def read_clientes(
@@ -60,7 +76,12 @@ async def read_clientes(
 # ENDPOINT: READ BY ID
 @router.get("/{cliente_id}", response_model=Cliente)
 async def read_cliente(cliente_id: int, db_session: AsyncSession = Depends(get_db_session)):
-    """Obtiene un cliente específico por su ID."""
+    """Obtiene un cliente específico por su ID (servido desde la cache si está)."""
+    clave = f"cliente:{cliente_id}"
+    cacheada, generacion = await cache_respuestas.leer(clave)
+    if cacheada is not None:
+        return cacheada
+
     result = await db_session.execute(
         select(ClienteORM).where(ClienteORM.cliente_id == cliente_id)
     )
@@ -69,6 +90,6 @@ async def read_cliente(cliente_id: int, db_session: AsyncSession = Depends(get_d
     if cliente is None:
         raise HTTPException(status_code=404, detail="Cliente no encontrado")
         
-    return cliente
+    return await cache_respuestas.guardar(clave, Cliente.model_validate(cliente), {clave}, generacion)
 
 # (Añadir endpoints PUT y DELETE de Clientes aquí cuando los desarrollemos)
\ No newline at end of file
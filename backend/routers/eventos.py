@@ -0,0 +1,50 @@
+# backend/routers/eventos.py
+
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from backend.core.eventos import bus_cambios
+
+router = APIRouter(
+    prefix="/eventos",
+    tags=["Eventos en tiempo real"]
+)
+
+# Cada cuánto se envía un comentario SSE para mantener viva la conexión (proxies, balanceadores)
+INTERVALO_KEEPALIVE_SEGUNDOS = 15
+
+# ENDPOINT: STREAM DE CAMBIOS (Server-Sent Events)
+@router.get("/stream")
+async def stream_cambios(
+    request: Request,
+    op_id: Optional[int] = None,
+    puesto_id: Optional[int] = None,
+):
+    """
+    Envía por SSE los cambios de lotes, OP y pedidos a medida que se confirman en la base.
+    Se puede filtrar por OP y/o por puesto de trabajo (posición actual del lote).
+    Si el cliente no consume a tiempo recibe un evento 'resync' y debe recargar sus datos.
+    """
+    suscripcion = bus_cambios.suscribir(op_id=op_id, puesto_id=puesto_id)
+
+    async def generar():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    evento = await asyncio.wait_for(suscripcion.cola.get(), timeout=INTERVALO_KEEPALIVE_SEGUNDOS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {evento['t']}\ndata: {json.dumps(evento, separators=(',', ':'))}\n\n"
+        finally:
+            bus_cambios.cancelar(suscripcion)
+
+    return StreamingResponse(
+        generar(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -3,15 +3,28 @@
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, func, update
+from sqlalchemy import select, delete, func, update, or_
 from sqlalchemy.orm import selectinload, joinedload
 from datetime import date # Necesario para inicializar fechas si es necesario
 
 # Importaciones utilizando la sintaxis completa del paquete
 from backend.database import get_db_session
 from backend.models.maestros import LoteORM, OpORM, RutaMaestraORM, ProductoORM, PedidoORM, ClienteORM # Incluir los modelos relacionados
-from backend.schemas.maestros import Lote, LoteCreate, PaginatedLotes, EstadoLote # Incluir los esquemas de Lote y Enum
-from backend.models.auxiliares import RutaDetalleORM, PuestoTrabajoORM
+from backend.schemas.maestros import (
+    Lote, LoteCreate, PaginatedLotes, EstadoLote, # Incluir los esquemas de Lote y Enum
+    LoteEstadoMasivo, LoteEstadoMasivoResultado, LoteEstadoOmitido,
+    LoteTransicion, LoteTransicionResultado, LotesGrilla
+)
+from backend.models.movimientos import LoteMovimientoORM
+from backend.models.archivo import LoteArchivoORM, LoteMovimientoArchivoORM
+from backend.models.grilla import LoteGrillaORM
+from backend.schemas.movimientos import MovimientosCreate, MovimientosResultado, Movimiento, PosicionLote
+from backend.core.estados_lote import transicion_permitida, origenes_permitidos
+from backend.core.movimientos import registrar_movimientos
+from backend.core.rutas import siguiente_paso
+from backend.core.cache import cache_respuestas
+from backend.core.archivo import paginar_con_archivo
+from backend.core.versiones import etag, versiones_if_match, condicion_version, precondicion_fallida
 
 # --- CONFIGURACIÓN DEL ROUTER ---
 router = APIRouter(
@@ -34,11 +47,18 @@ def get_lote_relations():
         # 4. Carga Lote -> Producto
         joinedload(LoteORM.producto),    
         
-        # 5. Carga Lote -> Ruta -> Pasos -> Puesto (Resuelve el error 'ruta/pasos')
+        # 5. Carga Lote -> Ruta compilada (los pasos ya vienen en la misma fila)
         joinedload(LoteORM.ruta)
-            .selectinload(RutaMaestraORM.detalles) 
-                .joinedload(RutaDetalleORM.puesto_trabajo)
     ]
+
+def get_lote_archivo_relations():
+    # Lo que necesita el esquema Lote, sobre el archivo (la OP no se serializa)
+    return [joinedload(LoteArchivoORM.producto), joinedload(LoteArchivoORM.ruta)]
+
+def etiquetas_lote(lote: LoteORM) -> set[str]:
+    """Etiquetas de cache de la respuesta de un lote (la ruta compilada va embebida)."""
+    return {f"lote:{lote.lote_interno_id}", f"ruta:{lote.ruta_id}"}
+
 # --- ENDPOINTS CRUD BÁSICO ---
 
 # ENDPOINT: CREATE (Crear un nuevo Lote)
@@ -95,6 +115,9 @@ async def create_lote(
         # En caso de error inesperado (ej. problema de conexión)
         raise HTTPException(status_code=500, detail=f"Error al crear el lote: {str(e)}")
 
+    # La OP ahora incluye este lote
+    await cache_respuestas.invalidar(f"op:{lote_data.op_id}")
+
     # 4. Devolver el lote creado con las relaciones cargadas
     result = await db_session.execute(
         select(LoteORM)
@@ -103,30 +126,154 @@ async def create_lote(
     )
     return result.unique().scalar_one()
 
+# ENDPOINT: CAMBIO DE ESTADO MASIVO (Mover varios lotes en una sola sentencia)
+@router.post("/estado", response_model=LoteEstadoMasivoResultado)
+async def cambiar_estado_lotes(
+    cambio: LoteEstadoMasivo,
+    db_session: AsyncSession = Depends(get_db_session)
+):
+    """
+    Cambia el estado de varios lotes (por ID interno o número visible) con un único UPDATE condicional.
+    Solo se aplican las transiciones permitidas por la máquina de estados del lote.
+    Informa qué lotes cambiaron, cuáles se omitieron por no cumplir la condición y cuáles no existen.
+    """
+    if cambio.estado_esperado is not None and not transicion_permitida(cambio.estado_esperado, cambio.estado):
+        raise HTTPException(
+            status_code=422,
+            detail=f"Transición no permitida: {cambio.estado_esperado.name} -> {cambio.estado.name}."
+        )
+
+    ids = set(cambio.lote_interno_ids)
+    numeros = set(cambio.lote_numeros_visibles)
+
+    # 1. Filtro de identificación (ID interno o número visible)
+    filtro_lotes = or_(
+        LoteORM.lote_interno_id.in_(ids),
+        LoteORM.lote_numero_visible.in_(numeros),
+    )
+
+    # 2. UPDATE condicional: solo lotes en un estado desde el que la transición es válida
+    #    y, si se pide, que estén en el estado esperado
+    condiciones = [filtro_lotes, LoteORM.estado.in_(origenes_permitidos(cambio.estado))]
+    if cambio.estado_esperado is not None:
+        condiciones.append(LoteORM.estado == cambio.estado_esperado.value)
+
+    actualizados_cte = (
+        update(LoteORM)
+        .where(*condiciones)
+        .values(estado=cambio.estado.value)
+        .returning(LoteORM.lote_interno_id)
+        .cte("actualizados")
+    )
+
+    # 3. En la misma sentencia, leemos los lotes identificados (foto previa al UPDATE)
+    #    y marcamos cuáles fueron actualizados.
+    stmt = (
+        select(
+            LoteORM.lote_interno_id,
+            LoteORM.lote_numero_visible,
+            LoteORM.estado,
+            actualizados_cte.c.lote_interno_id.is_not(None).label("actualizado"),
+        )
+        .outerjoin(actualizados_cte, actualizados_cte.c.lote_interno_id == LoteORM.lote_interno_id)
+        .where(filtro_lotes)
+        .order_by(LoteORM.lote_interno_id)
+    )
+
+    try:
+        filas = (await db_session.execute(stmt)).all()
+        await db_session.commit()
+    except Exception as e:
+        await db_session.rollback()
+        raise HTTPException(status_code=500, detail=f"Error al cambiar el estado de los lotes: {str(e)}")
+
+    await cache_respuestas.invalidar(*(f"lote:{fila.lote_interno_id}" for fila in filas if fila.actualizado))
+
+    # 4. Armar el reporte
+    resultado = LoteEstadoMasivoResultado()
+    for fila in filas:
+        if fila.actualizado:
+            resultado.actualizados.append(fila.lote_interno_id)
+        else:
+            resultado.omitidos.append(LoteEstadoOmitido(
+                lote_interno_id=fila.lote_interno_id,
+                lote_numero_visible=fila.lote_numero_visible,
+                estado_actual=fila.estado,
+            ))
+
+    ids_encontrados = {fila.lote_interno_id for fila in filas}
+    numeros_encontrados = {fila.lote_numero_visible for fila in filas}
+    resultado.ids_no_encontrados = sorted(ids - ids_encontrados)
+    resultado.numeros_no_encontrados = sorted(numeros - numeros_encontrados)
+
+    return resultado
+
+# ENDPOINT: REGISTRO DE MOVIMIENTOS (Eventos de escaneo en lote)
+@router.post("/movimientos", response_model=MovimientosResultado, status_code=status.HTTP_201_CREATED)
+async def registrar_movimientos_lotes(
+    movimientos: MovimientosCreate,
+    db_session: AsyncSession = Depends(get_db_session)
+):
+    """
+    Registra eventos de escaneo (ingreso, inicio, fin) de lotes en los pasos de su ruta.
+    Inserta el historial y actualiza la posición actual de cada lote en una sola sentencia.
+    Los eventos de lotes inexistentes o de pasos que no pertenecen a la ruta del lote se rechazan.
+    """
+    try:
+        rechazados = await registrar_movimientos(db_session, movimientos.eventos)
+        await db_session.commit()
+    except Exception as e:
+        await db_session.rollback()
+        raise HTTPException(status_code=500, detail=f"Error al registrar los movimientos: {str(e)}")
+
+    # La posición de los lotes forma parte de su respuesta
+    await cache_respuestas.invalidar(*{f"lote:{evento.lote_interno_id}" for evento in movimientos.eventos})
+
+    return MovimientosResultado(
+        registrados=len(movimientos.eventos) - len(rechazados),
+        rechazados=rechazados
+    )
+
 # ENDPOINT: READ ALL (Obtener todos los Lotes con paginación y búsqueda)
 @router.get("/", response_model=PaginatedLotes)
 async def read_lotes(
     page: int = 1,
     per_page: int = 10,
     search: Optional[str] = None,
+    incluir_archivados: bool = False,
     db_session: AsyncSession = Depends(get_db_session)
 ):
     """
     Obtiene una lista paginada de Lotes. Permite buscar por lote_numero_visible o filtrar por estado.
+    Con 'incluir_archivados' siguen, después de los activos, los lotes movidos al archivo.
     """
     offset = (page - 1) * per_page
     
-    # 1. Construir la consulta base
-    query = select(LoteORM)
+    # 1. Construir la consulta base (la misma para activos y archivados)
+    def filtrar(modelo):
+        query = select(modelo)
     
-    # 2. Aplicar filtro de búsqueda
-    if search:
-        search_term = f"%{search}%"
-        # Busca en el número visible o en la descripción (si existiera)
-        query = query.where(
-            (LoteORM.lote_numero_visible.ilike(search_term)) |
-            (LoteORM.estado == int(search) if search.isdigit() and int(search) in EstadoLote._value2member_map_ else False) # Permite buscar por el número de estado
+        # 2. Aplicar filtro de búsqueda
+        if search:
+            search_term = f"%{search}%"
+            # Busca en el número visible o en la descripción (si existiera)
+            query = query.where(
+                (modelo.lote_numero_visible.ilike(search_term)) |
+                (modelo.estado == int(search) if search.isdigit() and int(search) in EstadoLote._value2member_map_ else False) # Permite buscar por el número de estado
+            )
+        return query
+
+    query = filtrar(LoteORM)
+
+    if incluir_archivados:
+        activos = query.order_by(LoteORM.lote_interno_id.desc()).options(*get_lote_relations())
+        archivados = (
+            filtrar(LoteArchivoORM)
+            .order_by(LoteArchivoORM.lote_interno_id.desc())
+            .options(*get_lote_archivo_relations())
         )
+        total, lotes = await paginar_con_archivo(db_session, activos, archivados, offset, per_page)
+        return PaginatedLotes(total=total, data=lotes)
     
     # 3. Obtener el total de registros para la paginación
     total_result = await db_session.execute(select(func.count()).select_from(query.alias()))
@@ -144,27 +291,215 @@ async def read_lotes(
     
     return PaginatedLotes(total=total, data=lotes)
 
+# ENDPOINT: GRILLA DE PLANTA (Modelo de lectura plano; declarado antes de /{lote_interno_id})
+@router.get("/grid", response_model=LotesGrilla)
+async def read_lotes_grilla(
+    estado: Optional[EstadoLote] = None,
+    op_id: Optional[int] = None,
+    cliente_id: Optional[int] = None,
+    antes_de: Optional[int] = None,
+    limit: int = 50,
+    db_session: AsyncSession = Depends(get_db_session)
+):
+    """
+    Lotes con número, estado, OP, pedido, cliente, producto y ruta, del más nuevo al más viejo.
+    Lee solo 'lotes_grilla' (sin joins): cada filtro tiene un índice (filtro, lote_interno_id),
+    así que una página es un único recorrido de índice. Para seguir, pasar 'siguiente' como 'antes_de'.
+    """
+    limit = min(max(limit, 1), 500)
+
+    # 1. Filtros (la página siguiente arranca después del último lote devuelto)
+    query = select(LoteGrillaORM)
+    if estado is not None:
+        query = query.where(LoteGrillaORM.estado == estado.value)
+    if op_id is not None:
+        query = query.where(LoteGrillaORM.op_id == op_id)
+    if cliente_id is not None:
+        query = query.where(LoteGrillaORM.cliente_id == cliente_id)
+    if antes_de is not None:
+        query = query.where(LoteGrillaORM.lote_interno_id < antes_de)
+
+    # 2. Una fila de más indica si hay página siguiente, sin contar el total
+    filas = (await db_session.execute(
+        query.order_by(LoteGrillaORM.lote_interno_id.desc()).limit(limit + 1)
+    )).scalars().all()
+
+    hay_mas = len(filas) > limit
+    filas = filas[:limit]
+    return LotesGrilla(data=filas, siguiente=filas[-1].lote_interno_id if hay_mas else None)
 
 # ENDPOINT: READ ONE (Obtener un Lote por ID)
 @router.get("/{lote_interno_id}", response_model=Lote)
 async def read_lote(
     lote_interno_id: int,
+    incluir_archivados: bool = False,
     db_session: AsyncSession = Depends(get_db_session)
 ):
     """
-    Obtiene un Lote por su ID interno.
+    Obtiene un Lote por su ID interno (servido desde la cache si está).
+    Con 'incluir_archivados' también se busca en el archivo (sin cache: es de solo lectura).
     """
+    clave = f"lote:{lote_interno_id}"
+    cacheada, generacion = await cache_respuestas.leer(clave)
+    if cacheada is not None:
+        return cacheada
+
     result = await db_session.execute(
         select(LoteORM)
         .where(LoteORM.lote_interno_id == lote_interno_id)
         .options(*get_lote_relations())
     )
     lote = result.unique().scalar_one_or_none()
+
+    if lote is None and incluir_archivados:
+        archivado = (await db_session.execute(
+            select(LoteArchivoORM)
+            .where(LoteArchivoORM.lote_interno_id == lote_interno_id)
+            .options(*get_lote_archivo_relations())
+        )).unique().scalar_one_or_none()
+        if archivado is not None:
+            return Lote.model_validate(archivado)
     
     if lote is None:
         raise HTTPException(status_code=404, detail="Lote no encontrado.")
         
-    return lote
+    return await cache_respuestas.guardar(
+        clave, Lote.model_validate(lote), etiquetas_lote(lote), generacion, encabezados={"ETag": etag(lote.version)}
+    )
+
+# ENDPOINT: POSICIÓN ACTUAL (Lectura directa de la posición materializada)
+@router.get("/{lote_interno_id}/posicion", response_model=PosicionLote)
+async def read_posicion_lote(
+    lote_interno_id: int,
+    db_session: AsyncSession = Depends(get_db_session)
+):
+    """
+    Obtiene el paso de la ruta en el que está el lote (sin recorrer el historial) y el paso
+    siguiente, resuelto sobre la ruta compilada leída en la misma consulta.
+    """
+    result = await db_session.execute(
+        select(
+            LoteORM.lote_interno_id,
+            LoteORM.detalle_actual_id.label("detalle_id"),
+            LoteORM.puesto_actual_id.label("puesto_id"),
+            LoteORM.secuencia_actual.label("secuencia"),
+            LoteORM.movimiento_actual.label("movimiento"),
+            LoteORM.fecha_movimiento_actual.label("fecha_hora"),
+            RutaMaestraORM,
+        )
+        .join(RutaMaestraORM, RutaMaestraORM.ruta_id == LoteORM.ruta_id)
+        .where(LoteORM.lote_interno_id == lote_interno_id)
+    )
+    posicion = result.one_or_none()
+
+    if posicion is None:
+        raise HTTPException(status_code=404, detail="Lote no encontrado.")
+
+    *datos, ruta = posicion
+    return PosicionLote(
+        **dict(zip(posicion._fields[:-1], datos)),
+        ruta_version=ruta.version,
+        siguiente=siguiente_paso(ruta, posicion.secuencia),
+    )
+
+# ENDPOINT: HISTORIAL DE MOVIMIENTOS
+@router.get("/{lote_interno_id}/movimientos", response_model=List[Movimiento])
+async def read_movimientos_lote(
+    lote_interno_id: int,
+    limit: int = 100,
+    incluir_archivados: bool = False,
+    db_session: AsyncSession = Depends(get_db_session)
+):
+    """
+    Obtiene los últimos movimientos de un lote, del más reciente al más antiguo.
+    Un lote está entero en las tablas activas o entero en el archivo: con 'incluir_archivados'
+    se busca en el archivo solo si no hay movimientos activos.
+    """
+    def consulta(modelo):
+        return (
+            select(modelo)
+            .where(modelo.lote_interno_id == lote_interno_id)
+            .order_by(modelo.fecha_hora.desc(), modelo.movimiento_id.desc())
+            .limit(min(limit, 1000))
+        )
+
+    movimientos = (await db_session.execute(consulta(LoteMovimientoORM))).scalars().all()
+    if not movimientos and incluir_archivados:
+        movimientos = (await db_session.execute(consulta(LoteMovimientoArchivoORM))).scalars().all()
+    return movimientos
+
+# --- FUNCIÓN AUXILIAR DE CONFLICTOS ---
+async def lote_no_actualizado(
+    db_session: AsyncSession, lote_interno_id: int, mensaje: str, versiones: Optional[list[int]] = None
+) -> HTTPException:
+    """
+    Se llama solo cuando un UPDATE condicional no afectó ninguna fila: distingue entre
+    lote inexistente (404), versión distinta a la del If-Match (412, si se pasan 'versiones')
+    y lote en otro estado (409, informando el estado actual).
+    """
+    fila = (await db_session.execute(
+        select(LoteORM.estado, LoteORM.version).where(LoteORM.lote_interno_id == lote_interno_id)
+    )).one_or_none()
+
+    if fila is None:
+        return HTTPException(status_code=404, detail="Lote no encontrado.")
+
+    estado_actual, version_actual = fila
+    if versiones is not None and version_actual not in versiones:
+        return precondicion_fallida(version_actual)
+
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={"mensaje": mensaje, "estado_actual": EstadoLote(estado_actual).value}
+    )
+
+# ENDPOINT: TRANSICIÓN DE ESTADO (UPDATE condicional, sin lectura previa ni bloqueo)
+@router.post("/{lote_interno_id}/transicion", response_model=LoteTransicionResultado)
+async def transicionar_lote(
+    lote_interno_id: int,
+    transicion: LoteTransicion,
+    db_session: AsyncSession = Depends(get_db_session)
+):
+    """
+    Mueve un lote de 'estado_esperado' a 'estado' si la transición está permitida.
+    Se aplica con un único UPDATE ... WHERE estado = :esperado RETURNING: si otro operador
+    ganó la carrera se responde 409 con el estado actual del lote.
+    """
+    # 1. Validar la transición contra la máquina de estados (sin tocar la base)
+    if not transicion_permitida(transicion.estado_esperado, transicion.estado):
+        raise HTTPException(
+            status_code=422,
+            detail=f"Transición no permitida: {transicion.estado_esperado.name} -> {transicion.estado.name}."
+        )
+
+    # 2. UPDATE condicional
+    result = await db_session.execute(
+        update(LoteORM)
+        .where(
+            LoteORM.lote_interno_id == lote_interno_id,
+            LoteORM.estado == transicion.estado_esperado.value
+        )
+        .values(estado=transicion.estado.value)
+        .returning(LoteORM.lote_interno_id)
+    )
+    actualizado = result.scalar_one_or_none()
+
+    # 3. Carrera perdida o lote inexistente
+    if actualizado is None:
+        await db_session.rollback()
+        raise await lote_no_actualizado(
+            db_session, lote_interno_id,
+            f"El lote no está en estado {transicion.estado_esperado.name}."
+        )
+
+    await db_session.commit()
+    await cache_respuestas.invalidar(f"lote:{lote_interno_id}")
+
+    return LoteTransicionResultado(
+        lote_interno_id=lote_interno_id,
+        estado_anterior=transicion.estado_esperado,
+        estado=transicion.estado
+    )
 
 # ENDPOINT: UPDATE (Actualizar el estado o número visible de un Lote)
 # Usamos LoteBase para el input, excluyendo campos que no se deben actualizar aquí como FKs
@@ -172,22 +507,16 @@ async def read_lote(
 async def update_lote(
     lote_interno_id: int,
     lote_data: LoteCreate, # Reutilizamos LoteCreate, pero solo permitimos cambiar estado y visible
+    versiones: Optional[list[int]] = Depends(versiones_if_match),
     db_session: AsyncSession = Depends(get_db_session)
 ):
     """
     Actualiza el estado o el número visible de un Lote por su ID interno.
+    El cambio de estado respeta la máquina de estados y la versión debe coincidir con el
+    If-Match (un UPDATE condicional, sin lectura previa).
     """
-    
-    # 1. Buscar el lote (necesario solo para la comprobación 404, aunque no se usa para la actualización directa)
-    stmt = select(LoteORM).where(LoteORM.lote_interno_id == lote_interno_id)
-    result = await db_session.execute(stmt)
-    db_lote = result.scalar_one_or_none()
-
-    if db_lote is None:
-        # Aquí usamos HTTPException(404) para salir rápidamente si no existe el lote
-        raise HTTPException(status_code=404, detail="Lote no encontrado.")
 
-    # 2. Preparar datos a actualizar usando CLAVES DE STRING (Nombres de columna/campos)
+    # 1. Preparar datos a actualizar usando CLAVES DE STRING (Nombres de columna/campos)
     update_fields = {}
     
     # Solo permitimos actualizar el estado y el número visible
@@ -195,44 +524,52 @@ async def update_lote(
         # CLAVE: Usamos el nombre de la columna como string
         update_fields["lote_numero_visible"] = lote_data.lote_numero_visible
     
-    # El estado siempre es importante de actualizar
-    if lote_data.estado is not None:
+    # El estado solo si el cliente lo mandó: LoteCreate lo completa con EN_ESPERA por defecto
+    # y un PUT que solo cambia el número visible no debe intentar devolver el lote a la espera
+    if "estado" in lote_data.model_fields_set:
         # CLAVE: Usamos el nombre de la columna como string
         update_fields["estado"] = lote_data.estado.value
     
+    condicion = (LoteORM.lote_interno_id == lote_interno_id, condicion_version(LoteORM.version, versiones))
+
     if not update_fields:
-        # Devolvemos el lote existente (db_lote) con sus relaciones cargadas si no hubo cambios
-        # Nota: Aquí db_lote NO tiene las relaciones cargadas. Si quieres devolverlo con relaciones,
-        # necesitarías una carga extra, o simplemente devolverlo sin cambio. Para mantener la 
-        # consistencia del response_model, lo cargamos.
-        result_loaded = await db_session.execute(
-            select(LoteORM)
-            .where(LoteORM.lote_interno_id == lote_interno_id)
-            .options(*get_lote_relations())
-        )
-        return result_loaded.unique().scalar_one()
+        # Sin cambios: solo se valida la precondición y se devuelve el lote actual
+        if (await db_session.execute(select(LoteORM.version).where(*condicion))).scalar_one_or_none() is None:
+            raise await lote_no_actualizado(db_session, lote_interno_id, "Sin cambios.", versiones)
+        return await read_lote(lote_interno_id=lote_interno_id, db_session=db_session)
 
-    # 3. Ejecutar la actualización con la sintaxis corregida
-    # Usamos .values(**update_fields), donde update_fields ahora tiene claves de tipo str.
-    await db_session.execute(
+    # 2. Ejecutar la actualización condicional: la versión debe ser la del If-Match y el
+    #    estado destino solo se acepta si el lote ya está en él o si viene de un estado permitido.
+    stmt = (
         update(LoteORM)
-        .where(LoteORM.lote_interno_id == lote_interno_id)
+        .where(*condicion)
         .values(**update_fields)
+        .returning(LoteORM.lote_interno_id)
     )
+    if "estado" in update_fields:
+        estados_validos = origenes_permitidos(lote_data.estado) + [lote_data.estado.value]
+        stmt = stmt.where(LoteORM.estado.in_(estados_validos))
 
     try:
-        await db_session.commit()
+        actualizado = (await db_session.execute(stmt)).scalar_one_or_none()
+        if actualizado is not None:
+            await db_session.commit()
     except Exception as e:
         await db_session.rollback()
         raise HTTPException(status_code=500, detail=f"Error al actualizar el lote: {str(e)}")
 
-    # 4. Devolver el lote actualizado con relaciones cargadas
-    result = await db_session.execute(
-        select(LoteORM)
-        .where(LoteORM.lote_interno_id == lote_interno_id)
-        .options(*get_lote_relations())
-    )
-    return result.unique().scalar_one()
+    if actualizado is None:
+        await db_session.rollback()
+        raise await lote_no_actualizado(
+            db_session, lote_interno_id,
+            f"Transición no permitida hacia {lote_data.estado.name}." if "estado" in update_fields else "Sin cambios.",
+            versiones
+        )
+
+    await cache_respuestas.invalidar(f"lote:{lote_interno_id}")
+
+    # 3. Devolver el lote actualizado con relaciones cargadas (y la nueva ETag)
+    return await read_lote(lote_interno_id=lote_interno_id, db_session=db_session)
 
 # ENDPOINT: DELETE (Eliminar un Lote)
 @router.delete("/{lote_interno_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -259,5 +596,7 @@ async def delete_lote(
     except Exception as e:
         await db_session.rollback()
         raise HTTPException(status_code=500, detail=f"Error al eliminar el lote: {str(e)}")
+
+    await cache_respuestas.invalidar(f"lote:{lote_interno_id}", f"op:{db_lote.op_id}")
         
     return {} # Respuesta vacía 204
\ No newline at end of file
@@ -0,0 +1,85 @@
+# backend/routers/monitoreo.py
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse, Response
+
+from backend.core.cache import cache_respuestas
+from backend.core.coalescencia import metricas_coalescencia
+from backend.core.consultas_lentas import registro_consultas_lentas
+from backend.core.metricas import registrar_metricas_externas, registro_metricas
+from backend.core.perfilado import almacen_perfiles
+from backend.core.security import get_current_admin
+
+router = APIRouter(
+    tags=["Monitoreo"]
+)
+
+# Las estadísticas de cache y coalescencia se leen al exponer; no duplican contadores
+registrar_metricas_externas(
+    "federici_cache", "Cache de respuestas", cache_respuestas.estadisticas,
+    {"aciertos": "counter", "fallos": "counter", "invalidaciones": "counter", "expulsiones": "counter",
+     "errores": "counter", "tasa_aciertos": "gauge", "entradas": "gauge", "bytes": "gauge"},
+)
+registrar_metricas_externas(
+    "federici_coalescencia", "Coalescencia de lecturas", metricas_coalescencia.estadisticas,
+    {"ejecutadas": "counter", "coalescidas": "counter", "en_vuelo": "gauge"},
+)
+
+# ENDPOINT: Métricas de la cache de respuestas (de este worker)
+@router.get("/monitoreo/cache")
+async def read_metricas_cache():
+    """Aciertos, fallos, invalidaciones y ocupación de la cache de respuestas."""
+    return cache_respuestas.estadisticas()
+
+# ENDPOINT: Métricas de la coalescencia de lecturas (de este worker)
+@router.get("/monitoreo/coalescencia")
+async def read_metricas_coalescencia():
+    """Ejecuciones reales frente a solicitudes idénticas que compartieron su resultado."""
+    return metricas_coalescencia.estadisticas()
+
+# ENDPOINT: Métricas en formato de texto de Prometheus (de este worker)
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def read_metricas_prometheus():
+    """Latencias por ruta, solicitudes en curso, pool de conexiones, numeradores, cache y coalescencia."""
+    return PlainTextResponse(registro_metricas.exponer(), media_type="text/plain; version=0.0.4")
+
+# ENDPOINT: Consultas lentas recientes (de este worker, solo administradores)
+@router.get("/monitoreo/consultas-lentas", dependencies=[Depends(get_current_admin)])
+async def read_consultas_lentas(
+    limit: int = Query(50, ge=1, le=500),
+    ruta: Optional[str] = Query(None, description="Plantilla de ruta, p. ej. /lotes/{lote_interno_id}"),
+):
+    """
+    Sentencias que superaron SQL_LENTA_UMBRAL_MS, más recientes primero: SQL, parámetros
+    redactados, ruta de origen y, si fue muestreada, el plan de EXPLAIN (ANALYZE, BUFFERS).
+    """
+    return {
+        **registro_consultas_lentas.estadisticas(),
+        "consultas": registro_consultas_lentas.listar(limit, ruta),
+    }
+
+# ENDPOINT: Vaciar el buffer de consultas lentas
+@router.delete("/monitoreo/consultas-lentas", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(get_current_admin)])
+async def delete_consultas_lentas():
+    registro_consultas_lentas.limpiar()
+
+# ENDPOINT: Perfiles de solicitudes capturados con X-Perfilar (de este worker)
+@router.get("/monitoreo/perfiles", dependencies=[Depends(get_current_admin)])
+async def read_perfiles():
+    """Resumen de los perfiles guardados, más recientes primero (sin el contenido)."""
+    return almacen_perfiles.listar()
+
+# ENDPOINT: Descargar un perfil en formato speedscope
+@router.get("/monitoreo/perfiles/{perfil_id}", dependencies=[Depends(get_current_admin)])
+async def read_perfil(perfil_id: int):
+    """JSON de speedscope: se abre en https://www.speedscope.app o con 'speedscope archivo.json'."""
+    perfil = almacen_perfiles.obtener(perfil_id)
+    if perfil is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    return Response(
+        perfil,
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="perfil-{perfil_id}.speedscope.json"'},
+    )
@@ -1,7 +1,7 @@
 # backend/routers/op.py
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, delete, func, update
+from sqlalchemy import select, delete, func, update, insert, exists
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 # Importamos joinedload y selectinload
@@ -10,11 +10,15 @@ from sqlalchemy.orm import selectinload, joinedload
 from backend.database import get_db_session
 # Importamos ORMs principales desde maestros
 from backend.models.maestros import OpORM, PedidoORM, LoteORM, RutaMaestraORM
-# CORRECCIÓN: Importamos RutaDetalleORM desde el módulo 'auxiliares'
-from backend.models.auxiliares import RutaDetalleORM 
-from backend.core.numeracion import generar_siguiente_numero
+from backend.models.archivo import OpArchivoORM, LoteArchivoORM
+# ProductoORM vive en el módulo 'auxiliares'
+from backend.models.auxiliares import ProductoORM
+from backend.core.numeracion import generar_siguiente_numero, reservar_numeros
+from backend.core.cache import cache_respuestas
+from backend.core.archivo import paginar_con_archivo
+from backend.core.versiones import etag, versiones_if_match, condicion_version, precondicion_fallida
 # Usamos OP en mayúsculas, tal como lo definiste en maestros.py
-from backend.schemas.maestros import OPCreate, OP, PaginatedOP, OPUpdate
+from backend.schemas.maestros import OPCreate, OP, PaginatedOP, OPUpdate, OPConLotesCreate
 
 router = APIRouter(
     prefix="/op",
@@ -25,7 +29,7 @@ router = APIRouter(
 
 def get_op_relations():
     """Define la carga ansiosa de las relaciones necesarias para la respuesta de OP.
-    Asegura la carga completa de Pedido, Lotes, Ruta, Detalles de Ruta y Puestos de Trabajo."""
+    Asegura la carga completa de Pedido, Lotes y la Ruta compilada de cada lote."""
     
     # Carga 1: Pedido -> Cliente
     relations = [
@@ -39,17 +43,31 @@ def get_op_relations():
             .selectinload(LoteORM.producto)
     )
     
-    # Carga 3: Lotes asociados a la OP, incluyendo su Ruta, Detalles y Puesto de Trabajo.
-    # Esta carga profunda resuelve el MissingGreenlet en la serialización.
+    # Carga 3: Lotes asociados a la OP, incluyendo su Ruta compilada (los pasos van en la misma fila).
     relations.append(
         selectinload(OpORM.lotes)
             .selectinload(LoteORM.ruta)
-            .selectinload(RutaMaestraORM.detalles)
-            .selectinload(RutaDetalleORM.puesto_trabajo)
     )
     
     return relations
 
+def get_op_archivo_relations():
+    """Las mismas cargas que get_op_relations(), sobre las tablas de archivo."""
+    return [
+        joinedload(OpArchivoORM.pedido).joinedload(PedidoORM.cliente),
+        selectinload(OpArchivoORM.lotes).selectinload(LoteArchivoORM.producto),
+        selectinload(OpArchivoORM.lotes).selectinload(LoteArchivoORM.ruta),
+    ]
+
+def etiquetas_op(db_op: OpORM) -> set[str]:
+    """Etiquetas de cache de la respuesta de una OP: todo lo que, al cambiar, la deja vieja."""
+    etiquetas = {f"op:{db_op.op_id}"}
+    if db_op.pedido is not None:
+        etiquetas.update((f"pedido:{db_op.pedido.pedido_id}", f"cliente:{db_op.pedido.cliente_id}"))
+    for lote in db_op.lotes:
+        etiquetas.update((f"lote:{lote.lote_interno_id}", f"ruta:{lote.ruta_id}"))
+    return etiquetas
+
 # --- ENDPOINTS ---
 
 # ENDPOINT: CREATE
@@ -98,35 +116,138 @@ async def create_op(
     
     return result.scalar_one()
 
+# ENDPOINT: CREATE OP + LOTES (Alta atómica en una sola transacción)
+@router.post("/con-lotes", response_model=OP, status_code=status.HTTP_201_CREATED)
+async def create_op_con_lotes(
+    op_data: OPConLotesCreate,
+    db_session: AsyncSession = Depends(get_db_session)
+):
+    """
+    Crea una OP y todos sus Lotes en una única transacción: una sola reserva del numerador,
+    un INSERT para la OP y un INSERT de varias filas para los lotes. Si algo falla no queda nada creado.
+    """
+
+    # 1. VALIDAR REFERENCIAS (Pedido, Productos y Rutas) EN UNA SOLA CONSULTA
+    producto_ids = {lote.producto_id for lote in op_data.lotes}
+    ruta_ids = {lote.ruta_id for lote in op_data.lotes}
+
+    validacion = await db_session.execute(
+        select(
+            select(func.count(ProductoORM.producto_id))
+                .where(ProductoORM.producto_id.in_(producto_ids))
+                .scalar_subquery()
+                .label("productos"),
+            select(func.count(RutaMaestraORM.ruta_id))
+                .where(RutaMaestraORM.ruta_id.in_(ruta_ids))
+                .scalar_subquery()
+                .label("rutas"),
+            exists().where(PedidoORM.pedido_id == op_data.pedido_id).label("pedido"),
+        )
+    )
+    encontrados = validacion.one()
+
+    if op_data.pedido_id is not None and not encontrados.pedido:
+        raise HTTPException(status_code=404, detail=f"Pedido con ID {op_data.pedido_id} no encontrado.")
+    if encontrados.productos != len(producto_ids):
+        raise HTTPException(status_code=404, detail="Uno o más Productos de los lotes no existen.")
+    if encontrados.rutas != len(ruta_ids):
+        raise HTTPException(status_code=404, detail="Una o más Rutas Maestras de los lotes no existen.")
+
+    try:
+        # 2. RESERVAR EL NÚMERO DE OP (el bloqueo del numerador se libera con el commit final)
+        numeros = await reservar_numeros(db_session, "ultima_op", 1)
+        if not numeros:
+            raise HTTPException(status_code=500, detail="Fallo al generar número de OP.")
+
+        # 3. INSERTAR LA OP
+        op_dict = op_data.model_dump(exclude={"lotes"})
+        op_dict["numero_op_externo"] = numeros[0]
+        op_id = (await db_session.execute(
+            insert(OpORM).values(**op_dict).returning(OpORM.op_id)
+        )).scalar_one()
+
+        # 4. INSERTAR TODOS LOS LOTES EN UNA SENTENCIA
+        await db_session.execute(
+            insert(LoteORM),
+            [
+                {
+                    "op_id": op_id,
+                    "producto_id": lote.producto_id,
+                    "ruta_id": lote.ruta_id,
+                    "lote_numero_visible": lote.lote_numero_visible,
+                    "estado": lote.estado.value,
+                }
+                for lote in op_data.lotes
+            ]
+        )
+
+        await db_session.commit()
+    except HTTPException:
+        await db_session.rollback()
+        raise
+    except Exception as e:
+        await db_session.rollback()
+        raise HTTPException(status_code=500, detail=f"Error al guardar la OP con sus lotes: {str(e)}")
+
+    # 5. CARGA ANSIOSA Y RETORNO
+    result = await db_session.execute(
+        select(OpORM)
+        .where(OpORM.op_id == op_id)
+        .options(*get_op_relations())
+    )
+
+    return result.scalar_one()
+
 # ENDPOINT: READ ALL
 @router.get("/", response_model=PaginatedOP)
 async def read_ops(
     skip: int = 0, 
     limit: int = 50, 
     search: Optional[str] = None,
+    con_pendientes: Optional[bool] = None,
+    incluir_archivados: bool = False,
     db_session: AsyncSession = Depends(get_db_session)
 ):
-    """Obtiene OP con paginación, filtrado y datos de Pedido/Cliente/Lotes."""
-    
-    # Incluimos la carga ansiosa en la query base
-    query = select(OpORM).options(*get_op_relations())
-    
-    if search:
-        query = query.where(
-            (OpORM.numero_op_externo.ilike(f"%{search}%")) |
-            (OpORM.detalle.ilike(f"%{search}%"))
-        )
-        
-    # La paginación debe contar sobre la query base (sin offset/limit)
-    count_stmt = select(func.count()).select_from(query.subquery())
-    total_registros = (await db_session.execute(count_stmt)).scalar_one()
+    """
+    Obtiene OP con paginación, filtrado y datos de Pedido/Cliente/Lotes.
+    'con_pendientes' filtra por los contadores de progreso: True = OPs con lotes sin liberar,
+    False = OPs sin lotes pendientes.
+    'incluir_archivados' agrega, después de las activas, las OPs movidas al archivo.
+    """
+
+    def filtrar(modelo, relaciones):
+        # Incluimos la carga ansiosa en la query base (la misma para activas y archivadas)
+        query = select(modelo).options(*relaciones)
+
+        if search:
+            query = query.where(
+                (modelo.numero_op_externo.ilike(f"%{search}%")) |
+                (modelo.detalle.ilike(f"%{search}%"))
+            )
+
+        if con_pendientes is True:
+            query = query.where(modelo.lotes_liberados < modelo.lotes_total)
+        elif con_pendientes is False:
+            query = query.where(modelo.lotes_liberados == modelo.lotes_total)
+        return query
 
+    # Orden estable: sin él, offset/limit puede repetir u omitir OPs entre páginas
+    query = filtrar(OpORM, get_op_relations()).order_by(OpORM.op_id)
     limit = min(limit, 100)
-    query = query.offset(skip).limit(limit)
-    
-    # OJO: Aquí se usa unique() para consolidar los resultados de la carga ansiosa
-    result = await db_session.execute(query)
-    ops = result.scalars().unique().all()
+
+    if incluir_archivados:
+        archivadas = filtrar(OpArchivoORM, get_op_archivo_relations()).order_by(OpArchivoORM.op_id)
+        total_registros, ops = await paginar_con_archivo(db_session, query, archivadas, skip, limit)
+    else:
+        # La paginación debe contar sobre la query base (sin offset/limit)
+        count_stmt = select(func.count()).select_from(query.subquery())
+        total_registros = (await db_session.execute(count_stmt)).scalar_one()
+
+        query = query.offset(skip).limit(limit)
+
+        # OJO: Aquí se usa unique() para consolidar los resultados de la carga ansiosa
+        result = await db_session.execute(query)
+        ops = result.scalars().unique().all()
     
     return PaginatedOP(
         total_registros=total_registros,
@@ -137,19 +258,38 @@ async def read_ops(
 
 # ENDPOINT: READ BY ID
 @router.get("/{op_id}", response_model=OP)
-async def read_op(op_id: int, db_session: AsyncSession = Depends(get_db_session)):
-    """Obtiene una OP específica por su ID, con todas sus relaciones."""
+async def read_op(op_id: int, incluir_archivados: bool = False, db_session: AsyncSession = Depends(get_db_session)):
+    """
+    Obtiene una OP específica por su ID, con todas sus relaciones (servida desde la cache si está).
+    Con 'incluir_archivados' también se busca en el archivo (sin cache: es de solo lectura).
+    """
+    clave = f"op:{op_id}"
+    cacheada, generacion = await cache_respuestas.leer(clave)
+    if cacheada is not None:
+        return cacheada
+
     result = await db_session.execute(
         select(OpORM)
         .where(OpORM.op_id == op_id)
         .options(*get_op_relations())
     )
     db_op = result.scalar_one_or_none()
+
+    if db_op is None and incluir_archivados:
+        archivada = (await db_session.execute(
+            select(OpArchivoORM)
+            .where(OpArchivoORM.op_id == op_id)
+            .options(*get_op_archivo_relations())
+        )).scalar_one_or_none()
+        if archivada is not None:
+            return OP.model_validate(archivada)
     
     if db_op is None:
         raise HTTPException(status_code=404, detail="Orden de Producción no encontrada")
         
-    return db_op
+    return await cache_respuestas.guardar(
+        clave, OP.model_validate(db_op), etiquetas_op(db_op), generacion, encabezados={"ETag": etag(db_op.version)}
+    )
 
 
 # ENDPOINT: UPDATE
@@ -157,34 +297,35 @@ async def read_op(op_id: int, db_session: AsyncSession = Depends(get_db_session)
 async def update_op(
     op_id: int,
     op_data: OPUpdate,
+    versiones: Optional[list[int]] = Depends(versiones_if_match),
     db_session: AsyncSession = Depends(get_db_session)
 ):
-    """Modifica los campos editables de una OP existente."""
+    """Modifica los campos editables de una OP existente (requiere If-Match con la ETag del GET)."""
     
-    # 1. Ejecutamos el update directamente sin cargar el objeto
+    # 1. Ejecutamos el update directamente sin cargar el objeto, condicionado a la versión
     update_data = op_data.model_dump(exclude_unset=True)
-    
-    if not update_data:
-        # Si no hay datos para actualizar, simplemente devolvemos la OP actual
-        return await read_op(op_id=op_id, db_session=db_session) 
-
-    update_stmt = (
-        update(OpORM)
-        .where(OpORM.op_id == op_id)
-        .values(**update_data)
-        .returning(OpORM.op_id)
-    )
+    condicion = (OpORM.op_id == op_id, condicion_version(OpORM.version, versiones))
 
-    result = await db_session.execute(update_stmt)
-    updated_id = result.scalar_one_or_none()
+    if update_data:
+        stmt = update(OpORM).where(*condicion).values(**update_data).returning(OpORM.version)
+    else:
+        # Sin datos para actualizar solo se valida la precondición
+        stmt = select(OpORM.version).where(*condicion)
 
-    if updated_id is None:
+    if (await db_session.execute(stmt)).scalar_one_or_none() is None:
+        # 2. O no existe o alguien la modificó después del GET del cliente
         await db_session.rollback()
-        raise HTTPException(status_code=404, detail="OP no encontrada")
+        version_actual = (await db_session.execute(
+            select(OpORM.version).where(OpORM.op_id == op_id)
+        )).scalar_one_or_none()
+        if version_actual is None:
+            raise HTTPException(status_code=404, detail="OP no encontrada")
+        raise precondicion_fallida(version_actual)
 
     await db_session.commit()
+    await cache_respuestas.invalidar(f"op:{op_id}")
 
-    # 2. Devolver el objeto completamente cargado
+    # 3. Devolver el objeto completamente cargado (con la nueva ETag)
     return await read_op(op_id=op_id, db_session=db_session)
 
 
@@ -216,4 +357,5 @@ async def delete_op(
         raise HTTPException(status_code=404, detail="OP no encontrada")
         
     await db_session.commit()
+    await cache_respuestas.invalidar(f"op:{op_id}")
     return
\ No newline at end of file
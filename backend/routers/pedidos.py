@@ -1,16 +1,21 @@
 # backend/routers/pedidos.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 # CORRECCIÓN: selectinload debe venir de sqlalchemy.orm
-from sqlalchemy import select, delete, func
+from sqlalchemy import select, delete, func, update, exists
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from sqlalchemy.orm import selectinload
 
 from backend.database import get_db_session
 from backend.models.maestros import PedidoORM, ClienteORM, OpORM
+from backend.models.archivo import OpArchivoORM
 from backend.core.numeracion import generar_siguiente_numero
-from backend.schemas.maestros import PedidoCreate, Pedido, PaginatedPedidos, PedidoUpdate
+from backend.schemas.maestros import PedidoCreate, Pedido, PaginatedPedidos, PedidoUpdate, PedidoImport
+from backend.schemas.importacion import FormatoImportacion, ResultadoImportacion
+from backend.core.importacion import importar, cargar_pedidos
+from backend.core.cache import cache_respuestas
+from backend.core.versiones import etag, versiones_if_match, condicion_version, precondicion_fallida
 
 router = APIRouter(
     prefix="/pedidos",
@@ -59,6 +64,19 @@ async def create_pedido(
     
     return db_pedido_loaded
 
+# ENDPOINT: IMPORTACIÓN MASIVA (CSV / NDJSON)
+@router.post("/importar", response_model=ResultadoImportacion)
+async def importar_pedidos(
+    archivo: UploadFile = File(..., description="Archivo CSV (con encabezado) o NDJSON con los pedidos."),
+    formato: FormatoImportacion = FormatoImportacion.CSV,
+    db_session: AsyncSession = Depends(get_db_session)
+):
+    """
+    Importa pedidos en bloques (COPY a staging + upsert por numero_pedido_externo).
+    Los pedidos sin número reciben uno del numerador. Se devuelve un reporte de errores por fila.
+    """
+    return await importar(db_session, archivo, formato, PedidoImport, cargar_pedidos)
+
 
 # ENDPOINT: READ ALL
 @router.get("/", response_model=PaginatedPedidos)
@@ -97,7 +115,11 @@ async def read_pedidos(
 # ENDPOINT: READ BY ID
 @router.get("/{pedido_id}", response_model=Pedido)
 async def read_pedido(pedido_id: int, db_session: AsyncSession = Depends(get_db_session)):
-    """Obtiene un pedido específico por su ID, incluyendo datos del cliente."""
+    """Obtiene un pedido específico por su ID, incluyendo datos del cliente (servido desde la cache si está)."""
+    clave = f"pedido:{pedido_id}"
+    cacheada, generacion = await cache_respuestas.leer(clave)
+    if cacheada is not None:
+        return cacheada
     
     result = await db_session.execute(
         select(PedidoORM)
@@ -109,34 +131,43 @@ async def read_pedido(pedido_id: int, db_session: AsyncSession = Depends(get_db_
     if db_pedido is None:
         raise HTTPException(status_code=404, detail="Pedido no encontrado")
         
-    return db_pedido
+    etiquetas = {clave, f"cliente:{db_pedido.cliente_id}"}
+    return await cache_respuestas.guardar(
+        clave, Pedido.model_validate(db_pedido), etiquetas, generacion, encabezados={"ETag": etag(db_pedido.version)}
+    )
 
 # ENDPOINT: UPDATE
 @router.put("/{pedido_id}", response_model=Pedido)
 async def update_pedido(
     pedido_id: int,
     pedido_data: PedidoUpdate,
+    versiones: Optional[list[int]] = Depends(versiones_if_match),
     db_session: AsyncSession = Depends(get_db_session)
 ):
-    """Modifica los campos editables de un pedido existente."""
-    
-    result = await db_session.execute(
-        select(PedidoORM).where(PedidoORM.pedido_id == pedido_id)
-    )
-    db_pedido = result.scalar_one_or_none()
-    
-    if db_pedido is None:
-        raise HTTPException(status_code=404, detail="Pedido no encontrado")
+    """Modifica los campos editables de un pedido existente (requiere If-Match con la ETag del GET)."""
 
+    # 1. Un solo UPDATE condicionado a la versión: sin lock ni lectura previa
+    condicion = (PedidoORM.pedido_id == pedido_id, condicion_version(PedidoORM.version, versiones))
     update_data = pedido_data.model_dump(exclude_unset=True)
-    
-    for key, value in update_data.items():
-        setattr(db_pedido, key, value)
-        
+    if update_data:
+        stmt = update(PedidoORM).where(*condicion).values(**update_data).returning(PedidoORM.version)
+    else:
+        stmt = select(PedidoORM.version).where(*condicion)
+    if (await db_session.execute(stmt)).scalar_one_or_none() is None:
+        # 2. No se tocó ninguna fila: o no existe o la versión ya no es la del cliente
+        await db_session.rollback()
+        version_actual = (await db_session.execute(
+            select(PedidoORM.version).where(PedidoORM.pedido_id == pedido_id)
+        )).scalar_one_or_none()
+        if version_actual is None:
+            raise HTTPException(status_code=404, detail="Pedido no encontrado")
+        raise precondicion_fallida(version_actual)
+
     await db_session.commit()
-    await db_session.refresh(db_pedido)
-    
-    return db_pedido
+    await cache_respuestas.invalidar(f"pedido:{pedido_id}")
+
+    # 3. Se responde igual que el GET, con la nueva ETag
+    return await read_pedido(pedido_id, db_session)
 
 # ENDPOINT: DELETE
 @router.delete("/{pedido_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -147,11 +178,15 @@ async def delete_pedido(
     """Elimina un pedido solo si no tiene Órdenes de Producción (OP) asignadas."""
     
     # 1. VERIFICAR SI EXISTEN ÓRDENES DE PRODUCCIÓN ASIGNADAS
+    #    (también las archivadas: el archivo conserva la referencia al pedido)
     op_asignada = await db_session.execute(
-        select(OpORM).where(OpORM.pedido_id == pedido_id)
+        select(
+            exists().where(OpORM.pedido_id == pedido_id)
+            | exists().where(OpArchivoORM.pedido_id == pedido_id)
+        )
     )
     
-    if op_asignada.first():
+    if op_asignada.scalar():
         raise HTTPException(
             status_code=400, 
             detail="No se puede eliminar el pedido. Tiene Órdenes de Producción (OP) asignadas."
@@ -166,4 +201,5 @@ async def delete_pedido(
         raise HTTPException(status_code=404, detail="Pedido no encontrado")
         
     await db_session.commit()
+    await cache_respuestas.invalidar(f"pedido:{pedido_id}")
     return 
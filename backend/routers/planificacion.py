@@ -0,0 +1,285 @@
+# backend/routers/planificacion.py
+
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional, List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, delete, func, insert, update, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import AsyncSessionLocal, get_db_session
+from backend.models.maestros import LoteORM, OpORM, PedidoORM
+from backend.models.auxiliares import RutaDetalleORM, PuestoTrabajoORM
+from backend.models.planificacion import PlanificacionCorridaORM, PlanificacionLoteORM, PlanificacionOperacionORM
+from backend.schemas.maestros import EstadoLote
+from backend.schemas.planificacion import (
+    PlanificacionCorrida, PaginatedPlanificacionLotes, PlanificacionLote, PlanificacionOperacion, PlanificacionDeLote
+)
+from backend.core.planificacion import calcular_plan_en_pool
+from backend.core.importacion import copiar_registros
+from backend.core.trabajos import ContextoTrabajo, registrar_tipo_trabajo
+
+router = APIRouter(
+    prefix="/planificacion",
+    tags=["Planificación"]
+)
+
+# --- CONFIGURACIÓN ---
+
+# Clave del advisory lock que serializa las corridas (una a la vez en todo el cluster)
+BLOQUEO_PLANIFICACION = 340_001
+# Corridas que se conservan; las más viejas se borran al guardar una nueva
+CORRIDAS_RETENIDAS = 5
+
+COLUMNAS_LOTES = [
+    "corrida_id", "lote_interno_id", "op_id", "orden", "inicio", "fin", "fecha_compromiso", "atraso_minutos",
+]
+COLUMNAS_OPERACIONES = [
+    "corrida_id", "lote_interno_id", "secuencia", "detalle_id", "puesto_id", "inicio", "fin",
+]
+
+# --- Funciones Auxiliares ---
+
+async def resolver_corrida(db_session: AsyncSession, corrida_id: Optional[int]) -> int:
+    """Devuelve la corrida indicada o la última; 404 si no hay ninguna."""
+    query = select(PlanificacionCorridaORM.corrida_id)
+    if corrida_id is not None:
+        query = query.where(PlanificacionCorridaORM.corrida_id == corrida_id)
+    else:
+        query = query.order_by(PlanificacionCorridaORM.corrida_id.desc()).limit(1)
+
+    encontrada = (await db_session.execute(query)).scalar_one_or_none()
+    if encontrada is None:
+        raise HTTPException(status_code=404, detail="Corrida de planificación no encontrada.")
+    return encontrada
+
+async def cargar_datos_planificacion(db_session: AsyncSession):
+    """Lee lotes abiertos, pasos de sus rutas y capacidades como tuplas simples (para el pool)."""
+
+    # 1. Lotes en espera o en proceso con su fecha de compromiso (la de la OP o, si falta, la del pedido)
+    abiertos = LoteORM.estado.in_([EstadoLote.EN_ESPERA.value, EstadoLote.EN_PROCESO.value])
+    lotes = [
+        tuple(fila) for fila in await db_session.execute(
+            select(
+                LoteORM.lote_interno_id,
+                LoteORM.op_id,
+                LoteORM.ruta_id,
+                func.coalesce(OpORM.fecha_estimada_entrega, PedidoORM.fecha_entrega_estimada),
+                LoteORM.secuencia_actual,
+                LoteORM.movimiento_actual,
+                LoteORM.fecha_movimiento_actual,
+            )
+            .join(OpORM, OpORM.op_id == LoteORM.op_id)
+            .outerjoin(PedidoORM, PedidoORM.pedido_id == OpORM.pedido_id)
+            .where(abiertos)
+        )
+    ]
+
+    # 2. Pasos de las rutas usadas por esos lotes, en orden de secuencia
+    rutas: dict[int, list[tuple]] = {}
+    pasos = await db_session.execute(
+        select(
+            RutaDetalleORM.ruta_id,
+            RutaDetalleORM.detalle_id,
+            RutaDetalleORM.puesto_id,
+            RutaDetalleORM.secuencia,
+            RutaDetalleORM.minutos_estandar,
+        )
+        .where(RutaDetalleORM.ruta_id.in_(select(LoteORM.ruta_id).where(abiertos).distinct()))
+        .order_by(RutaDetalleORM.ruta_id, RutaDetalleORM.secuencia)
+    )
+    for ruta_id, detalle_id, puesto_id, secuencia, minutos in pasos:
+        rutas.setdefault(ruta_id, []).append((detalle_id, puesto_id, secuencia, minutos))
+
+    # 3. Capacidad de cada puesto
+    capacidades = dict(
+        (await db_session.execute(select(PuestoTrabajoORM.puesto_trabajo_id, PuestoTrabajoORM.capacidad))).all()
+    )
+
+    return lotes, rutas, capacidades
+
+async def ejecutar_corrida(
+    db_session: AsyncSession,
+    progreso: Optional[Callable[[int, str], Awaitable[None]]] = None,
+) -> int:
+    """
+    Planifica todos los lotes abiertos contra la capacidad de los puestos y guarda el resultado
+    (lo usan POST /planificacion/corridas y el trabajo 'planificacion'). Devuelve el corrida_id.
+    """
+    comienzo = time.perf_counter()
+
+    # 1. UNA SOLA CORRIDA A LA VEZ (el lock se libera con el commit/rollback)
+    bloqueado = (await db_session.execute(
+        text("SELECT pg_try_advisory_xact_lock(:clave)"), {"clave": BLOQUEO_PLANIFICACION}
+    )).scalar_one()
+    if not bloqueado:
+        raise HTTPException(status_code=409, detail="Ya hay una planificación en curso.")
+
+    try:
+        # 2. CARGAR DATOS Y REGISTRAR LA CORRIDA
+        inicio = datetime.now(timezone.utc)
+        lotes, rutas, capacidades = await cargar_datos_planificacion(db_session)
+        corrida_id = (await db_session.execute(
+            insert(PlanificacionCorridaORM).values(inicio=inicio).returning(PlanificacionCorridaORM.corrida_id)
+        )).scalar_one()
+        if progreso is not None:
+            await progreso(20, f"{len(lotes)} lotes abiertos cargados.")
+
+        # 3. CALCULAR FUERA DEL EVENT LOOP
+        filas_lotes, filas_operaciones = await calcular_plan_en_pool(corrida_id, lotes, rutas, capacidades, inicio)
+        if progreso is not None:
+            await progreso(70, f"Plan calculado: {len(filas_operaciones)} operaciones.")
+
+        # 4. GUARDAR EL PLAN (COPY) Y EL RESUMEN
+        await copiar_registros(db_session, "planificacion_lotes", COLUMNAS_LOTES, filas_lotes)
+        await copiar_registros(db_session, "planificacion_operaciones", COLUMNAS_OPERACIONES, filas_operaciones)
+
+        await db_session.execute(
+            update(PlanificacionCorridaORM)
+            .where(PlanificacionCorridaORM.corrida_id == corrida_id)
+            .values(
+                fin_estimado=max((fila[5] for fila in filas_lotes), default=None),
+                lotes=len(filas_lotes),
+                operaciones=len(filas_operaciones),
+                lotes_atrasados=sum(1 for fila in filas_lotes if fila[7] > 0),
+                duracion_ms=int((time.perf_counter() - comienzo) * 1000),
+            )
+        )
+
+        # 5. DESCARTAR CORRIDAS VIEJAS (sus filas se borran en cascada)
+        await db_session.execute(
+            delete(PlanificacionCorridaORM)
+            .where(PlanificacionCorridaORM.corrida_id <= corrida_id - CORRIDAS_RETENIDAS)
+        )
+
+        await db_session.commit()
+    except Exception:
+        await db_session.rollback()
+        raise
+
+    return corrida_id
+
+async def trabajo_planificacion(contexto: ContextoTrabajo) -> dict:
+    """Trabajo en segundo plano 'planificacion': misma corrida, sin ocupar la solicitud."""
+    async with AsyncSessionLocal() as db_session:
+        corrida_id = await ejecutar_corrida(db_session, contexto.progreso)
+        corrida = await db_session.get(PlanificacionCorridaORM, corrida_id)
+        return PlanificacionCorrida.model_validate(corrida).model_dump(mode="json")
+
+# Si hay otra corrida en curso (409) se reintenta más tarde
+registrar_tipo_trabajo("planificacion", trabajo_planificacion, concurrencia=1, max_intentos=3, timeout_segundos=1800)
+
+# --- ENDPOINTS ---
+
+# ENDPOINT: CREATE (Ejecutar una corrida de planificación)
+@router.post("/corridas", response_model=PlanificacionCorrida, status_code=status.HTTP_201_CREATED)
+async def crear_corrida(db_session: AsyncSession = Depends(get_db_session)):
+    """
+    Planifica todos los lotes abiertos contra la capacidad de los puestos y guarda el resultado.
+    El cálculo corre en un proceso aparte; el plan se escribe con COPY y queda disponible
+    para lecturas rápidas hasta la próxima corrida. Con muchos lotes conviene encolarla como
+    trabajo (POST /trabajos/ con tipo 'planificacion') en lugar de esperar la respuesta.
+    """
+    try:
+        corrida_id = await ejecutar_corrida(db_session)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al calcular la planificación: {str(e)}")
+
+    result = await db_session.execute(
+        select(PlanificacionCorridaORM).where(PlanificacionCorridaORM.corrida_id == corrida_id)
+    )
+    return result.scalar_one()
+
+# ENDPOINT: READ ALL (Corridas conservadas, la más reciente primero)
+@router.get("/corridas", response_model=List[PlanificacionCorrida])
+async def read_corridas(db_session: AsyncSession = Depends(get_db_session)):
+    result = await db_session.execute(
+        select(PlanificacionCorridaORM).order_by(PlanificacionCorridaORM.corrida_id.desc())
+    )
+    return result.scalars().all()
+
+# ENDPOINT: READ Lotes planificados (orden de despacho)
+@router.get("/lotes", response_model=PaginatedPlanificacionLotes)
+async def read_lotes_planificados(
+    corrida_id: Optional[int] = None,
+    solo_atrasados: bool = False,
+    op_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db_session: AsyncSession = Depends(get_db_session)
+):
+    """Lotes de una corrida (por defecto la última) en orden de despacho."""
+    corrida_id = await resolver_corrida(db_session, corrida_id)
+
+    query = select(PlanificacionLoteORM).where(PlanificacionLoteORM.corrida_id == corrida_id)
+    if solo_atrasados:
+        query = query.where(PlanificacionLoteORM.atraso_minutos > 0)
+    if op_id is not None:
+        query = query.where(PlanificacionLoteORM.op_id == op_id)
+
+    total = (await db_session.execute(select(func.count()).select_from(query.subquery()))).scalar_one()
+
+    limit = min(limit, 1000)
+    result = await db_session.execute(query.order_by(PlanificacionLoteORM.orden).offset(skip).limit(limit))
+
+    return PaginatedPlanificacionLotes(corrida_id=corrida_id, total=total, data=result.scalars().all())
+
+# ENDPOINT: READ Plan de un lote
+@router.get("/lotes/{lote_interno_id}", response_model=PlanificacionDeLote)
+async def read_plan_lote(
+    lote_interno_id: int,
+    corrida_id: Optional[int] = None,
+    db_session: AsyncSession = Depends(get_db_session)
+):
+    corrida_id = await resolver_corrida(db_session, corrida_id)
+
+    lote = (await db_session.execute(
+        select(PlanificacionLoteORM).where(
+            PlanificacionLoteORM.corrida_id == corrida_id,
+            PlanificacionLoteORM.lote_interno_id == lote_interno_id,
+        )
+    )).scalar_one_or_none()
+    if lote is None:
+        raise HTTPException(status_code=404, detail="El lote no figura en la planificación.")
+
+    operaciones = await db_session.execute(
+        select(PlanificacionOperacionORM)
+        .where(
+            PlanificacionOperacionORM.corrida_id == corrida_id,
+            PlanificacionOperacionORM.lote_interno_id == lote_interno_id,
+        )
+        .order_by(PlanificacionOperacionORM.secuencia)
+    )
+
+    return PlanificacionDeLote(
+        **PlanificacionLote.model_validate(lote).model_dump(),
+        corrida_id=corrida_id,
+        operaciones=operaciones.scalars().all(),
+    )
+
+# ENDPOINT: READ Agenda de un puesto
+@router.get("/puestos/{puesto_id}", response_model=List[PlanificacionOperacion])
+async def read_agenda_puesto(
+    puesto_id: int,
+    corrida_id: Optional[int] = None,
+    desde: Optional[datetime] = None,
+    limit: int = 200,
+    db_session: AsyncSession = Depends(get_db_session)
+):
+    """Operaciones planificadas en un puesto, en orden cronológico."""
+    corrida_id = await resolver_corrida(db_session, corrida_id)
+
+    query = select(PlanificacionOperacionORM).where(
+        PlanificacionOperacionORM.corrida_id == corrida_id,
+        PlanificacionOperacionORM.puesto_id == puesto_id,
+    )
+    if desde is not None:
+        query = query.where(PlanificacionOperacionORM.fin > desde)
+
+    result = await db_session.execute(
+        query.order_by(PlanificacionOperacionORM.inicio).limit(min(limit, 1000))
+    )
+    return result.scalars().all()
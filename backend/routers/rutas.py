@@ -2,15 +2,17 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, func
+from sqlalchemy import select, delete, func, and_
 from sqlalchemy.orm import joinedload
 
 from backend.database import get_db_session
 from backend.models.auxiliares import ProductoORM, PuestoTrabajoORM, RutaMaestraORM, RutaDetalleORM
+from backend.models.movimientos import PuestoColaORM, PuestoProduccionDiariaORM
 from backend.schemas.auxiliares import (
     Producto, ProductoCreate, PuestoTrabajo, PuestoTrabajoCreate, PuestoTrabajoUpdate,
-    RutaMaestra, RutaMaestraCreate
+    RutaMaestra, RutaMaestraCreate, RutaCompilada, ColaPuesto
 )
+from backend.core.rutas import compilar_rutas
 
 router = APIRouter(
     prefix="/produccion",
@@ -92,6 +94,47 @@ async def read_puestos_trabajo(db_session: AsyncSession = Depends(get_db_session
     result = await db_session.execute(select(PuestoTrabajoORM).order_by(PuestoTrabajoORM.nombre))
     return result.scalars().all()
 
+# --- Consulta de colas (WIP) ---
+def query_colas_puestos():
+    """Puestos con sus contadores de cola y producción del día (sin recorrer lotes ni movimientos)."""
+    return (
+        select(
+            PuestoTrabajoORM.puesto_trabajo_id,
+            PuestoTrabajoORM.nombre,
+            func.coalesce(PuestoColaORM.en_espera, 0).label("en_espera"),
+            func.coalesce(PuestoColaORM.en_proceso, 0).label("en_proceso"),
+            func.coalesce(PuestoProduccionDiariaORM.terminados, 0).label("terminados_hoy"),
+        )
+        .outerjoin(PuestoColaORM, PuestoColaORM.puesto_id == PuestoTrabajoORM.puesto_trabajo_id)
+        .outerjoin(
+            PuestoProduccionDiariaORM,
+            and_(
+                PuestoProduccionDiariaORM.puesto_id == PuestoTrabajoORM.puesto_trabajo_id,
+                PuestoProduccionDiariaORM.fecha == func.current_date()
+            )
+        )
+    )
+
+# ENDPOINT: TABLERO DE COLAS (Todos los puestos)
+@router.get("/puestos-trabajo/cola", response_model=list[ColaPuesto])
+async def read_colas_puestos(db_session: AsyncSession = Depends(get_db_session)):
+    """Obtiene, para cada puesto, los lotes en espera, en proceso y terminados hoy."""
+    result = await db_session.execute(query_colas_puestos().order_by(PuestoTrabajoORM.nombre))
+    return [ColaPuesto(**fila._mapping) for fila in result.all()]
+
+# ENDPOINT: COLA DE UN PUESTO
+@router.get("/puestos-trabajo/{puesto_id}/cola", response_model=ColaPuesto)
+async def read_cola_puesto(puesto_id: int, db_session: AsyncSession = Depends(get_db_session)):
+    """Obtiene los lotes en espera, en proceso y terminados hoy de un puesto de trabajo."""
+    result = await db_session.execute(
+        query_colas_puestos().where(PuestoTrabajoORM.puesto_trabajo_id == puesto_id)
+    )
+    cola = result.one_or_none()
+
+    if cola is None:
+        raise HTTPException(status_code=404, detail="Puesto de Trabajo no encontrado")
+    return ColaPuesto(**cola._mapping)
+
 # ENDPOINT: READ BY ID Puesto
 @router.get("/puestos-trabajo/{puesto_id}", response_model=PuestoTrabajo)
 async def read_puesto_trabajo(puesto_id: int, db_session: AsyncSession = Depends(get_db_session)):
@@ -110,7 +153,7 @@ async def update_puesto_trabajo(
     puesto_data: PuestoTrabajoUpdate,
     db_session: AsyncSession = Depends(get_db_session)
 ):
-    """Modifica el nombre y/o la descripción de un puesto de trabajo existente."""
+    """Modifica el nombre, la descripción y/o la capacidad de un puesto de trabajo existente."""
     result = await db_session.execute(select(PuestoTrabajoORM).where(PuestoTrabajoORM.puesto_trabajo_id == puesto_id))
     db_puesto = result.scalar_one_or_none()
     
@@ -123,6 +166,10 @@ async def update_puesto_trabajo(
         setattr(db_puesto, key, value)
         
     try:
+        # El nombre del puesto forma parte de las rutas compiladas que lo usan
+        if "nombre" in update_data:
+            await db_session.flush()
+            await compilar_rutas(db_session, puesto_id=puesto_id)
         await db_session.commit()
         await db_session.refresh(db_puesto)
     except Exception as e:
@@ -181,20 +228,25 @@ async def create_ruta_maestra(
         db_paso = RutaDetalleORM(
             ruta_id=db_ruta.ruta_id,
             puesto_id=paso_data.puesto_id,
-            secuencia=paso_data.secuencia
+            secuencia=paso_data.secuencia,
+            minutos_estandar=paso_data.minutos_estandar
         )
         db_session.add(db_paso)
         
     try:
+        # 4. Compilar la ruta (arreglos de pasos + versión) en la misma transacción
+        await db_session.flush()
+        await compilar_rutas(db_session, ruta_ids=[db_ruta.ruta_id])
         await db_session.commit()
     except Exception as e:
         await db_session.rollback()
         raise HTTPException(status_code=400, detail="El nombre de la ruta ya existe o hay un error de datos.")
 
-    # 4. Recargar y devolver la ruta completa con todas las relaciones cargadas
+    # 5. Recargar y devolver la ruta completa con todas las relaciones cargadas
     result = await db_session.execute(
         select(RutaMaestraORM)
         .where(RutaMaestraORM.ruta_id == db_ruta.ruta_id)
+        .execution_options(populate_existing=True)
         .options(
             joinedload(RutaMaestraORM.producto),
             joinedload(RutaMaestraORM.detalles).joinedload(RutaDetalleORM.puesto_trabajo)
@@ -214,4 +266,14 @@ async def read_rutas_maestras(db_session: AsyncSession = Depends(get_db_session)
             joinedload(RutaMaestraORM.detalles).joinedload(RutaDetalleORM.puesto_trabajo)
         )
     )
-    return result.scalars().unique().all()
\ No newline at end of file
+    return result.scalars().unique().all()
+
+# ENDPOINT: READ Ruta compilada (una sola fila, sin pasos ni puestos)
+@router.get("/rutas/{ruta_id}/compilada", response_model=RutaCompilada)
+async def read_ruta_compilada(ruta_id: int, db_session: AsyncSession = Depends(get_db_session)):
+    """Obtiene la representación compilada de una ruta: arreglos de pasos ordenados y su versión."""
+    result = await db_session.execute(select(RutaMaestraORM).where(RutaMaestraORM.ruta_id == ruta_id))
+    db_ruta = result.scalar_one_or_none()
+    if db_ruta is None:
+        raise HTTPException(status_code=404, detail="Ruta Maestra no encontrada.")
+    return db_ruta
@@ -0,0 +1,31 @@
+# backend/routers/salud.py
+
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from backend.core.salud import estado_salud
+
+router = APIRouter(
+    prefix="/health",
+    tags=["Salud"]
+)
+
+# ENDPOINT: Liveness (el proceso y su event loop responden)
+@router.get("/live")
+async def read_live():
+    """Si esta solicitud se atiende, el worker está vivo. No consulta la base."""
+    return {"estado": "vivo"}
+
+# ENDPOINT: Readiness (el worker puede recibir tráfico)
+@router.get("/ready")
+async def read_ready():
+    """
+    200 si el arranque terminó, la última medición de la base es reciente y rápida, el pool no
+    está saturado y el event loop no está trabado; 503 en caso contrario (el balanceador deja de
+    enviarle tráfico). Solo lee valores en memoria: se puede consultar cada segundo.
+    """
+    listo, chequeos = estado_salud.evaluar()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if listo else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"estado": "listo" if listo else "no_listo", "chequeos": chequeos},
+    )
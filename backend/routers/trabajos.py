@@ -0,0 +1,106 @@
+# backend/routers/trabajos.py
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import get_db_session
+from backend.models.trabajos import TrabajoORM
+from backend.schemas.trabajos import Trabajo, TrabajoCreate, TrabajoResultado, TipoTrabajo
+from backend.core.metricas import registrar_metricas_externas
+from backend.core.trabajos import ejecutor_trabajos, encolar_trabajo, obtener_tipo_trabajo, tipos_trabajo
+
+router = APIRouter(
+    prefix="/trabajos",
+    tags=["Trabajos"]
+)
+
+registrar_metricas_externas(
+    "federici_trabajos", "Trabajos en segundo plano", ejecutor_trabajos.estadisticas,
+    {"en_curso": "gauge", "completados": "counter", "fallidos": "counter", "reintentos": "counter"},
+)
+
+# --- Funciones Auxiliares ---
+
+async def obtener_trabajo(db_session: AsyncSession, trabajo_id: int) -> TrabajoORM:
+    trabajo = await db_session.get(TrabajoORM, trabajo_id)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado.")
+    return trabajo
+
+# --- ENDPOINTS ---
+
+# ENDPOINT: READ Tipos de trabajo registrados
+@router.get("/tipos", response_model=List[TipoTrabajo])
+async def read_tipos_trabajo():
+    return [
+        TipoTrabajo(
+            tipo=definicion.nombre,
+            concurrencia=definicion.concurrencia,
+            max_intentos=definicion.max_intentos,
+            timeout_segundos=definicion.timeout_segundos,
+        )
+        for definicion in tipos_trabajo()
+    ]
+
+# ENDPOINT: CREATE (Encolar un trabajo)
+@router.post("/", response_model=Trabajo, status_code=status.HTTP_202_ACCEPTED)
+async def create_trabajo(trabajo: TrabajoCreate, db_session: AsyncSession = Depends(get_db_session)):
+    """
+    Encola el trabajo y responde enseguida. El avance se consulta con GET /trabajos/{id}
+    y el resultado, al completarse, con GET /trabajos/{id}/resultado.
+    """
+    if obtener_tipo_trabajo(trabajo.tipo) is None:
+        raise HTTPException(status_code=400, detail=f"Tipo de trabajo desconocido: '{trabajo.tipo}'.")
+    return await encolar_trabajo(db_session, trabajo.tipo, trabajo.parametros)
+
+# ENDPOINT: READ ALL (Trabajos recientes, el más nuevo primero)
+@router.get("/", response_model=List[Trabajo])
+async def read_trabajos(
+    tipo: Optional[str] = None,
+    estado: Optional[str] = None,
+    limit: int = 50,
+    db_session: AsyncSession = Depends(get_db_session)
+):
+    query = select(TrabajoORM)
+    if tipo is not None:
+        query = query.where(TrabajoORM.tipo == tipo)
+    if estado is not None:
+        query = query.where(TrabajoORM.estado == estado)
+
+    result = await db_session.execute(query.order_by(TrabajoORM.trabajo_id.desc()).limit(min(limit, 500)))
+    return result.scalars().all()
+
+# ENDPOINT: READ (Estado y progreso de un trabajo)
+@router.get("/{trabajo_id}", response_model=Trabajo)
+async def read_trabajo(trabajo_id: int, db_session: AsyncSession = Depends(get_db_session)):
+    return await obtener_trabajo(db_session, trabajo_id)
+
+# ENDPOINT: READ Resultado de un trabajo completado
+@router.get("/{trabajo_id}/resultado", response_model=TrabajoResultado)
+async def read_resultado_trabajo(trabajo_id: int, db_session: AsyncSession = Depends(get_db_session)):
+    trabajo = await obtener_trabajo(db_session, trabajo_id)
+    if trabajo.estado == "fallido":
+        raise HTTPException(status_code=409, detail=f"El trabajo falló: {trabajo.error}")
+    if trabajo.estado != "completado":
+        raise HTTPException(status_code=409, detail=f"El trabajo todavía no terminó (estado: {trabajo.estado}).")
+    return trabajo
+
+# ENDPOINT: DELETE (Cancelar un trabajo pendiente)
+@router.delete("/{trabajo_id}", response_model=Trabajo)
+async def cancelar_trabajo(trabajo_id: int, db_session: AsyncSession = Depends(get_db_session)):
+    """Solo los pendientes: uno en curso ya está ejecutándose en algún worker."""
+    cancelado = (await db_session.execute(
+        update(TrabajoORM)
+        .where(TrabajoORM.trabajo_id == trabajo_id, TrabajoORM.estado == "pendiente")
+        .values(estado="cancelado")
+        .returning(TrabajoORM.trabajo_id)
+    )).scalar_one_or_none()
+    await db_session.commit()
+
+    trabajo = await obtener_trabajo(db_session, trabajo_id)
+    if cancelado is None:
+        raise HTTPException(status_code=409, detail=f"Solo se pueden cancelar trabajos pendientes (estado: {trabajo.estado}).")
+    return trabajo
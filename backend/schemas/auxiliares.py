@@ -1,6 +1,6 @@
 # backend/schemas/auxiliares.py
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional
 
 # --- Productos ---
@@ -19,6 +19,7 @@ class Producto(ProductoBase):
 class PuestoTrabajoBase(BaseModel):
     nombre: str = Field(..., max_length=100)
     descripcion: Optional[str] = None
+    capacidad: int = Field(1, ge=1, le=1000, description="Lotes que el puesto procesa en paralelo.")
 
 class PuestoTrabajoCreate(PuestoTrabajoBase):
     pass
@@ -31,6 +32,15 @@ class PuestoTrabajo(PuestoTrabajoBase):
 class PuestoTrabajoUpdate(BaseModel):
     nombre: Optional[str] = None
     descripcion: Optional[str] = None 
+    capacidad: Optional[int] = Field(None, ge=1, le=1000)
+
+# Cola de trabajo (WIP) de un puesto, leída de los contadores precalculados
+class ColaPuesto(BaseModel):
+    puesto_trabajo_id: int
+    nombre: str
+    en_espera: int = 0
+    en_proceso: int = 0
+    terminados_hoy: int = 0
 
 
 # --- Rutas y Pasos ---
@@ -38,6 +48,7 @@ class PuestoTrabajoUpdate(BaseModel):
 class RutaDetalleBase(BaseModel):
     puesto_id: int = Field(..., description="ID del Puesto de Trabajo donde se realiza el paso.")
     secuencia: int = Field(..., ge=1, description="Orden secuencial del paso dentro de la ruta.")
+    minutos_estandar: int = Field(60, ge=0, description="Tiempo estándar del paso por lote, en minutos.")
 
 class RutaDetalle(RutaDetalleBase):
     detalle_id: int
@@ -53,17 +64,52 @@ class RutaMaestraCreate(BaseModel):
     producto_id: int
     pasos: list[RutaDetalleBase] 
 
+    @model_validator(mode="after")
+    def validar_secuencias(self):
+        # La ruta se valida una sola vez al crearla: secuencias 1..n sin repetir ni saltear
+        secuencias = sorted(paso.secuencia for paso in self.pasos)
+        repetidas = sorted({s for s in secuencias if secuencias.count(s) > 1})
+        if repetidas:
+            raise ValueError(f"Secuencias repetidas en los pasos: {repetidas}.")
+        if secuencias != list(range(1, len(secuencias) + 1)):
+            raise ValueError("Las secuencias de los pasos deben ser consecutivas empezando en 1.")
+        return self
+
 # Esquema para la Ruta Maestra (OUTPUT)
 class RutaMaestra(BaseModel):
     ruta_id: int
     nombre_ruta: str
     producto_id: int
+    version: int = 0
     producto: "Producto" 
     detalles: list[RutaDetalle] 
 
     class Config:
         from_attributes = True
 
+# Paso de una ruta compilada
+class PasoCompilado(BaseModel):
+    detalle_id: int
+    secuencia: int
+    puesto_id: int
+    nombre_puesto: str
+    minutos_estandar: int
+
+# Ruta compilada: arreglos paralelos ordenados por secuencia, leídos de una sola fila
+class RutaCompilada(BaseModel):
+    ruta_id: int
+    nombre_ruta: str
+    producto_id: int
+    version: int
+    pasos_detalle_ids: list[int] = Field(default_factory=list)
+    pasos_secuencias: list[int] = Field(default_factory=list)
+    pasos_puesto_ids: list[int] = Field(default_factory=list)
+    pasos_nombres: list[str] = Field(default_factory=list)
+    pasos_minutos: list[int] = Field(default_factory=list)
+
+    class Config:
+        from_attributes = True
+
 # CLAVE: Forward references (para que PuestoTrabajo encuentre Producto y viceversa en el runtime)
 RutaDetalle.model_rebuild()
 RutaMaestra.model_rebuild()
\ No newline at end of file
@@ -0,0 +1,24 @@
+# backend/schemas/importacion.py
+
+from pydantic import BaseModel, Field
+from typing import List
+from enum import Enum
+
+# --- Formatos aceptados por los endpoints de importación ---
+class FormatoImportacion(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+# Error de una fila concreta del archivo importado
+class ErrorImportacion(BaseModel):
+    fila: int = Field(..., description="Número de fila (CSV) o línea (NDJSON) en el archivo original.")
+    detalle: str
+
+# Resultado de una importación masiva
+class ResultadoImportacion(BaseModel):
+    filas_leidas: int = 0
+    insertados: int = 0
+    actualizados: int = 0
+    total_errores: int = 0
+    # Se informan como máximo MAX_ERRORES_REPORTADOS errores (ver core/importacion.py)
+    errores: List[ErrorImportacion] = Field(default_factory=list)
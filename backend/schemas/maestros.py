@@ -1,11 +1,11 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator, computed_field
 from typing import Optional, List
 from datetime import date
 from enum import IntEnum
 
 # Importar schemas que se anidan desde auxiliares
 # NOTA: Asegúrate de que este archivo y las clases RutaMaestra y Producto existan en ese path
-from ..schemas.auxiliares import RutaMaestra, Producto 
+from ..schemas.auxiliares import RutaMaestra, RutaCompilada, Producto 
 
 # --- Clientes ---
 class ClienteCreate(BaseModel):
@@ -25,6 +25,10 @@ class PaginatedClientes(BaseModel):
     pagina_actual: int
     tamanio_pagina: int
 
+# Fila de importación masiva: si trae cliente_id se actualiza ese cliente, si no se inserta uno nuevo
+class ClienteImport(ClienteCreate):
+    cliente_id: Optional[int] = Field(None, description="ID del cliente a actualizar (opcional).")
+
 # --- Pedidos ---
 class PedidoCreate(BaseModel):
     cliente_id: int = Field(..., description="ID del cliente que realiza el pedido.")
@@ -37,6 +41,8 @@ class Pedido(PedidoCreate):
     numero_pedido_externo: str
     fecha: date 
     cliente: "Cliente" # Referencia de cadena para anidación
+    # Versión para If-Match en PUT (también va en el encabezado ETag)
+    version: int = 1
 
     class Config:
         from_attributes = True
@@ -52,6 +58,10 @@ class PedidoUpdate(BaseModel):
     detalle: Optional[str] = None
     observaciones: Optional[str] = None
 
+# Fila de importación masiva: si trae numero_pedido_externo se actualiza ese pedido, si no se numera uno nuevo
+class PedidoImport(PedidoCreate):
+    numero_pedido_externo: Optional[str] = Field(None, max_length=50, description="Número de pedido a actualizar (opcional).")
+
 
 # --- ENUMS PARA EL ESTADO DEL LOTE ---
 
@@ -59,7 +69,10 @@ class EstadoLote(IntEnum):
     EN_ESPERA = 1
     EN_PROCESO = 2
     LIBERADO = 3
-    
+
+# Máximo de lotes que se pueden mover en una sola solicitud masiva
+MAX_LOTES_MASIVO = 1000
+
 # --- ESQUEMAS PARA LOTES (BATCHES) ----------------------------------------------------
 
 # Esquema para la creación de un nuevo Lote (Input)
@@ -81,7 +94,15 @@ class Lote(LoteCreate):
     # Relaciones (Usamos Optional para que la OP sea el punto de entrada de la anidación)
     # op_asociada: Optional["OP"] = None # Removido para evitar bucle de anidación profunda
     producto: Optional["Producto"] = None 
-    ruta: Optional["RutaMaestra"] = None
+    # Ruta compilada (una fila, sin cargar pasos ni puestos)
+    ruta: Optional["RutaCompilada"] = None
+
+    # Posición actual en la ruta (ver GET /lotes/{id}/posicion)
+    puesto_actual_id: Optional[int] = None
+    secuencia_actual: Optional[int] = None
+
+    # Versión para If-Match en PUT (también va en el encabezado ETag)
+    version: int = 1
 
     class Config:
         from_attributes = True
@@ -91,6 +112,70 @@ class PaginatedLotes(BaseModel):
     total: int
     data: List[Lote]
 
+# Fila de la grilla de planta (modelo de lectura plano, ver models/grilla.py)
+class LoteGrilla(BaseModel):
+    lote_interno_id: int
+    lote_numero_visible: Optional[str] = None
+    estado: EstadoLote
+    op_id: int
+    numero_op_externo: str
+    pedido_id: Optional[int] = None
+    numero_pedido_externo: Optional[str] = None
+    cliente_id: Optional[int] = None
+    cliente_nombre: Optional[str] = None
+    producto_id: int
+    producto_nombre: str
+    ruta_id: int
+    ruta_nombre: str
+
+    class Config:
+        from_attributes = True
+
+# Página de la grilla: paginación por cursor (lote_interno_id descendente)
+class LotesGrilla(BaseModel):
+    data: List[LoteGrilla]
+    siguiente: Optional[int] = Field(None, description="Valor de 'antes_de' para pedir la página siguiente (None si no hay más).")
+
+# Esquema para el cambio de estado masivo de lotes (Input)
+class LoteEstadoMasivo(BaseModel):
+    lote_interno_ids: List[int] = Field(default_factory=list, description="IDs internos de los lotes a mover.")
+    lote_numeros_visibles: List[str] = Field(default_factory=list, description="Números visibles (QR/Etiqueta) de los lotes a mover.")
+    estado: EstadoLote = Field(..., description="Estado destino de los lotes.")
+    estado_esperado: Optional[EstadoLote] = Field(None, description="Si se indica, solo se mueven los lotes que estén en este estado.")
+
+    @model_validator(mode="after")
+    def validar_identificadores(self):
+        cantidad = len(self.lote_interno_ids) + len(self.lote_numeros_visibles)
+        if cantidad == 0:
+            raise ValueError("Debe indicar al menos un lote_interno_id o lote_numero_visible.")
+        if cantidad > MAX_LOTES_MASIVO:
+            raise ValueError(f"No se pueden mover más de {MAX_LOTES_MASIVO} lotes por solicitud.")
+        return self
+
+# Transición de estado de un lote individual (Input)
+class LoteTransicion(BaseModel):
+    estado_esperado: EstadoLote = Field(..., description="Estado en el que el cliente cree que está el lote.")
+    estado: EstadoLote = Field(..., description="Estado destino.")
+
+# Resultado de una transición aplicada (Output)
+class LoteTransicionResultado(BaseModel):
+    lote_interno_id: int
+    estado_anterior: EstadoLote
+    estado: EstadoLote
+
+# Lote encontrado pero no modificado por el cambio masivo
+class LoteEstadoOmitido(BaseModel):
+    lote_interno_id: int
+    lote_numero_visible: Optional[str] = None
+    estado_actual: EstadoLote
+
+# Resultado del cambio de estado masivo (Output)
+class LoteEstadoMasivoResultado(BaseModel):
+    actualizados: List[int] = Field(default_factory=list, description="IDs internos de los lotes que cambiaron de estado.")
+    omitidos: List[LoteEstadoOmitido] = Field(default_factory=list, description="Lotes existentes que no cumplían la condición de estado.")
+    ids_no_encontrados: List[int] = Field(default_factory=list)
+    numeros_no_encontrados: List[str] = Field(default_factory=list)
+
 # --- Órdenes de Producción (OP) ---
 class OPCreate(BaseModel):
     pedido_id: Optional[int] = Field(None, description="ID del pedido de cliente, si aplica.")
@@ -111,6 +196,22 @@ class OP(OPCreate):
     pedido: Optional["Pedido"] = None 
     lotes: List["Lote"] = Field(default_factory=list) # ¡AÑADIDO! Carga la lista de Lotes
 
+    # Progreso (contadores precalculados, no requieren cargar los lotes)
+    lotes_total: int = 0
+    lotes_en_espera: int = 0
+    lotes_en_proceso: int = 0
+    lotes_liberados: int = 0
+
+    # Versión para If-Match en PUT (también va en el encabezado ETag)
+    version: int = 1
+
+    @computed_field
+    @property
+    def porcentaje_liberado(self) -> float:
+        if not self.lotes_total:
+            return 0.0
+        return round(100 * self.lotes_liberados / self.lotes_total, 2)
+
     class Config:
         from_attributes = True
 
@@ -120,6 +221,17 @@ class PaginatedOP(BaseModel):
     pagina_actual: int
     tamanio_pagina: int
 
+# Lote creado junto con su OP (el op_id lo asigna el servidor)
+class LoteEnOPCreate(BaseModel):
+    lote_numero_visible: Optional[str] = Field(None, max_length=50, description="Número de lote visible (QR/Etiqueta).")
+    producto_id: int = Field(..., description="ID del Producto asociado.")
+    ruta_id: int = Field(..., description="ID de la Ruta Maestra asociada.")
+    estado: EstadoLote = Field(EstadoLote.EN_ESPERA, description="Estado inicial del lote.")
+
+# Alta atómica de una OP con todos sus lotes (Input)
+class OPConLotesCreate(OPCreate):
+    lotes: List[LoteEnOPCreate] = Field(..., min_length=1, max_length=MAX_LOTES_MASIVO, description="Lotes de la OP.")
+
 # --- REBUILDING PARA RESOLVER RELACIONES CIRCULARES ---
 # Esto es vital para que las referencias de cadena ("Pedido", "Lote") se resuelvan.
 Cliente.model_rebuild()
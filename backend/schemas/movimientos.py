@@ -0,0 +1,59 @@
+# backend/schemas/movimientos.py
+
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+from enum import IntEnum
+
+from backend.schemas.auxiliares import PasoCompilado
+
+# --- ENUM DE TIPOS DE MOVIMIENTO ---
+class TipoMovimiento(IntEnum):
+    INGRESO = 1  # El lote llega a la cola del puesto
+    INICIO = 2   # Comienza el trabajo en el puesto
+    FIN = 3      # Termina el trabajo en el puesto
+
+# Máximo de eventos por solicitud de registro
+MAX_MOVIMIENTOS_LOTE = 5000
+
+# Evento de escaneo (Input)
+class MovimientoCreate(BaseModel):
+    lote_interno_id: int
+    detalle_id: int = Field(..., description="Paso de la ruta (rutas_detalle) en el que se escaneó el lote.")
+    tipo: TipoMovimiento
+    fecha_hora: Optional[datetime] = Field(None, description="Momento del escaneo. Si no se indica se usa la hora del servidor.")
+
+# Lote de eventos a registrar (Input)
+class MovimientosCreate(BaseModel):
+    eventos: List[MovimientoCreate] = Field(..., min_length=1, max_length=MAX_MOVIMIENTOS_LOTE)
+
+# Resultado del registro (Output)
+class MovimientosResultado(BaseModel):
+    registrados: int
+    # Posiciones (base 0) de los eventos rechazados: lote inexistente o paso que no pertenece a su ruta
+    rechazados: List[int] = Field(default_factory=list)
+
+# Movimiento registrado (Output)
+class Movimiento(BaseModel):
+    movimiento_id: int
+    lote_interno_id: int
+    detalle_id: int
+    puesto_id: int
+    secuencia: int
+    tipo: TipoMovimiento
+    fecha_hora: datetime
+
+    class Config:
+        from_attributes = True
+
+# Posición actual de un lote (Output)
+class PosicionLote(BaseModel):
+    lote_interno_id: int
+    detalle_id: Optional[int] = None
+    puesto_id: Optional[int] = None
+    secuencia: Optional[int] = None
+    movimiento: Optional[TipoMovimiento] = None
+    fecha_hora: Optional[datetime] = None
+    # Siguiente paso según la ruta compilada (None si el lote está en el último)
+    ruta_version: Optional[int] = None
+    siguiente: Optional[PasoCompilado] = None
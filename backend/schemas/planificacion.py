@@ -0,0 +1,54 @@
+# backend/schemas/planificacion.py
+
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import date, datetime
+
+# Resumen de una corrida de planificación (Output)
+class PlanificacionCorrida(BaseModel):
+    corrida_id: int
+    fecha_hora: datetime
+    inicio: datetime
+    fin_estimado: Optional[datetime] = None
+    lotes: int
+    operaciones: int
+    lotes_atrasados: int
+    duracion_ms: int
+
+    class Config:
+        from_attributes = True
+
+# Lote planificado: orden de despacho, inicio/fin estimados y atraso contra su compromiso
+class PlanificacionLote(BaseModel):
+    lote_interno_id: int
+    op_id: int
+    orden: int
+    inicio: datetime
+    fin: datetime
+    fecha_compromiso: Optional[date] = None
+    atraso_minutos: int
+
+    class Config:
+        from_attributes = True
+
+class PaginatedPlanificacionLotes(BaseModel):
+    corrida_id: int
+    total: int
+    data: List[PlanificacionLote]
+
+# Operación planificada de un lote en un puesto
+class PlanificacionOperacion(BaseModel):
+    lote_interno_id: int
+    secuencia: int
+    detalle_id: int
+    puesto_id: int
+    inicio: datetime
+    fin: datetime
+
+    class Config:
+        from_attributes = True
+
+# Plan de un lote: resumen y sus operaciones en orden de ruta
+class PlanificacionDeLote(PlanificacionLote):
+    corrida_id: int
+    operaciones: List[PlanificacionOperacion]
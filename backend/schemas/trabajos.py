@@ -0,0 +1,47 @@
+# backend/schemas/trabajos.py
+
+from pydantic import BaseModel, Field
+from typing import Any, Optional
+from datetime import datetime
+
+# Alta de un trabajo en segundo plano (Input)
+class TrabajoCreate(BaseModel):
+    tipo: str = Field(..., max_length=50, description="Tipo registrado (ver GET /trabajos/tipos).")
+    parametros: dict[str, Any] = Field(default_factory=dict, description="Parámetros propios del tipo.")
+
+# Estado y avance de un trabajo (Output; el resultado se pide aparte)
+class Trabajo(BaseModel):
+    trabajo_id: int
+    tipo: str
+    estado: str
+    parametros: dict[str, Any]
+    progreso: int
+    mensaje: Optional[str] = None
+    error: Optional[str] = None
+    intentos: int
+    max_intentos: int
+    creado: datetime
+    disponible_desde: datetime
+    iniciado: Optional[datetime] = None
+    finalizado: Optional[datetime] = None
+    worker: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+# Resultado de un trabajo completado
+class TrabajoResultado(BaseModel):
+    trabajo_id: int
+    tipo: str
+    finalizado: datetime
+    resultado: Optional[dict[str, Any]] = None
+
+    class Config:
+        from_attributes = True
+
+# Tipo de trabajo registrado y sus límites
+class TipoTrabajo(BaseModel):
+    tipo: str
+    concurrencia: int
+    max_intentos: int
+    timeout_segundos: Optional[float] = None
@@ -0,0 +1,89 @@
+# backend/servidor.py
+#
+# Arranque de producción (lo usa el Dockerfile): uvicorn con varios workers, uvloop y httptools.
+#
+#   python -m backend.servidor                     # WEB_CONCURRENCY workers (por defecto, uno por CPU)
+#   python -m backend.servidor --workers 4 --port 8000
+#
+# Cada worker es un proceso con su propio event loop, pool de conexiones, bus de eventos y
+# cache. El pool de cada uno sale de DB_CONEXIONES_MAX / workers (ver database.py), así que
+# el total de conexiones no crece al agregar workers. Al recibir SIGTERM uvicorn deja de
+# aceptar conexiones, espera las solicitudes en curso hasta WEB_TIMEOUT_APAGADO (los streams
+# SSE se cortan ahí) y recién entonces corre el shutdown del lifespan, que cierra el engine.
+# Para desarrollo sigue sirviendo 'uvicorn main:app --reload' (docker-compose.yml).
+
+import argparse
+import importlib.util
+import logging
+import os
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURACIÓN ---
+
+HOST = os.getenv("WEB_HOST", "0.0.0.0")
+PUERTO = int(os.getenv("WEB_PORT", "8000"))
+# Workers (procesos); uvicorn y database.py leen la misma variable
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "0")) or os.cpu_count() or 1
+# Segundos que se esperan las solicitudes en curso al apagar
+TIMEOUT_APAGADO_SEGUNDOS = int(os.getenv("WEB_TIMEOUT_APAGADO", "30"))
+# Segundos que una conexión keep-alive ociosa queda abierta (más que el idle timeout del balanceador)
+KEEPALIVE_SEGUNDOS = int(os.getenv("WEB_KEEPALIVE", "75"))
+# Conexiones pendientes de accept en el socket compartido
+BACKLOG = int(os.getenv("WEB_BACKLOG", "2048"))
+# Conexiones simultáneas por worker antes de responder 503 (0 = sin tope)
+LIMITE_CONCURRENCIA = int(os.getenv("WEB_LIMITE_CONCURRENCIA", "0"))
+# IPs del proxy/balanceador de las que se aceptan X-Forwarded-For / X-Forwarded-Proto
+IPS_PROXY = os.getenv("WEB_IPS_PROXY", "127.0.0.1")
+# El log de acceso de uvicorn duplica el de core/instrumentacion.py
+LOG_ACCESO = os.getenv("WEB_LOG_ACCESO", "0") == "1"
+
+
+def _implementacion(modulo: str, preferida: str, alternativa: str) -> str:
+    # uvloop y httptools vienen con uvicorn[standard]; sin ellos se sigue con las implementaciones puras
+    if importlib.util.find_spec(modulo) is not None:
+        return preferida
+    logger.warning("%s no está instalado: se usa '%s'.", modulo, alternativa)
+    return alternativa
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor de producción de la API.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PUERTO)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    # Los workers heredan el entorno: database.py reparte el presupuesto de conexiones entre ellos
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    from backend.database import CONEXIONES_DEDICADAS_POR_WORKER, MAX_OVERFLOW, POOL_SIZE
+
+    logger.info(
+        "Arrancando %d workers: pool de %d + %d overflow por worker (hasta %d conexiones a la base en total).",
+        args.workers, POOL_SIZE, MAX_OVERFLOW,
+        args.workers * (POOL_SIZE + MAX_OVERFLOW + CONEXIONES_DEDICADAS_POR_WORKER),
+    )
+
+    uvicorn.run(
+        "backend.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=_implementacion("uvloop", "uvloop", "asyncio"),
+        http=_implementacion("httptools", "httptools", "h11"),
+        backlog=BACKLOG,
+        timeout_keep_alive=KEEPALIVE_SEGUNDOS,
+        timeout_graceful_shutdown=TIMEOUT_APAGADO_SEGUNDOS,
+        limit_concurrency=LIMITE_CONCURRENCIA or None,
+        proxy_headers=True,
+        forwarded_allow_ips=IPS_PROXY,
+        access_log=LOG_ACCESO,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# backend/tests/conftest.py
+#
+# Las pruebas corren contra una base propia (DB_NAME_PRUEBAS, por defecto 'federici_pruebas'),
+# nunca contra la de DB_NAME: se crea si no existe, se le aplica el DDL de arranque y cada
+# prueba borra al terminar las filas que creó. De la app solo se usan los routers (httpx +
+# ASGITransport, sin servidor): no se corre el lifespan, así que no arrancan el ejecutor de
+# trabajos (que tomaría trabajos pendientes como 'archivado'), el bus de cambios ni la salud.
+# Si el servidor de PostgreSQL no responde, las pruebas que usan la base se saltean. Uso:
+#
+#   python -m pytest -q backend/tests        (desde la raíz del repositorio)
+
+import asyncio
+import os
+import uuid
+from collections import defaultdict
+
+# Antes de importar backend.database: el engine se arma con DB_NAME al importarse
+os.environ["DB_NAME"] = os.getenv("DB_NAME_PRUEBAS", "federici_pruebas")
+
+import asyncpg
+import httpx
+import pytest
+from sqlalchemy import text
+
+from backend import database
+from backend.schemas.maestros import EstadoLote
+
+
+@pytest.fixture(scope="session")
+def runner():
+    """
+    Un solo event loop para toda la sesión: el engine y los singletons de core/ quedan atados
+    al loop en el que se usaron por primera vez. Las pruebas corren sus corutinas con runner.run(...).
+    """
+    with asyncio.Runner() as runner:
+        yield runner
+
+
+async def _preparar_base() -> None:
+    """Crea la base de pruebas si falta, le aplica create_all + registrar_ddl y carga el numerador."""
+    conexion = await asyncpg.connect(
+        host=database.DB_HOST, port=int(database.DB_PORT), user=database.DB_USER,
+        password=database.DB_PASS, database="postgres", timeout=5,
+    )
+    try:
+        existe = await conexion.fetchval("SELECT 1 FROM pg_database WHERE datname = $1", database.DB_NAME)
+        if not existe:
+            await conexion.execute(f'CREATE DATABASE "{database.DB_NAME}"')
+    finally:
+        await conexion.close()
+
+    from backend.main import create_db_and_tables
+    await create_db_and_tables()
+    # La fila del numerador se carga a mano en cada instalación (ver benchmarks/sembrar.py)
+    async with database.engine.begin() as conn:
+        await conn.execute(text(
+            "INSERT INTO numeradores (id, ultimo_pedido, ultima_op) VALUES (1, 0, 0) ON CONFLICT (id) DO NOTHING"
+        ))
+
+
+@pytest.fixture(scope="session")
+def base_pruebas(runner):
+    try:
+        runner.run(_preparar_base())
+    except (OSError, asyncpg.PostgresError) as e:
+        pytest.skip(f"Base de datos no disponible: {e}")
+    yield
+    runner.run(database.engine.dispose())
+
+
+@pytest.fixture(scope="session")
+def cliente(runner, base_pruebas):
+    from backend.main import app
+    cliente = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    yield cliente
+    runner.run(cliente.aclose())
+
+
+# Orden de borrado: hijos antes que padres (los movimientos caen con el lote)
+TABLAS_LIMPIEZA = (
+    ("lotes", "lote_interno_id"),
+    ("op", "op_id"),
+    ("pedidos", "pedido_id"),
+    ("clientes", "cliente_id"),
+    ("rutas_detalle", "ruta_id"),
+    ("rutas_maestras", "ruta_id"),
+    ("puestos_trabajo", "puesto_trabajo_id"),
+    ("productos", "producto_id"),
+)
+
+
+class Datos:
+    """Arma datos de prueba por la API y recuerda qué creó para borrarlo al final."""
+
+    def __init__(self, cliente: httpx.AsyncClient):
+        self.cliente = cliente
+        self.creados: dict[str, list[int]] = defaultdict(list)
+
+    async def _crear(self, tabla: str, url: str, cuerpo: dict, campo_id: str) -> dict:
+        respuesta = await self.cliente.post(url, json=cuerpo)
+        assert respuesta.status_code in (200, 201), respuesta.text
+        datos = respuesta.json()
+        self.creados[tabla].append(datos[campo_id])
+        return datos
+
+    async def op(self) -> dict:
+        """Cliente -> pedido -> OP."""
+        sufijo = uuid.uuid4().hex[:8]
+        cliente = await self._crear("clientes", "/clientes/", {"nombre": f"Test {sufijo}"}, "cliente_id")
+        pedido = await self._crear("pedidos", "/pedidos/", {"cliente_id": cliente["cliente_id"]}, "pedido_id")
+        return await self._crear("op", "/op/", {"pedido_id": pedido["pedido_id"]}, "op_id")
+
+    async def ruta(self) -> dict:
+        """Producto con una ruta de un paso."""
+        sufijo = uuid.uuid4().hex[:8]
+        producto = await self._crear("productos", "/produccion/productos/", {"nombre": f"P {sufijo}"}, "producto_id")
+        puesto = await self._crear(
+            "puestos_trabajo", "/produccion/puestos-trabajo/", {"nombre": f"PT {sufijo}"}, "puesto_trabajo_id"
+        )
+        ruta = await self._crear("rutas_maestras", "/produccion/rutas/", {
+            "nombre_ruta": f"R {sufijo}", "producto_id": producto["producto_id"],
+            "pasos": [{"puesto_id": puesto["puesto_trabajo_id"], "secuencia": 1}],
+        }, "ruta_id")
+        self.creados["rutas_detalle"].append(ruta["ruta_id"])
+        return ruta
+
+    async def lote(self, estado: EstadoLote = EstadoLote.EN_ESPERA, op: dict = None, ruta: dict = None) -> dict:
+        op = op or await self.op()
+        ruta = ruta or await self.ruta()
+        return await self._crear("lotes", "/lotes/", {
+            "op_id": op["op_id"], "producto_id": ruta["producto_id"], "ruta_id": ruta["ruta_id"],
+            "estado": estado.value,
+        }, "lote_interno_id")
+
+    async def limpiar(self) -> None:
+        async with database.engine.begin() as conn:
+            for tabla, columna in TABLAS_LIMPIEZA:
+                if self.creados.get(tabla):
+                    await conn.execute(
+                        text(f"DELETE FROM {tabla} WHERE {columna} = ANY(:ids)"), {"ids": self.creados[tabla]}
+                    )
+
+
+@pytest.fixture
+def datos(runner, cliente):
+    datos = Datos(cliente)
+    yield datos
+    runner.run(datos.limpiar())
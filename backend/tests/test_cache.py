@@ -0,0 +1,151 @@
+# backend/tests/test_cache.py
+#
+# Cache de respuestas (core/cache.py): LRU por bytes, invalidación por etiquetas y descarte de
+# escrituras leídas antes de una invalidación. Sin base de datos; el backend Redis se prueba
+# contra fakeredis (se saltea si no está instalado).
+
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from backend.core.cache import CacheMemoria, CacheRedis, CacheRespuestas
+
+TTL_SEGUNDOS = 60
+
+
+class Modelo(BaseModel):
+    id: int
+    nombre: str = "x"
+
+
+def crear_backend(nombre: str):
+    if nombre == "memoria":
+        return CacheMemoria(max_bytes=1024 * 1024, ttl_segundos=TTL_SEGUNDOS)
+    fakeredis = pytest.importorskip("fakeredis")
+    backend = CacheRedis("redis://localhost:6379/0", ttl_segundos=TTL_SEGUNDOS)
+    backend._redis = fakeredis.FakeAsyncRedis()
+    return backend
+
+
+async def guardar(cache: CacheRespuestas, clave: str, etiquetas: set[str]) -> None:
+    _, generacion = await cache.leer(clave)
+    await cache.guardar(clave, Modelo(id=1), etiquetas, generacion)
+
+
+async def en_cache(cache: CacheRespuestas, clave: str) -> bool:
+    respuesta, _ = await cache.leer(clave)
+    return respuesta is not None and respuesta.headers["X-Cache"] == "HIT"
+
+
+async def procesar_evento(cache: CacheRespuestas, evento: dict) -> None:
+    """Como lo hace el bus de cambios, y espera a que termine la invalidación en segundo plano."""
+    cache.invalidar_por_evento(evento)
+    await asyncio.gather(*cache._tareas)
+
+
+def test_lru_acotada_por_bytes():
+    async def prueba():
+        backend = CacheMemoria(max_bytes=300, ttl_segundos=TTL_SEGUNDOS)
+        valor = b"v" * 98  # 100 bytes por entrada contando la clave
+        for clave in ("k0", "k1"):
+            assert await backend.guardar(clave, valor, frozenset({clave}), 0)
+        # k0 se usa: la menos usada pasa a ser k1
+        assert await backend.obtener("k0") == valor
+        assert await backend.guardar("k2", valor, frozenset({"k2"}), 0)
+        assert await backend.guardar("k3", valor, frozenset({"k3"}), 0)
+
+        assert backend.bytes <= backend.max_bytes
+        assert await backend.obtener("k1") is None
+        assert await backend.obtener("k0") == valor
+        assert backend.expulsiones == 1
+        assert backend.entradas() == 3
+
+    asyncio.run(prueba())
+
+
+@pytest.mark.parametrize("nombre", ["memoria", "redis"])
+def test_lote_invalida_su_op(nombre):
+    async def prueba():
+        cache = CacheRespuestas(crear_backend(nombre))
+        await guardar(cache, "op:7", {"op:7"})
+        await guardar(cache, "op:8", {"op:8"})
+        await guardar(cache, "lote:31", {"lote:31", "ruta:2"})
+
+        await procesar_evento(cache, {"t": "lote", "a": "U", "id": 31, "op": 7})
+
+        assert not await en_cache(cache, "lote:31")
+        assert not await en_cache(cache, "op:7")
+        assert await en_cache(cache, "op:8")
+
+    asyncio.run(prueba())
+
+
+@pytest.mark.parametrize("nombre", ["memoria", "redis"])
+def test_cliente_invalida_sus_pedidos(nombre):
+    async def prueba():
+        cache = CacheRespuestas(crear_backend(nombre))
+        await guardar(cache, "cliente:3", {"cliente:3"})
+        await guardar(cache, "pedido:5", {"pedido:5", "cliente:3"})
+        await guardar(cache, "pedido:6", {"pedido:6", "cliente:4"})
+
+        await procesar_evento(cache, {"t": "cliente", "a": "U", "id": 3})
+
+        assert not await en_cache(cache, "cliente:3")
+        assert not await en_cache(cache, "pedido:5")
+        assert await en_cache(cache, "pedido:6")
+
+        # Lo que se vuelve a guardar después sigue alcanzable por la etiqueta
+        await guardar(cache, "pedido:5", {"pedido:5", "cliente:3"})
+        assert await en_cache(cache, "pedido:5")
+        await cache.invalidar("cliente:3")
+        assert not await en_cache(cache, "pedido:5")
+
+    asyncio.run(prueba())
+
+
+@pytest.mark.parametrize("nombre", ["memoria", "redis"])
+def test_descarta_escritura_leida_antes_de_invalidar(nombre):
+    async def prueba():
+        cache = CacheRespuestas(crear_backend(nombre))
+        # 1. Fallo de cache: se lee la base con esta generación...
+        _, generacion = await cache.leer("op:7")
+        # 2. ...mientras otra solicitud confirma un cambio de la OP
+        await cache.invalidar("op:7")
+        # 3. La respuesta se sirve igual, pero no queda guardada
+        respuesta = await cache.guardar("op:7", Modelo(id=7), {"op:7"}, generacion)
+
+        assert respuesta.headers["X-Cache"] == "MISS"
+        assert not await en_cache(cache, "op:7")
+        assert cache.descartados == 1 and cache.guardados == 0
+
+    asyncio.run(prueba())
+
+
+def test_redis_descarta_si_la_invalidacion_llega_durante_el_guardado():
+    async def prueba():
+        backend = crear_backend("redis")
+        cache = CacheRespuestas(backend)
+        _, generacion = await cache.leer("op:7")
+
+        # La invalidación entra entre el WATCH/GET de la generación y el EXEC
+        pipeline_original = backend._redis.pipeline
+
+        def pipeline_con_invalidacion(*args, **kwargs):
+            pipe = pipeline_original(*args, **kwargs)
+            execute = pipe.execute
+
+            async def execute_tardio(*a, **k):
+                if pipe.watching:
+                    await backend._redis.incr(backend._clave_generacion)
+                return await execute(*a, **k)
+
+            pipe.execute = execute_tardio
+            return pipe
+
+        backend._redis.pipeline = pipeline_con_invalidacion
+        assert not await backend.guardar("op:7", b"{}", frozenset({"op:7"}), generacion)
+        backend._redis.pipeline = pipeline_original
+        assert await backend.obtener("op:7") is None
+
+    asyncio.run(prueba())
@@ -0,0 +1,121 @@
+# backend/tests/test_coalescencia.py
+#
+# Coalescencia de GET idénticos (core/coalescencia.py) sobre una app ASGI mínima, sin base.
+
+import asyncio
+
+from backend.core import coalescencia
+from backend.core.coalescencia import CoalescenciaMiddleware
+
+
+def _scope(ruta: str = "/op/") -> dict:
+    return {"type": "http", "method": "GET", "path": ruta, "query_string": b"", "headers": []}
+
+
+async def _recibir():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+class Destino:
+    """'send' de ASGI que guarda los mensajes y avisa cuando llega el primero."""
+
+    def __init__(self):
+        self.mensajes = []
+        self.empezo = asyncio.Event()
+
+    async def __call__(self, mensaje):
+        self.mensajes.append(mensaje)
+        self.empezo.set()
+
+    @property
+    def cuerpo(self) -> bytes:
+        return b"".join(m.get("body", b"") for m in self.mensajes if m["type"] == "http.response.body")
+
+    @property
+    def headers(self) -> dict:
+        return dict(self.mensajes[0]["headers"])
+
+
+def test_lecturas_identicas_comparten_la_ejecucion():
+    async def prueba():
+        ejecuciones = 0
+        liberar = asyncio.Event()
+
+        async def app(scope, receive, send):
+            nonlocal ejecuciones
+            ejecuciones += 1
+            await liberar.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+            await send({"type": "http.response.body", "body": b"listado"})
+
+        middleware = CoalescenciaMiddleware(app, rutas=["/op/"])
+        destinos = [Destino() for _ in range(3)]
+        tareas = [asyncio.create_task(middleware(_scope(), _recibir, d)) for d in destinos]
+        await asyncio.sleep(0)
+        liberar.set()
+        await asyncio.gather(*tareas)
+
+        assert ejecuciones == 1
+        assert all(d.cuerpo == b"listado" for d in destinos)
+        assert sum(b"x-coalescido" in d.headers for d in destinos) == 2
+
+    asyncio.run(prueba())
+
+
+def test_respuesta_grande_se_transmite_sin_acumular(monkeypatch):
+    monkeypatch.setattr(coalescencia, "MAX_BYTES_RESPUESTA", 10)
+
+    async def prueba():
+        seguir = asyncio.Event()
+        lider = Destino()
+
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"a" * 8, "more_body": True})
+            await send({"type": "http.response.body", "body": b"b" * 8, "more_body": True})
+            # El cliente del líder ya recibió lo anterior antes de que la app termine
+            await seguir.wait()
+            await send({"type": "http.response.body", "body": b"c" * 8, "more_body": False})
+
+        middleware = CoalescenciaMiddleware(app, rutas=["/op/"])
+        tarea = asyncio.create_task(middleware(_scope(), _recibir, lider))
+        await asyncio.wait_for(lider.empezo.wait(), timeout=1)
+        assert lider.cuerpo == b"a" * 8 + b"b" * 8
+        seguir.set()
+        await tarea
+
+        assert lider.cuerpo == b"a" * 8 + b"b" * 8 + b"c" * 8
+        assert [m["type"] for m in lider.mensajes].count("http.response.start") == 1
+        assert lider.mensajes[-1].get("more_body", False) is False
+
+    asyncio.run(prueba())
+
+
+def test_respuesta_grande_no_se_comparte(monkeypatch):
+    monkeypatch.setattr(coalescencia, "MAX_BYTES_RESPUESTA", 10)
+
+    async def prueba():
+        ejecuciones = 0
+        seguir = asyncio.Event()
+
+        async def app(scope, receive, send):
+            nonlocal ejecuciones
+            ejecuciones += 1
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"x" * 16, "more_body": True})
+            await seguir.wait()
+            await send({"type": "http.response.body", "body": b"y", "more_body": False})
+
+        middleware = CoalescenciaMiddleware(app, rutas=["/op/"])
+        lider, otro = Destino(), Destino()
+        tarea_lider = asyncio.create_task(middleware(_scope(), _recibir, lider))
+        await asyncio.sleep(0)
+        tarea_otro = asyncio.create_task(middleware(_scope(), _recibir, otro))
+        await asyncio.wait_for(lider.empezo.wait(), timeout=1)
+        seguir.set()
+        await asyncio.gather(tarea_lider, tarea_otro)
+
+        assert ejecuciones == 2
+        assert lider.cuerpo == otro.cuerpo == b"x" * 16 + b"y"
+
+    asyncio.run(prueba())
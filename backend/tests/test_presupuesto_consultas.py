@@ -0,0 +1,50 @@
+# backend/tests/test_presupuesto_consultas.py
+#
+# Presupuesto de consultas SQL de los listados (core/instrumentacion.py: presupuesto_consultas).
+# Un listado no debe crecer en consultas con la cantidad de filas: si alguien saca un
+# selectinload/joinedload o agrega una relación perezosa al esquema, esto falla por exceso
+# de consultas o por una forma N+1 repetida. Base de pruebas, cliente y limpieza en conftest.py.
+
+import pytest
+
+from backend.core.instrumentacion import presupuesto_consultas
+from backend.schemas.maestros import EstadoLote
+
+# OPs con lotes de más de un estado: suficientes para que una carga perezosa por fila
+# repita su forma más veces que SQL_UMBRAL_N_MAS_1 (5)
+OPS = 6
+LOTES_POR_OP = 2
+
+# (url, consultas permitidas). Hoy: 5, 2, 3, 1 y 1.
+PRESUPUESTOS = [
+    ("/op/?limit=50", 6),
+    ("/lotes/", 2),
+    ("/pedidos/", 3),
+    ("/produccion/rutas/", 1),
+    ("/lotes/grid", 1),
+]
+
+
+@pytest.fixture
+def con_datos(runner, datos):
+    async def sembrar():
+        ruta = await datos.ruta()
+        for _ in range(OPS):
+            op = await datos.op()
+            for i in range(LOTES_POR_OP):
+                await datos.lote(EstadoLote(1 + i % 3), op=op, ruta=ruta)
+
+    runner.run(sembrar())
+    return datos
+
+
+@pytest.mark.parametrize("url, maximo", PRESUPUESTOS)
+def test_listado_dentro_del_presupuesto(runner, cliente, con_datos, url, maximo):
+    async def prueba():
+        async with presupuesto_consultas(maximo) as registro:
+            respuesta = await cliente.get(url)
+        assert respuesta.status_code == 200, respuesta.text
+        # Que el registro vio las consultas de la solicitud (si no, el presupuesto no prueba nada)
+        assert registro.cantidad >= 1
+
+    runner.run(prueba())
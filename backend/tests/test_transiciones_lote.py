@@ -0,0 +1,48 @@
+# backend/tests/test_transiciones_lote.py
+#
+# Transiciones de estado de lotes bajo concurrencia (POST /lotes/{id}/transicion).
+# Base de pruebas, cliente y limpieza en conftest.py.
+
+import asyncio
+
+from backend.schemas.maestros import EstadoLote
+
+SOLICITUDES_CONCURRENTES = 10
+
+
+def test_transiciones_concurrentes_una_sola_gana(runner, cliente, datos):
+    async def prueba():
+        lote_id = (await datos.lote(EstadoLote.EN_ESPERA))["lote_interno_id"]
+        transicion = {"estado_esperado": EstadoLote.EN_ESPERA.value, "estado": EstadoLote.EN_PROCESO.value}
+
+        respuestas = await asyncio.gather(*[
+            cliente.post(f"/lotes/{lote_id}/transicion", json=transicion)
+            for _ in range(SOLICITUDES_CONCURRENTES)
+        ])
+
+        codigos = sorted(r.status_code for r in respuestas)
+        assert codigos == [200] + [409] * (SOLICITUDES_CONCURRENTES - 1)
+        for r in respuestas:
+            if r.status_code == 409:
+                assert r.json()["detail"]["estado_actual"] == EstadoLote.EN_PROCESO.value
+
+        lote = (await cliente.get(f"/lotes/{lote_id}")).json()
+        assert lote["estado"] == EstadoLote.EN_PROCESO.value
+
+    runner.run(prueba())
+
+
+def test_transicion_no_permitida_no_toca_el_lote(runner, cliente, datos):
+    async def prueba():
+        lote_id = (await datos.lote(EstadoLote.LIBERADO))["lote_interno_id"]
+
+        respuesta = await cliente.post(f"/lotes/{lote_id}/transicion", json={
+            "estado_esperado": EstadoLote.LIBERADO.value, "estado": EstadoLote.EN_ESPERA.value,
+        })
+
+        assert respuesta.status_code == 422
+        assert "LIBERADO -> EN_ESPERA" in respuesta.json()["detail"]
+        lote = (await cliente.get(f"/lotes/{lote_id}")).json()
+        assert lote["estado"] == EstadoLote.LIBERADO.value
+
+    runner.run(prueba())
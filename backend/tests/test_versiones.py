@@ -0,0 +1,41 @@
+# backend/tests/test_versiones.py
+#
+# Concurrencia optimista de los PUT (core/versiones.py): If-Match con la ETag del GET.
+# Base de pruebas, cliente y limpieza en conftest.py.
+
+
+def _cuerpo(lote: dict, numero: str) -> dict:
+    return {
+        "op_id": lote["op_id"], "producto_id": lote["producto_id"], "ruta_id": lote["ruta_id"],
+        "lote_numero_visible": numero,
+    }
+
+
+def test_if_match(runner, cliente, datos):
+    async def prueba():
+        lote = await datos.lote()
+        url = f"/lotes/{lote['lote_interno_id']}"
+        etag = (await cliente.get(url)).headers["ETag"]
+
+        # Sin If-Match: 428
+        assert (await cliente.put(url, json=_cuerpo(lote, "A"))).status_code == 428
+        # ETag débil de la versión vigente: 400, no un 412 de "modificado por otro usuario"
+        respuesta = await cliente.put(url, json=_cuerpo(lote, "A"), headers={"If-Match": f"W/{etag}"})
+        assert respuesta.status_code == 400, respuesta.text
+
+        # ETag vigente: se aplica y cambia la versión
+        respuesta = await cliente.put(url, json=_cuerpo(lote, "B"), headers={"If-Match": etag})
+        assert respuesta.status_code == 200, respuesta.text
+        assert respuesta.headers["ETag"] != etag
+
+        # La ETag vieja ya no sirve: 412 con la versión actual
+        respuesta = await cliente.put(url, json=_cuerpo(lote, "C"), headers={"If-Match": etag})
+        assert respuesta.status_code == 412
+        assert respuesta.headers["ETag"] == f'"{respuesta.json()["detail"]["version_actual"]}"'
+
+        # '*': vale cualquier versión vigente
+        respuesta = await cliente.put(url, json=_cuerpo(lote, "D"), headers={"If-Match": "*"})
+        assert respuesta.status_code == 200, respuesta.text
+        assert respuesta.json()["lote_numero_visible"] == "D"
+
+    runner.run(prueba())